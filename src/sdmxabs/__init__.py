@@ -1,37 +1,153 @@
-"""Capture data from the Australian Bureau of Statistics (ABS) using the SDMX API."""
-
-from importlib.metadata import PackageNotFoundError, version
-
-from .download_cache import (
-    CacheError,
-    GetFileKwargs,
-    HttpError,
-    ModalityType,
-)
-from .fetch import fetch
-from .fetch_gdp import fetch_gdp
-from .fetch_multi import fetch_multi
-from .fetch_pop import fetch_pop, fetch_state_pop
-from .fetch_selection import MatchCriteria, MatchItem, MatchType, fetch_selection, make_wanted, match_item
-from .flow_metadata import (
-    FlowMetaDict,
-    code_list_for,
-    code_lists,
-    data_flows,
-    data_structures,
-    frame,
-    structure_from_flow_id,
-    structure_ident,
-)
-from .measures import measure_names, recalibrate, recalibrate_series
+"""Capture data from the Australian Bureau of Statistics (ABS) using the SDMX API.
+
+The public names are imported lazily, from the module that defines them, when
+they are first used. So importing the package is quick: it does not import
+pandas, numpy or requests, nor make any request to the ABS, until needed.
+"""
+
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .download_cache import (
+        CacheError,
+        GetFileKwargs,
+        HttpError,
+        ModalityType,
+        clear_memory_cache,
+        get_session,
+        make_session,
+        memory_cache_stats,
+        prune_cache,
+        set_memory_cache_size,
+        set_session,
+    )
+    from .fetch import fetch
+    from .fetch_async import fetch_async, fetch_multi_async
+    from .fetch_chunked import fetch_chunked
+    from .fetch_gdp import fetch_gdp
+    from .fetch_incremental import fetch_incremental
+    from .fetch_keys import SizeEstimate, estimate_size, fetch_series_keys
+    from .fetch_multi import fetch_multi
+    from .fetch_pop import fetch_pop, fetch_state_pop
+    from .fetch_selection import MatchCriteria, MatchItem, MatchType, fetch_selection, make_wanted, match_item
+    from .flow_metadata import (
+        FlowMetaDict,
+        attribute_attachments,
+        code_list_for,
+        code_lists,
+        data_flows,
+        data_structures,
+        frame,
+        load_structure,
+        prefetch_metadata,
+        structure_from_flow_id,
+        structure_ident,
+    )
+    from .measures import measure_names, recalibrate, recalibrate_series
+    from .metadata_bundle import use_metadata_bundle
+    from .metadata_store import clear_metadata_store
+    from .result_cache import clear_result_cache
+
+# --- the public names, by the module that defines them
+_MODULE_NAMES = {
+    "download_cache": (
+        "CacheError",
+        "GetFileKwargs",
+        "HttpError",
+        "ModalityType",
+        "clear_memory_cache",
+        "get_session",
+        "make_session",
+        "memory_cache_stats",
+        "prune_cache",
+        "set_memory_cache_size",
+        "set_session",
+    ),
+    "fetch": ("fetch",),
+    "fetch_async": ("fetch_async", "fetch_multi_async"),
+    "fetch_chunked": ("fetch_chunked",),
+    "fetch_gdp": ("fetch_gdp",),
+    "fetch_incremental": ("fetch_incremental",),
+    "fetch_keys": ("SizeEstimate", "estimate_size", "fetch_series_keys"),
+    "fetch_multi": ("fetch_multi",),
+    "fetch_pop": ("fetch_pop", "fetch_state_pop"),
+    "fetch_selection": (
+        "MatchCriteria",
+        "MatchItem",
+        "MatchType",
+        "fetch_selection",
+        "make_wanted",
+        "match_item",
+    ),
+    "flow_metadata": (
+        "FlowMetaDict",
+        "attribute_attachments",
+        "code_list_for",
+        "code_lists",
+        "data_flows",
+        "data_structures",
+        "frame",
+        "load_structure",
+        "prefetch_metadata",
+        "structure_from_flow_id",
+        "structure_ident",
+    ),
+    "measures": ("measure_names", "recalibrate", "recalibrate_series"),
+    "metadata_bundle": ("use_metadata_bundle",),
+    "metadata_store": ("clear_metadata_store",),
+    "result_cache": ("clear_result_cache",),
+}
+_LAZY_NAMES = {name: module for module, names in _MODULE_NAMES.items() for name in names}
 
 # --- version and author
-try:
-    __version__ = version(__name__)
-except PackageNotFoundError:
-    __version__ = "0.0.0"  # Fallback for development mode
 __author__ = "Bryan Palmer"
 
+
+def _version() -> str:
+    """Get the version of the installed package."""
+    from importlib.metadata import PackageNotFoundError, version  # noqa: PLC0415 - only when asked
+
+    try:
+        return version(__name__)
+    except PackageNotFoundError:
+        return "0.0.0"  # Fallback for development mode
+
+
+def __getattr__(name: str) -> object:
+    """Import a public name from its module when it is first used."""
+    if name == "__version__":
+        value: object = _version()
+    elif name in _LAZY_NAMES:
+        value = getattr(import_module(f".{_LAZY_NAMES[name]}", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # so it is only imported once
+    return value
+
+
+def __dir__() -> list[str]:
+    """List the package contents, including the names not yet imported."""
+    return sorted({*globals(), *__all__})
+
+
+class _Package(ModuleType):
+    """The package module, which keeps its public functions when a submodule of the same name is imported.
+
+    Importing a submodule (for example, sdmxabs.fetch) binds it as an attribute of
+    the package, which would hide the public function of the same name.
+    """
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name in _LAZY_NAMES and isinstance(value, ModuleType):
+            return  # the submodule is still in sys.modules, for "from sdmxabs.fetch import ..."
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
 # --- establish the package contents
 __all__ = [
     "CacheError",
@@ -42,24 +158,44 @@ __all__ = [
     "MatchItem",
     "MatchType",
     "ModalityType",
+    "SizeEstimate",
     "__author__",
     "__version__",
+    "attribute_attachments",
+    "clear_memory_cache",
+    "clear_metadata_store",
+    "clear_result_cache",
     "code_list_for",
     "code_lists",
     "data_flows",
     "data_structures",
+    "estimate_size",
     "fetch",
+    "fetch_async",
+    "fetch_chunked",
     "fetch_gdp",
+    "fetch_incremental",
     "fetch_multi",
+    "fetch_multi_async",
     "fetch_pop",
     "fetch_selection",
+    "fetch_series_keys",
     "fetch_state_pop",
     "frame",
+    "get_session",
+    "load_structure",
+    "make_session",
     "make_wanted",
     "match_item",
     "measure_names",
+    "memory_cache_stats",
+    "prefetch_metadata",
+    "prune_cache",
     "recalibrate",
     "recalibrate_series",
+    "set_memory_cache_size",
+    "set_session",
     "structure_from_flow_id",
     "structure_ident",
+    "use_metadata_bundle",
 ]
@@ -0,0 +1,217 @@
+"""Track the size and last access time of the files in the download cache.
+
+The index is an append-only log in the cache directory. Each read from or
+write to the cache appends one short line, which is much cheaper than
+stat-ing every file in the directory to find the least recently used files.
+The log is folded into a table of entries when the cache is pruned, and is
+compacted when it has grown much longer than the number of entries (checked
+every COMPACT_CHECK_EVERY appends, so the log stays bounded even if the cache
+is never pruned).
+
+Reads served from the in-memory cache are noted in memory (note_access()),
+and only appended to the log when the cache is next pruned (flush_accesses()),
+so a hit in memory does no disk I/O.
+
+The index is only kept while the cache has a budget (see download_cache).
+Files saved while it had none are added to the index when it is next pruned.
+"""
+
+import stat
+import threading
+import time
+from pathlib import Path
+
+from sdmxabs.safe_io import file_lock, write_atomic
+
+# --- constants
+INDEX_NAME = "sdmxabs-cache-index.log"
+SEPARATOR = "\t"
+REMOVED = -1  # size recorded when a file is removed from the cache
+COMPACT_RATIO = 4  # compact the log when it has this many lines per entry
+COMPACT_MINIMUM = 1_000  # ... and at least this many lines
+COMPACT_CHECK_EVERY = 100  # appends (in this process) between checks on the length of the log
+
+IndexEntries = dict[str, tuple[int, float]]  # file name: (size in bytes, last access time)
+
+_appends: dict[Path, int] = {}  # cache directory: the number of lines appended by this process
+_noted: dict[Path, tuple[int, float]] = {}  # cached file: (size, access time) noted, not yet logged
+_appends_lock = threading.Lock()
+
+
+# --- private functions
+def _index_path(cache_dir: Path) -> Path:
+    """Get the path of the index log for a cache directory."""
+    return cache_dir / INDEX_NAME
+
+
+def _append(cache_dir: Path, lines: list[str]) -> None:
+    """Append lines to the index log."""
+    if not lines:
+        return
+    with _index_path(cache_dir).open("a", encoding="utf-8") as log:
+        log.write("".join(f"{line}\n" for line in lines))
+
+
+def _check_length(cache_dir: Path, exclude_suffixes: tuple[str, ...]) -> None:
+    """Compact the index log, every so often, once it has grown too long."""
+    with _appends_lock:
+        appended = _appends[cache_dir] = _appends.get(cache_dir, 0) + 1
+    if appended % COMPACT_CHECK_EVERY:
+        return
+    with file_lock(_index_path(cache_dir)):  # the lock held by prune_cache()
+        load_index(cache_dir, exclude_suffixes)  # compacts the log if it is too long
+
+
+def _is_indexed(name: str, exclude_suffixes: tuple[str, ...]) -> bool:
+    """Check whether a file in the cache directory is indexed in its own right."""
+    return not name.startswith(INDEX_NAME) and not name.endswith(exclude_suffixes)
+
+
+def _scan(cache_dir: Path, exclude_suffixes: tuple[str, ...]) -> IndexEntries:
+    """Build the index entries from the files in the cache directory."""
+    entries: IndexEntries = {}
+    for file in cache_dir.iterdir():
+        if not _is_indexed(file.name, exclude_suffixes) or not file.is_file():
+            continue
+        stat = file.stat()
+        entries[file.name] = (stat.st_size, stat.st_mtime)
+    return entries
+
+
+# --- protected functions - used by the download_cache module
+def record_access(cache_dir: Path, name: str, size: int, exclude_suffixes: tuple[str, ...] = ()) -> None:
+    """Record a read or write of a cached file.
+
+    If there is no index yet, one is first built by scanning the cache directory.
+    """
+    if not _index_path(cache_dir).exists():
+        compact_index(cache_dir, _scan(cache_dir, exclude_suffixes))
+    _append(cache_dir, [SEPARATOR.join((name, str(size), f"{time.time():.3f}"))])
+    _check_length(cache_dir, exclude_suffixes)
+
+
+def note_access(file: Path, size: int) -> None:
+    """Note a read of a cached file in memory, without any disk I/O (see flush_accesses())."""
+    with _appends_lock:
+        _noted[file] = (size, time.time())
+
+
+def flush_accesses(cache_dir: Path) -> None:
+    """Append the accesses noted in memory for the files in a cache directory to its index log."""
+    with _appends_lock:
+        files = [file for file in list(_noted) if file.parent == cache_dir]
+        noted = {file.name: _noted.pop(file) for file in files}
+    lines = [SEPARATOR.join((name, str(size), f"{accessed:.3f}")) for name, (size, accessed) in noted.items()]
+    _append(cache_dir, lines)
+
+
+def record_removal(cache_dir: Path, names: list[str]) -> None:
+    """Record that cached files have been removed."""
+    now = f"{time.time():.3f}"
+    _append(cache_dir, [SEPARATOR.join((name, str(REMOVED), now)) for name in names])
+
+
+def load_index(cache_dir: Path, exclude_suffixes: tuple[str, ...] = ()) -> IndexEntries:
+    """Load the index entries for a cache directory.
+
+    If there is no index yet (for example, a cache directory created by an older
+    version of this package), one is built by scanning the directory once.
+
+    Args:
+        cache_dir (Path): The cache directory.
+        exclude_suffixes (tuple[str, ...]): Suffixes of sidecar files, which are not
+            indexed in their own right.
+
+    Returns:
+        IndexEntries: A dictionary of file name: (size in bytes, last access time).
+
+    """
+    path = _index_path(cache_dir)
+    if not path.exists():
+        entries = _scan(cache_dir, exclude_suffixes)
+        compact_index(cache_dir, entries)
+        return entries
+
+    entries = {}
+    line_count = 0
+    with path.open(encoding="utf-8") as log:
+        for line in log:
+            line_count += 1
+            fields = line.rstrip("\n").split(SEPARATOR)
+            if len(fields) != 3:  # noqa: PLR2004
+                continue  # ignore a partial line (for example, from an interrupted write)
+            name, size, accessed = fields
+            try:
+                size_, accessed_ = int(size), float(accessed)
+            except ValueError:
+                continue
+            if size_ == REMOVED:
+                entries.pop(name, None)
+            else:
+                entries[name] = (size_, accessed_)
+
+    if line_count > max(COMPACT_MINIMUM, COMPACT_RATIO * len(entries)):
+        compact_index(cache_dir, entries)
+    return entries
+
+
+def reconcile_index(cache_dir: Path, entries: IndexEntries, exclude_suffixes: tuple[str, ...] = ()) -> bool:
+    """Bring the index entries into line with the files in the cache directory.
+
+    Entries for files that have gone (removed by hand, or by another process) are
+    dropped. Files that were never indexed (for example, saved while the cache had
+    no budget) are added, with their modification time as their last access.
+
+    Returns:
+        bool: True if the entries were changed.
+
+    """
+    names = {file.name for file in cache_dir.iterdir() if _is_indexed(file.name, exclude_suffixes)}
+    missing = [name for name in entries if name not in names]
+    for name in missing:
+        del entries[name]
+    added = False
+    for name in names.difference(entries):
+        try:
+            status = (cache_dir / name).stat()
+        except OSError:
+            continue
+        if stat.S_ISREG(status.st_mode):
+            entries[name] = (status.st_size, status.st_mtime)
+            added = True
+    return bool(missing) or added
+
+
+def compact_index(cache_dir: Path, entries: IndexEntries) -> None:
+    """Rewrite the index log with one line per entry."""
+    ordered = sorted(entries.items(), key=lambda item: item[1][1])
+    text = "".join(
+        f"{name}{SEPARATOR}{size}{SEPARATOR}{accessed:.3f}\n" for name, (size, accessed) in ordered
+    )
+    write_atomic(_index_path(cache_dir), text.encode("utf-8"))
+
+
+def select_evictions(entries: IndexEntries, max_bytes: int, max_entries: int) -> list[str]:
+    """Select the least recently used entries to remove to get within the budgets.
+
+    Args:
+        entries (IndexEntries): The index entries.
+        max_bytes (int): The maximum total size of the cache in bytes (0 for no limit).
+        max_entries (int): The maximum number of files in the cache (0 for no limit).
+
+    Returns:
+        list[str]: The names of the files to remove, least recently used first.
+
+    """
+    total_bytes = sum(size for size, _ in entries.values())
+    total_entries = len(entries)
+    evictions = []
+    for name, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+        over_bytes = max_bytes > 0 and total_bytes > max_bytes
+        over_entries = max_entries > 0 and total_entries > max_entries
+        if not over_bytes and not over_entries:
+            break
+        evictions.append(name)
+        total_bytes -= size
+        total_entries -= 1
+    return evictions
@@ -2,15 +2,106 @@
 
 The default cache directory can be specified by setting the environment
 variable SDMXABS_CACHE_DIR.
+
+The downloaded files are cached at the top level of the cache directory. By
+default, it also holds the package's other persistent stores, each in its own
+sub-directory: the parsed structural metadata (sdmxabs-metadata, see
+metadata_store), the parsed data results (sdmxabs-results, see result_cache)
+and the results kept by fetch_incremental (sdmxabs-incremental). Pruning only
+considers the files at the top level, so these sub-directories are never
+pruned with the cached files.
+
+All downloads share one pooled, keep-alive HTTP session, so repeated calls to
+the ABS re-use open connections rather than paying for a new TCP/TLS handshake
+every time. The pool can be sized with the environment variables
+SDMXABS_POOL_CONNECTIONS and SDMXABS_POOL_MAXSIZE, or replaced entirely with
+set_session().
+
+Alongside each cached file, the response validators (ETag and Last-Modified)
+are kept in a small JSON sidecar file. The "revalidate" modality uses them to
+make a conditional request, and serves the cached bytes when the server
+replies 304 (Not Modified).
+
+The "prefer-fresh" modality serves a cached file while it is younger than a
+maximum age, and only then goes back to the ABS. Structural metadata (data
+flows, data structures and code lists) rarely changes, so it has a longer
+default maximum age (SDMXABS_METADATA_MAX_AGE) than data (SDMXABS_DATA_MAX_AGE).
+
+The "no-store" modality always downloads, and leaves nothing behind: no cached
+file, validators, lock file or index entry. It is for one-off requests whose
+URL will never be asked for again (for example, the updatedAfter requests of
+fetch_incremental).
+
+The cache directory can be kept to a byte budget (SDMXABS_CACHE_MAX_BYTES)
+and/or a file-count budget (SDMXABS_CACHE_MAX_ENTRIES). When a budget is
+exceeded, the least recently used files are removed. Accesses are only
+indexed (see cache_index) while there is a budget. Use prune_cache() to
+prune the cache explicitly.
+
+Many processes can share the one cache directory. Cached files are replaced
+atomically, and an advisory lock ensures only one process downloads a given
+URL at a time: the others wait, and then use the newly cached file. Within a
+process, concurrent requests for the same URL (with the same modality and
+max_age) are coalesced: the first thread acquires the URL, and the others wait
+for and share its result.
+
+Cached files can be compressed on disk, by setting SDMXABS_CACHE_COMPRESSION
+to "gzip", "zstd" or "auto" (zstd if it is available, otherwise gzip). The
+zstd codec comes from the standard library in Python 3.14, or from the optional
+zstandard package. Compressed and uncompressed files can sit side by side in
+the one cache directory: the codec is recognised from the start of each file.
+
+Recently used payloads, and the XML trees parsed from them, are also kept in
+memory, in front of the file-system cache. A cached file is re-read from disk
+only when it has been replaced, and a hit in memory writes nothing to disk.
+The in-memory budget (in bytes) can be set with SDMXABS_MEMORY_CACHE_BYTES, or
+with set_memory_cache_size(). A budget of 0 turns the in-memory cache off.
 """
 
+import gzip
+import json
 import re
+import threading
+import time
+from collections.abc import Callable, Hashable, Mapping
+from concurrent.futures import Future
 from hashlib import sha256
 from os import getenv
 from pathlib import Path
 from typing import Literal, NotRequired, TypedDict, Unpack
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from sdmxabs.cache_index import (
+    INDEX_NAME,
+    compact_index,
+    flush_accesses,
+    load_index,
+    note_access,
+    reconcile_index,
+    record_access,
+    record_removal,
+    select_evictions,
+)
+from sdmxabs.memory_cache import MemoryCache
+from sdmxabs.safe_io import LOCK_SUFFIX, TEMP_SUFFIX, file_lock, file_stamp, remove_locked, write_atomic
+
+try:  # a faster codec for the cache - Python 3.14+ or the zstandard package
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore[import-not-found, no-redef]
+    except ImportError:
+        zstd = None
+
+
+# --- protected helpers for configuration - not for the user, but used outside this module
+def int_from_env(name: str, default: int) -> int:
+    """Get a non-negative integer from an environment variable, or return the default."""
+    text = getenv(name, str(default))
+    return int(text) if text is not None and text.isdigit() else default
+
 
 # --- constants
 # define the default cache directory
@@ -21,24 +112,81 @@ SDMXABS_CACHE_PATH = Path(SDMXABS_CACHE_DIR)
 # define the default download timeout
 # This is the time to wait for a response from the server before giving up.
 DOWNLOAD_TIMEOUT_DEFAULT = 120  # seconds
-DOWNLOAD_TIMEOUT_STR = getenv("SDMXABS_DOWNLOAD_TIMEOUT", str(DOWNLOAD_TIMEOUT_DEFAULT))  # seconds
-DOWNLOAD_TIMEOUT = (
-    int(DOWNLOAD_TIMEOUT_STR)
-    if DOWNLOAD_TIMEOUT_STR is not None and DOWNLOAD_TIMEOUT_STR.isdigit()
-    else DOWNLOAD_TIMEOUT_DEFAULT
-)
+DOWNLOAD_TIMEOUT = int_from_env("SDMXABS_DOWNLOAD_TIMEOUT", DOWNLOAD_TIMEOUT_DEFAULT)  # seconds
+
+# define the default HTTP connection pool
+# POOL_CONNECTIONS is the number of hosts for which a pool is kept,
+# POOL_MAXSIZE is the maximum number of kept-alive connections per host.
+POOL_CONNECTIONS_DEFAULT = 4
+POOL_CONNECTIONS = int_from_env("SDMXABS_POOL_CONNECTIONS", POOL_CONNECTIONS_DEFAULT)
+POOL_MAXSIZE_DEFAULT = 10
+POOL_MAXSIZE = int_from_env("SDMXABS_POOL_MAXSIZE", POOL_MAXSIZE_DEFAULT)
+# the number of worker threads for the asynchronous API (see fetch_async)
+ASYNC_MAX_WORKERS = int_from_env("SDMXABS_ASYNC_MAX_WORKERS", POOL_MAXSIZE)
+
+# the response validators kept with each cached file
+VALIDATOR_SUFFIX = ".validators"
+VALIDATOR_HEADERS = {  # response header: conditional request header
+    "ETag": "If-None-Match",
+    "Last-Modified": "If-Modified-Since",
+}
+NOT_MODIFIED = 304  # HTTP status code
+NO_RECORDS_FOUND = 404  # the ABS reply when nothing matches a data request
+
+# define the default maximum age of a cached file for the "prefer-fresh" modality
+METADATA_MAX_AGE_DEFAULT = 7 * 24 * 60 * 60  # seconds
+METADATA_MAX_AGE = int_from_env("SDMXABS_METADATA_MAX_AGE", METADATA_MAX_AGE_DEFAULT)
+DATA_MAX_AGE_DEFAULT = 60 * 60  # seconds
+DATA_MAX_AGE = int_from_env("SDMXABS_DATA_MAX_AGE", DATA_MAX_AGE_DEFAULT)
+STRUCTURE_ENDPOINTS = ("dataflow", "datastructure", "codelist", "conceptscheme")
+
+# define the default budgets for the cache directory (0 means no limit)
+CACHE_MAX_BYTES = int_from_env("SDMXABS_CACHE_MAX_BYTES", 0)
+CACHE_MAX_ENTRIES = int_from_env("SDMXABS_CACHE_MAX_ENTRIES", 0)
+SIDECAR_SUFFIXES = (VALIDATOR_SUFFIX, LOCK_SUFFIX)  # files that live and die with a cached file
+NOT_INDEXED = (*SIDECAR_SUFFIXES, TEMP_SUFFIX)  # files in the cache directory that are not indexed
+
+# define the default compression for cached files: "none", "gzip", "zstd" or "auto"
+CACHE_COMPRESSION = getenv("SDMXABS_CACHE_COMPRESSION", "none").lower()
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# define the default budget for each of the in-memory caches (0 turns them off)
+MEMORY_CACHE_BYTES_DEFAULT = 256 * 1024 * 1024
+MEMORY_CACHE_BYTES = int_from_env("SDMXABS_MEMORY_CACHE_BYTES", MEMORY_CACHE_BYTES_DEFAULT)
+TREE_SIZE_FACTOR = 4  # rough memory taken by a parsed XML tree, per byte of XML
 
 
 # --- Classes
 class HttpError(Exception):
     """A problem retrieving data using HTTP."""
 
+    def __init__(self, message: str, status: int | None = None) -> None:
+        """Record the problem, and the HTTP status code (if the server replied)."""
+        super().__init__(message)
+        self.status = status
+
 
 class CacheError(Exception):
     """A problem retrieving data from the cache."""
 
 
-ModalityType = Literal["prefer-cache", "prefer-url"]
+def no_records_found(error: BaseException | None) -> bool:
+    """Check whether a failed request was the ABS replying that no records matched.
+
+    With the "prefer-url" modality, the HttpError is the cause of the CacheError raised
+    when there is no cached copy to fall back on.
+    """
+    while error is not None:
+        if isinstance(error, HttpError) and error.status == NO_RECORDS_FOUND:
+            return True
+        error = error.__cause__
+    return False
+
+
+ModalityType = Literal["prefer-cache", "prefer-url", "revalidate", "prefer-fresh", "no-store"]
 
 
 class GetFileKwargs(TypedDict):
@@ -47,10 +195,206 @@ class GetFileKwargs(TypedDict):
     verbose: NotRequired[bool]
     """If True, print information about the data retrieval process."""
     modality: NotRequired[ModalityType]
-    """Kind of retrieval: "prefer_cache", "prefer_url"."""
+    """Kind of retrieval: "prefer_cache", "prefer_url", "revalidate", "prefer-fresh", "no-store"."""
+    max_age: NotRequired[int]
+    """For "prefer-fresh": the maximum age (in seconds) of a usable cached file."""
+
+
+# --- the in-memory caches
+PAYLOAD_CACHE = MemoryCache(MEMORY_CACHE_BYTES)  # cache file path: (file stamp, payload)
+TREE_CACHE = MemoryCache(MEMORY_CACHE_BYTES)  # (url, payload): parsed XML tree - see xml_base
+
+
+# --- the shared HTTP session
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def make_session(
+    pool_connections: int = POOL_CONNECTIONS,
+    pool_maxsize: int = POOL_MAXSIZE,
+    *,
+    pool_block: bool = True,
+    keep_alive: bool = True,
+) -> requests.Session:
+    """Make a requests Session with a pooled, keep-alive connection adapter.
+
+    Args:
+        pool_connections (int): The number of hosts for which connection pools are kept.
+        pool_maxsize (int): The maximum number of connections kept open to any one host.
+        pool_block (bool): If True, callers wait for a free connection once pool_maxsize
+            connections to a host are in use, so pool_maxsize is a hard per-host limit.
+            If False, extra (non-pooled) connections are opened when the pool is exhausted.
+        keep_alive (bool): If False, ask the server to close each connection after use.
+
+    Returns:
+        requests.Session: A session suitable for passing to set_session().
+
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the HTTP session shared by all downloads, creating it on first use.
+
+    Returns:
+        requests.Session: The shared session.
+
+    """
+    global _session  # noqa: PLW0603
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def set_session(session: requests.Session | None) -> None:
+    """Replace the HTTP session shared by all downloads.
+
+    Args:
+        session (requests.Session | None): The session to use for all subsequent
+            downloads. Pass None to close the current session and revert to a default
+            session (built from the SDMXABS_POOL_* settings) on next use.
+
+    Note:
+        Use make_session() to build a session with a differently sized pool, or
+        supply your own session (for example, one with proxies or retry policies).
+
+    """
+    global _session  # noqa: PLW0603
+    with _session_lock:
+        if _session is not None and _session is not session:
+            _session.close()
+        _session = session
+
+
+# --- public functions - managing the in-memory caches
+def set_memory_cache_size(max_bytes: int) -> None:
+    """Set the budget (in bytes) for each of the in-memory caches.
+
+    Args:
+        max_bytes (int): The budget for the cached payloads, and (separately) for
+            the XML trees parsed from them. Use 0 to turn the in-memory caches off.
+
+    """
+    for memory_cache in (PAYLOAD_CACHE, TREE_CACHE):
+        memory_cache.max_bytes = max_bytes
+
+
+def clear_memory_cache() -> None:
+    """Empty the in-memory caches, and reset their hit and miss counters."""
+    for memory_cache in (PAYLOAD_CACHE, TREE_CACHE):
+        memory_cache.clear()
+
+
+def memory_cache_stats() -> dict[str, dict[str, int]]:
+    """Get the hit and miss counters, and the sizes, of the in-memory caches.
+
+    Returns:
+        dict[str, dict[str, int]]: The statistics for the "payloads" cache and
+            the "trees" cache.
+
+    """
+    return {"payloads": PAYLOAD_CACHE.stats(), "trees": TREE_CACHE.stats()}
+
+
+# --- public functions - managing the size of the cache
+def prune_cache(
+    max_bytes: int | None = None,
+    max_entries: int | None = None,
+    cache_dir: Path = SDMXABS_CACHE_PATH,
+    *,
+    verbose: bool = False,
+) -> list[str]:
+    """Remove the least recently used files from the cache until it is within budget.
+
+    Args:
+        max_bytes (int | None): The maximum total size of the cached files in bytes.
+            Defaults to SDMXABS_CACHE_MAX_BYTES. Use 0 for no limit.
+        max_entries (int | None): The maximum number of cached files.
+            Defaults to SDMXABS_CACHE_MAX_ENTRIES. Use 0 for no limit.
+        cache_dir (Path): The cache directory to prune.
+        verbose (bool): If True, print the names of the files removed.
+
+    Returns:
+        list[str]: The names of the cached files that were removed.
+
+    Note:
+        prune_cache(0, 0) removes nothing, but brings the index of the cache into
+        line with the files on disk (for example, after files were deleted by hand).
+
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    if not cache_dir.is_dir():
+        return []
+
+    with file_lock(cache_dir / INDEX_NAME):  # one pruner at a time
+        flush_accesses(cache_dir)  # the reads served from memory since the last prune
+        entries = load_index(cache_dir, NOT_INDEXED)
+        if reconcile_index(cache_dir, entries, NOT_INDEXED):
+            compact_index(cache_dir, entries)
+
+        evictions = []
+        for name in select_evictions(entries, max_bytes, max_entries):
+            # --- under the file's lock, so a download in progress is never pulled out from under
+            if remove_locked(cache_dir / name, (VALIDATOR_SUFFIX,)):
+                if verbose:
+                    print(f"Removing from cache: {name}")
+                evictions.append(name)
+        record_removal(cache_dir, evictions)
+
+        # --- the sidecars left by downloads that were never cached (for example, a 404)
+        for lock in cache_dir.glob(f"*{LOCK_SUFFIX}"):
+            cached = lock.with_name(lock.name.removesuffix(LOCK_SUFFIX))
+            if cached.name != INDEX_NAME and not cached.exists():
+                remove_locked(cached, (VALIDATOR_SUFFIX,))
+    return evictions
 
 
 # --- private functions
+def _has_budget() -> bool:
+    """Check whether the cache directory has a budget, and so needs an index of accesses."""
+    return bool(CACHE_MAX_BYTES or CACHE_MAX_ENTRIES)
+
+
+_in_flight: dict[Hashable, Future[bytes]] = {}  # (cache file path, modality, max_age): the pending result
+_in_flight_lock = threading.Lock()
+
+
+def _single_flight(key: Hashable, acquire: Callable[[], bytes]) -> bytes:
+    """Coalesce concurrent acquisitions with the same key (single-flight).
+
+    The first caller runs acquire(); callers arriving while it is running wait for,
+    and share, its result (or its exception).
+    """
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+        if pending is None:
+            leader = Future[bytes]()
+            _in_flight[key] = leader
+    if pending is not None:
+        return pending.result()
+
+    try:
+        result = acquire()
+    except BaseException as e:
+        leader.set_exception(e)
+        raise
+    else:
+        leader.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
 def _check_for_bad_response(
     url: str,
     response: requests.Response,
@@ -69,7 +413,38 @@ def _check_for_bad_response(
     code = response.status_code
     if code not in success_codes or response.headers is None:
         problem = f"Problem {code} accessing: {url}."
-        raise HttpError(problem)
+        raise HttpError(problem, code)
+
+
+def _compress(contents: bytes, codec: str) -> bytes:
+    """Compress bytes for the cache, with the named codec."""
+    if codec == "auto":
+        codec = "zstd" if zstd is not None else "gzip"
+    match codec:
+        case "none":
+            return contents
+        case "gzip":
+            return gzip.compress(contents, compresslevel=GZIP_LEVEL, mtime=0)
+        case "zstd" if zstd is not None:
+            return zstd.compress(contents, level=ZSTD_LEVEL)
+        case "zstd":
+            raise CacheError("zstd compression needs Python 3.14+ or the zstandard package")
+        case _:
+            raise CacheError(f"Unknown cache compression: {codec}")
+
+
+def _decompress(contents: bytes, name: str) -> bytes:
+    """Decompress bytes from the cache, recognising the codec from the leading bytes."""
+    try:
+        if contents.startswith(GZIP_MAGIC):
+            return gzip.decompress(contents)
+        if contents.startswith(ZSTD_MAGIC):
+            if zstd is None:
+                raise CacheError(f"Cached file {name} is zstd compressed, but zstd is not available")
+            return zstd.decompress(contents)
+    except (OSError, EOFError, ValueError) as e:
+        raise CacheError(f"Cached file {name} could not be decompressed ({e})") from e
+    return contents
 
 
 def _save_to_cache(
@@ -84,52 +459,155 @@ def _save_to_cache(
 
     file_path.parent.mkdir(parents=True, exist_ok=True)  # Ensure parent dirs exist
 
-    if file_path.exists():
-        file_path.unlink()
-
     if verbose:
         print(f"Saving to cache: {file_path}")
-    file_path.write_bytes(contents)  # This handles file opening/closing automatically
+    stored = _compress(contents, CACHE_COMPRESSION)
+    write_atomic(file_path, stored)  # readers never see a missing or partly written file
+    PAYLOAD_CACHE.put(str(file_path), (file_stamp(file_path), contents), len(contents))
+
+    if _has_budget():
+        record_access(file_path.parent, file_path.name, len(stored), NOT_INDEXED)
+        prune_cache(CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, file_path.parent, verbose=verbose)
+
+
+def _validators_path(file_path: Path) -> Path:
+    """Get the path of the sidecar file holding the validators for a cached file."""
+    return file_path.with_name(file_path.name + VALIDATOR_SUFFIX)
+
+
+def _load_validators(file_path: Path) -> dict[str, str]:
+    """Load the response validators saved for a cached file (empty if there are none)."""
+    sidecar = _validators_path(file_path)
+    try:
+        validators = json.loads(sidecar.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(validators, dict):
+        return {}
+    return {k: str(v) for k, v in validators.items() if k in VALIDATOR_HEADERS}
+
+
+def _save_validators(file_path: Path, headers: Mapping[str, str]) -> None:
+    """Save the response validators for a cached file, or remove stale ones."""
+    validators = {name: headers[name] for name in VALIDATOR_HEADERS if headers.get(name)}
+    sidecar = _validators_path(file_path)
+    if not validators:
+        sidecar.unlink(missing_ok=True)
+        return
+    write_atomic(sidecar, json.dumps(validators).encode("utf-8"))
 
 
 def _request_get(
     url: str,
     file_path: Path,
+    *,
+    revalidate: bool = False,
+    store: bool = True,
     **kwargs: Unpack[GetFileKwargs],
 ) -> bytes:
-    """Get the contents of the specified URL."""
+    """Get the contents of the specified URL.
+
+    If revalidate is True, and there are validators for the cached file, make a
+    conditional request, and return the cached contents if the server reports
+    that they have not been modified. If store is False, the contents are not
+    saved to the cache.
+    """
     # Initialise variables
 
     verbose = kwargs.get("verbose", False)
     if verbose:
         print(f"About to request/download: {url}")
 
+    headers = {}
+    if revalidate and file_path.is_file():
+        validators = _load_validators(file_path)
+        headers = {VALIDATOR_HEADERS[name]: value for name, value in validators.items()}
+
     try:
-        gotten = requests.get(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+        gotten = get_session().get(url, headers=headers, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
     except requests.exceptions.RequestException as e:
         error = f"_request_get(): there was a problem downloading {url} --> ({e})."
         raise HttpError(error) from e
 
+    if headers and gotten.status_code == NOT_MODIFIED:
+        if verbose:
+            print(f"Not modified since cached: {url}")
+        file_path.touch()  # the cached file is fresh again
+        return _retrieve_from_cache(file_path, **kwargs)
+
     _check_for_bad_response(url, gotten)  # exception on error
 
     return_bytes = gotten.content
-    if len(gotten.content) > 0:
+    if store and len(gotten.content) > 0:
         _save_to_cache(file_path, return_bytes, **kwargs)
+        _save_validators(file_path, gotten.headers)
 
     return return_bytes
 
 
 def _retrieve_from_cache(file: Path, **kwargs: Unpack[GetFileKwargs]) -> bytes:
-    """Retrieve bytes from file-system."""
+    """Retrieve bytes from the in-memory cache, or else from the file-system.
+
+    A payload held in memory is used only while the cached file is unchanged.
+    """
     verbose = kwargs.get("verbose", False)
 
-    if not file.exists() or not file.is_file():
+    stamp = file_stamp(file)
+    if stamp is None or not file.is_file():
         message = f"Cached file not available: {file.name}"
         raise CacheError(message)
+
+    held = PAYLOAD_CACHE.get(str(file))
+    if held is not None and held[0] == stamp:
+        if verbose:
+            print(f"Retrieving from memory: {file}")
+        if _has_budget():
+            note_access(file, stamp[1])  # no disk I/O for a hit in memory
+        return held[1]
+
     if verbose:
         print(f"Retrieving from cache: {file}")
+    stored = file.read_bytes()
+    if _has_budget():
+        record_access(file.parent, file.name, len(stored), NOT_INDEXED)
+    contents = _decompress(stored, file.name)
+    PAYLOAD_CACHE.put(str(file), (stamp, contents), len(contents))  # stamp from before the read
+    return contents
+
 
-    return file.read_bytes()
+def _download(
+    url: str, file_path: Path, *, revalidate: bool = False, **kwargs: Unpack[GetFileKwargs]
+) -> bytes:
+    """Download the URL while holding the advisory lock for its cached file.
+
+    If another process saved the cached file while we were waiting for the lock,
+    it has just downloaded the same URL, so we use its result from the cache.
+    """
+    before = file_stamp(file_path)
+    with file_lock(file_path):
+        if file_stamp(file_path) not in (before, None):
+            if kwargs.get("verbose", False):
+                print(f"Downloaded by another process: {url}")
+            return _retrieve_from_cache(file_path, **kwargs)
+        return _request_get(url, file_path, revalidate=revalidate, **kwargs)
+
+
+def _max_age(url: str, **kwargs: Unpack[GetFileKwargs]) -> int:
+    """Get the maximum age (in seconds) of a usable cached file for this URL."""
+    if "max_age" in kwargs:
+        return kwargs["max_age"]
+    if any(f"/{endpoint}/" in url for endpoint in STRUCTURE_ENDPOINTS):
+        return METADATA_MAX_AGE
+    return DATA_MAX_AGE
+
+
+def _is_fresh(url: str, file_path: Path, **kwargs: Unpack[GetFileKwargs]) -> bool:
+    """Check whether a cached file is younger than its maximum age."""
+    try:
+        age = time.time() - file_path.stat().st_mtime
+    except OSError:
+        return False
+    return age < _max_age(url, **kwargs)
 
 
 def _get_data(url: str, file_path: Path, **kwargs: Unpack[GetFileKwargs]) -> bytes:
@@ -137,6 +615,17 @@ def _get_data(url: str, file_path: Path, **kwargs: Unpack[GetFileKwargs]) -> byt
     # --- set arguments
     modality: ModalityType = kwargs.get("modality", "prefer-cache")
 
+    # --- prefer-fresh: use the cache while it is fresh, then revalidate
+    if modality == "prefer-fresh" and _is_fresh(url, file_path, **kwargs):
+        return _retrieve_from_cache(file_path, **kwargs)
+
+    # --- revalidate: a conditional request, using the cache if not modified
+    if modality in ("revalidate", "prefer-fresh") and file_path.is_file():
+        try:
+            return _download(url, file_path, revalidate=True, **kwargs)
+        except HttpError:
+            return _retrieve_from_cache(file_path, **kwargs)
+
     # --- prefer-cache
     tried_cache = False
     if file_path.exists() and file_path.is_file() and modality != "prefer-url":
@@ -150,14 +639,17 @@ def _get_data(url: str, file_path: Path, **kwargs: Unpack[GetFileKwargs]) -> byt
 
     # --- prefer_url
     try:
-        return _request_get(url, file_path, **kwargs)
-    except HttpError:
+        return _download(url, file_path, **kwargs)
+    except HttpError as error:
         if tried_cache:
             # if we tried the cache, then we have no choice but to raise the error
             raise
 
-    # if we did not try the cache, then we can return the cached file
-    return _retrieve_from_cache(file_path, **kwargs)
+        # if we did not try the cache, then we can return the cached file
+        try:
+            return _retrieve_from_cache(file_path, **kwargs)
+        except CacheError as cache_error:
+            raise cache_error from error  # keep the reason the URL could not be used
 
 
 # --- protected functions - not for the user, but used outside this module
@@ -203,7 +695,14 @@ def acquire_url(
         msg = f"Cache path is not a directory: {cache_dir.name}"
         raise CacheError(msg)
 
-    return _get_data(url, get_fpath(), **kwargs)
+    file_path = get_fpath()
+    if kwargs.get("modality") == "no-store":  # straight from the URL, leaving nothing in the cache
+        return _request_get(url, file_path, store=False, **kwargs)
+
+    # --- only share a result with callers that would accept it: a "prefer-url" caller
+    # must not be given the cached bytes read for a concurrent "prefer-cache" caller
+    key = (str(file_path), kwargs.get("modality", "prefer-cache"), kwargs.get("max_age"))
+    return _single_flight(key, lambda: _get_data(url, file_path, **kwargs))
 
 
 if __name__ == "__main__":
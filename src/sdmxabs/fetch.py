@@ -1,23 +1,31 @@
 """Obtain data from the ABS SDMX API."""
 
-from dataclasses import dataclass
-from typing import Unpack
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any, Unpack
+from urllib.parse import quote
 from xml.etree.ElementTree import Element
 
 import numpy as np
 import pandas as pd
 
-from sdmxabs.download_cache import GetFileKwargs
+from sdmxabs.download_cache import GetFileKwargs, acquire_url
 from sdmxabs.flow_metadata import (
     CODE_LIST_ID,
     FLOW_NAME,
     FlowMetaDict,
+    attribute_attachments,
     build_key,
     code_lists,
     data_flows,
+    data_structures,
     structure_from_flow_id,
+    structure_ident,
 )
-from sdmxabs.xml_base import NAME_SPACES, URL_STEM, acquire_xml
+from sdmxabs.result_cache import load_result, payload_digest, save_result
+from sdmxabs.xml_base import NAME_SPACES, URL_STEM, iter_xml_elements, parse_xml
 
 # --- constants
 FREQUENCY_MAPPING = {
@@ -28,6 +36,10 @@ FREQUENCY_MAPPING = {
 }
 
 XML_KEY_SETS = ("SeriesKey", "Attributes")
+DATA_FORMATS = {"xml": "", "csv": "csvfile", "json": "jsondata"}  # format: the ABS API format parameter
+CSV_TIME_PERIOD = "TIME_PERIOD"
+CSV_OBS_VALUE = "OBS_VALUE"
+CSV_NON_DIMENSIONS = {"DATAFLOW", "STRUCTURE", "STRUCTURE_ID", "ACTION"}  # SDMX-CSV columns before the key
 CODELIST_PACKAGE_TYPE = "codelist"
 DECODE_EXCLUSIONS = {"UNIT_MULT"}  # Metadata items that should not be decoded
 
@@ -39,7 +51,6 @@ class MetadataContext:
     series_count: int
     label_elements: list[str]
     meta_items: dict[str, str]
-    structure: FlowMetaDict
     item_count: int
 
 
@@ -69,10 +80,9 @@ def _extract_observation_data(xml_series: Element) -> dict[str, str]:
     return series_elements
 
 
-def _get_series_data(xml_series: Element, meta: pd.Series) -> pd.Series:
-    """Extract observed data from the XML for a given single series."""
-    series_elements = _extract_observation_data(xml_series)
-    series: pd.Series = pd.Series(series_elements)
+def _series_from_observations(observations: dict[str, str], label: str, frequency: str) -> pd.Series:
+    """Build the data for a single series from its observations (period: value)."""
+    series: pd.Series = pd.Series(observations)
 
     # --- if we can, make the series values numeric
     series = series.replace("", np.nan)
@@ -80,33 +90,80 @@ def _get_series_data(xml_series: Element, meta: pd.Series) -> pd.Series:
         series = pd.to_numeric(series)
     except ValueError:
         # If conversion fails, keep the series as is (it may contain useful non-numeric data)
-        print(f"Could not convert series {meta.name} to numeric, keeping as is.")
+        print(f"Could not convert series {label} to numeric, keeping as is.")
 
     # --- convert to PeriodIndex if frequency is available, and sort the index
-    frequency = meta.get("FREQ", "")
     return _convert_to_period_index(series, frequency).sort_index()
 
 
-def _decode_meta_value(meta_value: str, meta_id: str, structure: FlowMetaDict) -> str:
-    """Decode a metadata value based on its ID and the relevant ABS codelist."""
-    # Early return if basic requirements not met
-    if meta_id not in structure:
-        return meta_value
+def _decode_tables(structure: FlowMetaDict, meta_ids: Iterable[str]) -> dict[str, dict[str, str]]:
+    """Build a code: name table for each metadata item that is decoded with an ABS codelist.
 
-    dim_config = structure[meta_id]
-    if CODE_LIST_ID not in dim_config or "package" not in dim_config:
-        return meta_value
+    Built once for a data message, so the codes for all the series can be decoded in one
+    pass for each item, rather than looking up the structure and codelist for every value.
+    Items that are not decoded (those in DECODE_EXCLUSIONS, and those without an ABS
+    codelist) have no table.
+    """
+    tables = {}
+    for meta_id in meta_ids:
+        dim_config = structure.get(meta_id, {})
+        if (
+            meta_id in DECODE_EXCLUSIONS
+            or not dim_config.get(CODE_LIST_ID)
+            or dim_config.get("package") != CODELIST_PACKAGE_TYPE
+        ):
+            continue
+        cl = code_lists(dim_config[CODE_LIST_ID])
+        tables[meta_id] = {code: item["name"] for code, item in cl.items() if "name" in item}
+    return tables
 
-    # Early return if not a codelist
-    if not dim_config[CODE_LIST_ID] or dim_config["package"] != CODELIST_PACKAGE_TYPE:
-        return meta_value
 
-    # Try to decode using codelist
-    cl = code_lists(dim_config[CODE_LIST_ID])
-    if meta_value in cl and "name" in cl[meta_value]:
-        return cl[meta_value]["name"]
+def _metadata_version(flow_id: str) -> str:
+    """Get the version of the structural metadata with which the data of a flow are decoded.
 
-    return meta_value
+    It is made from the times the data flows, the flow's data structure and attribute
+    attachments, and the code lists of the structure were kept (see the metadata_store
+    module), so it changes whenever any of them is refreshed. A result decoded with
+    older metadata is then not used again (see the result_cache module). Only the kept
+    entries are looked at: nothing is fetched that decoding the data would not fetch.
+    """
+    struct_id = structure_ident(flow_id)
+    cl_ids = sorted(
+        {
+            item[CODE_LIST_ID]
+            for item in structure_from_flow_id(flow_id).values()
+            if item.get(CODE_LIST_ID) and item.get("package") == CODELIST_PACKAGE_TYPE
+        }
+    )
+    stamps = [
+        data_flows.stored_at(),
+        data_structures.stored_at(struct_id),
+        attribute_attachments.stored_at(struct_id),
+        *(code_lists.stored_at(cl_id) for cl_id in cl_ids),
+    ]
+    return json.dumps([struct_id, stamps])
+
+
+def _categorical_meta(meta: pd.DataFrame, flow_ids: Iterable[str]) -> pd.DataFrame:
+    """Convert each column of the metadata to a pandas categorical.
+
+    For the items decoded with an ABS codelist, the categories are the names in the
+    codelist (in codelist order, followed by any codes that could not be decoded), so
+    the metadata from different fetches of a flow share the same categories. The other
+    items (for example, DATAFLOW and UNIT_MULT) take the distinct values they hold.
+    """
+    if meta.empty:
+        return meta
+    tables: dict[str, dict[str, str]] = {}
+    for flow_id in dict.fromkeys(flow_ids):
+        for meta_id, table in _decode_tables(structure_from_flow_id(flow_id), meta.columns).items():
+            tables.setdefault(meta_id, {}).update(table)
+    dtypes = {}
+    for meta_id in meta.columns:
+        values = meta[meta_id].dropna().unique().tolist()
+        names = list(tables[meta_id].values()) if meta_id in tables else sorted(values)
+        dtypes[meta_id] = pd.CategoricalDtype(list(dict.fromkeys([*names, *values])))
+    return meta.astype(dtypes)
 
 
 def _process_xml_attributes(xml_series: Element, key_set: str, context: MetadataContext) -> None:
@@ -123,87 +180,474 @@ def _process_xml_attributes(xml_series: Element, key_set: str, context: Metadata
             "value", f"missing meta_value {context.series_count}-{context.item_count}"
         )
         context.label_elements.append(meta_value)
-        if meta_id not in DECODE_EXCLUSIONS:
-            context.meta_items[meta_id] = _decode_meta_value(meta_value, meta_id, context.structure)
-        else:
-            context.meta_items[meta_id] = meta_value
+        context.meta_items[meta_id] = meta_value  # decoded later, for all the series at once
         context.item_count += 1
 
 
+def _flow_name(flow_id: str) -> str:
+    """Get the name of a data flow (or its ID, if it has no name)."""
+    return data_flows().get(flow_id, {FLOW_NAME: flow_id})[FLOW_NAME]
+
+
 def _get_series_meta_data(
-    flow_id: str, xml_series: Element, series_count: int, structure: FlowMetaDict
-) -> tuple[str, pd.Series]:
-    """Extract and decode metadata from the XML tree for one given series.
+    flow_id: str, xml_series: Element, series_count: int, flow_name: str
+) -> tuple[str, dict[str, str]]:
+    """Extract the metadata codes from the XML tree for one given series.
 
     Args:
         flow_id (str): The ID of the data flow to which the series belongs.
         xml_series (Element): The XML element representing the series.
         series_count (int): The index of the series in the XML tree.
-        structure (FlowMetaDict): Dictionary containing the data structure metadata dimensions and
-            their associated codelist names.
+        flow_name (str): The name of the data flow.
 
     Returns:
-        tuple[str, pd.Series]: A tuple containing the series label and a Series
-            of metadata items for the series.
+        tuple[str, dict[str, str]]: A tuple containing the series label and the
+            metadata items for the series (as codes, which are decoded later for all
+            the series at once).
 
     """
-    label_elements = [flow_id]
-    flow_name = data_flows().get(flow_id, {FLOW_NAME: flow_id})[FLOW_NAME]
-    meta_items = {"DATAFLOW": flow_name}
-
     context = MetadataContext(
         series_count=series_count,
-        label_elements=label_elements,
-        meta_items=meta_items,
-        structure=structure,
+        label_elements=[flow_id],
+        meta_items={"DATAFLOW": flow_name},
         item_count=0,
     )
 
     for key_set in XML_KEY_SETS:
         _process_xml_attributes(xml_series, key_set, context)
 
-    series_label = ".".join(context.label_elements)
-    return series_label, pd.Series(context.meta_items).rename(series_label)
+    return ".".join(context.label_elements), context.meta_items
 
 
 def _extract(flow_id: str, tree: Element) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Extract data from the XML tree."""
-    # Get the data dimensions for the flow_id, it provides entree to the metadata
-    structure = structure_from_flow_id(flow_id)
+    return _extract_series(flow_id, tree.findall(".//gen:Series", NAME_SPACES))
 
-    meta = {}
-    data: dict[str, pd.Series] = {}
-    for series_count, xml_series in enumerate(tree.findall(".//gen:Series", NAME_SPACES)):
+
+@dataclass
+class FlatObservations:
+    """The observations of all the series in a data message, collected into flat arrays."""
+
+    labels: list[str] = field(default_factory=list)  # for each series
+    frequencies: list[str] = field(default_factory=list)  # for each series, the decoded FREQ (if any)
+    items: list[dict[str, str]] = field(default_factory=list)  # for each series, the metadata codes
+    tables: dict[str, dict[str, str]] = field(default_factory=dict)  # metadata item: code: name
+    series: list[int] = field(default_factory=list)  # for each observation, the position of its series
+    periods: list[str] = field(default_factory=list)  # for each observation
+    observed: list[str] = field(default_factory=list)  # for each observation, the value (as text)
+
+
+def _collect_observations(flow_id: str, all_series: Iterable[Element]) -> FlatObservations:
+    """Collect the metadata codes and observations of each series, in one pass over the series."""
+    flat = FlatObservations()
+    flow_name = ""
+    for series_count, xml_series in enumerate(all_series):
         if xml_series is None:
             print("No Series found in XML tree, skipping.")
             continue
-        label, meta_series = _get_series_meta_data(
-            flow_id,
-            # python typing is not smart enough to know that
-            # xml_series is an ElementTree
-            xml_series,
-            series_count,
-            structure,
-        )
-        series = _get_series_data(xml_series, meta_series)
+        flow_name = flow_name or _flow_name(flow_id)
+        label, items = _get_series_meta_data(flow_id, xml_series, series_count, flow_name)
+        observations = _extract_observation_data(xml_series)
+        flat.series.extend([len(flat.labels)] * len(observations))
+        flat.periods.extend(observations.keys())
+        flat.observed.extend(observations.values())
+        flat.labels.append(label)
+        flat.items.append(items)
+    _prepare_decoding(flow_id, flat)
+    return flat
+
+
+def _prepare_decoding(flow_id: str, flat: FlatObservations) -> None:
+    """Build the decode tables for the metadata items in flat, and decode the frequency of each series."""
+    # Get the data dimensions for the flow_id, it provides entree to the metadata
+    structure = structure_from_flow_id(flow_id)
+    meta_ids = dict.fromkeys(meta_id for items in flat.items for meta_id in items)
+    flat.tables = _decode_tables(structure, meta_ids)
+    frequencies = flat.tables.get("FREQ", {})
+    flat.frequencies = [
+        frequencies.get(items["FREQ"], items["FREQ"]) if "FREQ" in items else "" for items in flat.items
+    ]
+
+
+def _assemble_per_series(flat: FlatObservations) -> pd.DataFrame:
+    """Build the data one series at a time, and then align the series (the general path)."""
+    data: dict[str, pd.Series] = {}
+    bounds = np.searchsorted(flat.series, np.arange(len(flat.labels) + 1))
+    for position, (label, frequency) in enumerate(zip(flat.labels, flat.frequencies, strict=True)):
+        start, stop = bounds[position], bounds[position + 1]
+        observations = dict(zip(flat.periods[start:stop], flat.observed[start:stop], strict=True))
+        series = _series_from_observations(observations, label, frequency)
         if label in data:
             # sometimes the SDMX API returns two incomplete series with the same metadata (our label)
             # my guess: the API may be inconsistent sometimes.
             series = series.combine_first(data[label])
-        meta[label] = meta_series
         series.name = label
         data[label] = series
+    return pd.DataFrame(data)
+
+
+def _assemble_flat(flat: FlatObservations) -> pd.DataFrame | None:
+    """Build the data from the flat arrays with a single pivot (the fast path).
+
+    Returns None if the message needs the general path: series with duplicate labels,
+    series without observations, mixed frequencies, or non-numeric values.
+    """
+    series_count = len(flat.labels)
+    frequencies = set(flat.frequencies)
+    if (
+        not series_count
+        or len(set(flat.labels)) != series_count
+        or len(frequencies) != 1
+        or len(set(flat.series)) != series_count
+    ):
+        return None
+
+    # --- the values: "" is missing, and all must be numeric
+    text = pd.Series(flat.observed, dtype=object)
+    try:
+        numeric: pd.Series = pd.to_numeric(text.mask(text == ""))
+    except (ValueError, TypeError):
+        return None
+    integral = pd.api.types.is_integer_dtype(numeric.dtype)  # all the values are integers
+    values = numeric.to_numpy(dtype=float)
+
+    # --- the periods: convert each distinct period once, then sort
+    period_codes, uniques = pd.factorize(np.asarray(flat.periods, dtype=object))
+    frequency = frequencies.pop()
+    index = pd.Index(list(uniques))
+    if frequency in FREQUENCY_MAPPING:
+        index = pd.PeriodIndex(index, freq=FREQUENCY_MAPPING[frequency])
+    order = index.argsort()
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    # --- pivot into one matrix
+    series_codes = np.asarray(flat.series)
+    matrix = np.full((len(index), series_count), np.nan)
+    matrix[rank[period_codes], series_codes] = values
+    data = pd.DataFrame(matrix, index=index[order], columns=pd.Index(flat.labels))
+
+    # --- as pd.to_numeric() would for each series: complete series of integers stay integers
+    is_complete = np.bincount(series_codes, minlength=series_count) == len(index)
+    if not integral:
+        # only the series with whole values need their text checked (for "1.0", "1e3", etc.)
+        not_whole = np.isnan(values) | (values != np.round(values))
+        candidate = is_complete & ~(np.bincount(series_codes, weights=not_whole, minlength=series_count) > 0)
+        checked = candidate[series_codes]
+        not_integer = np.zeros(len(values), dtype=bool)
+        not_integer[checked] = ~text[checked].str.fullmatch(r"[+-]?\d+").to_numpy(dtype=bool)
+        has_not_integer = np.bincount(series_codes, weights=not_integer, minlength=series_count) > 0
+        is_complete = candidate & ~has_not_integer
+    integers = [flat.labels[i] for i in np.flatnonzero(is_complete)]
+    if integers:
+        data = data.astype(dict.fromkeys(integers, "int64"))
+    return data
+
+
+def _assemble(flat: FlatObservations) -> pd.DataFrame:
+    """Build the data from the flat arrays, with a single pivot if possible."""
+    data = _assemble_flat(flat)
+    return _assemble_per_series(flat) if data is None else data
+
+
+def _meta_frame(flat: FlatObservations) -> pd.DataFrame:
+    """Build the metadata from the codes for each series (for a repeated label, the last wins).
+
+    The codes are decoded one column at a time, with the decode tables in flat.
+    """
+    first = list(flat.items[0]) if flat.items else []
+    if len(set(flat.labels)) == len(flat.labels) and all(list(items) == first for items in flat.items):
+        # every series has the same items: build the frame directly from the codes
+        meta = pd.DataFrame(
+            [list(items.values()) for items in flat.items], index=pd.Index(flat.labels), columns=first
+        )
+    else:
+        meta = pd.DataFrame(
+            {label: pd.Series(items) for label, items in zip(flat.labels, flat.items, strict=True)}
+        ).T
+    for meta_id, table in flat.tables.items():
+        if meta_id in meta.columns:
+            codes = meta[meta_id]
+            meta[meta_id] = codes.map(table).fillna(codes)
+    return meta
+
+
+def _extract_series(flow_id: str, all_series: Iterable[Element]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Extract data from the gen:Series elements of a data message, one series at a time.
+
+    The observations are collected into flat arrays in one pass, and the wide data
+    DataFrame is then built with a single pivot, falling back to building and aligning
+    each series in turn for messages the pivot cannot handle.
+    """
+    flat = _collect_observations(flow_id, all_series)
+    return _assemble(flat), _meta_frame(flat)  # data, meta
+
+
+def _read_csv(url: str, payload: bytes) -> pd.DataFrame:
+    """Read an SDMX-CSV data message into a table of text (with "" for missing values)."""
+    try:
+        table = pd.read_csv(BytesIO(payload), dtype=str, keep_default_na=False)
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid CSV received from {url}: {e}") from e
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+    if not table.empty and not {CSV_TIME_PERIOD, CSV_OBS_VALUE} <= set(table.columns):
+        raise ValueError(f"Invalid SDMX-CSV received from {url}: no {CSV_TIME_PERIOD} or {CSV_OBS_VALUE}")
+    return table
+
+
+def _series_attributes(
+    flow_id: str, table: pd.DataFrame, attributes: list[str], codes: np.ndarray
+) -> list[str]:
+    """Select the attribute columns of an SDMX-CSV table that belong to the series (not observations).
+
+    The attachment level in the data structure decides. An attribute missing from the
+    data structure is taken to belong to the series if it is constant within every series.
+    """
+    levels = attribute_attachments(structure_ident(flow_id))
+    selected = []
+    for attribute in attributes:
+        level = levels.get(attribute)
+        values = table[attribute]
+        if level == "series" or (level is None and values.eq(values.groupby(codes).transform("first")).all()):
+            selected.append(attribute)
+    return selected
+
+
+def _extract_table(flow_id: str, table: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Extract data from an SDMX-CSV table, to the same result as _extract() for SDMX-ML."""
+    if table.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    columns = list(table.columns)
+    dimensions = [
+        name for name in columns[: columns.index(CSV_TIME_PERIOD)] if name not in CSV_NON_DIMENSIONS
+    ]
+    if not dimensions:
+        raise ValueError(f"No dimensions found in the SDMX-CSV data for {flow_id}")
+    attributes = columns[columns.index(CSV_OBS_VALUE) + 1 :]
+
+    # --- one series for each key, in order of appearance (the last of any repeated observation wins)
+    table = table.drop_duplicates(subset=[*dimensions, CSV_TIME_PERIOD], keep="last")
+    codes = table.groupby(dimensions, sort=False).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    table, codes = table.iloc[order], codes[order]
+    series_attributes = _series_attributes(flow_id, table, attributes, codes)
+
+    # --- the metadata codes for each series, decoded as for SDMX-ML
+    flat = FlatObservations(
+        series=codes.tolist(),
+        periods=table[CSV_TIME_PERIOD].tolist(),
+        observed=table[CSV_OBS_VALUE].tolist(),
+    )
+    flow_name = _flow_name(flow_id)
+    starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    for row in table[[*dimensions, *series_attributes]].iloc[starts].itertuples(index=False):
+        label_elements = [flow_id]
+        meta_items = {"DATAFLOW": flow_name}
+        for meta_id, meta_value in zip([*dimensions, *series_attributes], row, strict=True):
+            if meta_id in series_attributes and not meta_value:
+                continue  # an attribute not reported for this series
+            label_elements.append(meta_value)
+            meta_items[meta_id] = meta_value
+        flat.labels.append(".".join(label_elements))
+        flat.items.append(meta_items)
+    _prepare_decoding(flow_id, flat)
+
+    return _assemble(flat), _meta_frame(flat)  # data, meta
+
+
+def _read_json(url: str, payload: bytes) -> dict[str, Any]:
+    """Read an SDMX-JSON data message (keeping decimal values as text, as in SDMX-ML)."""
+    try:
+        message = json.loads(payload, parse_float=str)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid JSON received from {url}: {e}") from e
+    if not isinstance(message, dict):
+        raise ValueError(f"Invalid SDMX-JSON received from {url}: not a JSON object")  # noqa: TRY004
+    return message
+
+
+def _json_value_ids(component: dict[str, Any]) -> np.ndarray:
+    """Get the value IDs of an SDMX-JSON component, with "" appended (so an index of -1 is "")."""
+    return np.array([value.get("id", "") for value in component.get("values", [])] + [""], dtype=object)
+
+
+def _json_lookup(
+    component: dict[str, Any], indices: np.ndarray, tables: dict[str, dict[str, str]]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Look up the codes, and the decoded codes, for SDMX-JSON value indices (-1 if not reported).
+
+    Each distinct value is decoded once (as for SDMX-ML), whatever the number of series.
+    """
+    value_ids = _json_value_ids(component)
+    decoded = value_ids
+    if (table := tables.get(component["id"])) is not None:
+        decoded = np.array([table.get(value, value) for value in value_ids], dtype=object)
+    return value_ids[indices], decoded[indices]
+
+
+def _json_attribute_indices(series_list: list[dict[str, Any]], attribute_count: int) -> np.ndarray:
+    """Get the series attributes of each SDMX-JSON series, as value indices (-1 if not reported)."""
+    indices = np.full((len(series_list), attribute_count), -1, dtype=int)
+    for row, series in enumerate(series_list):
+        for column, index in enumerate((series.get("attributes") or [])[:attribute_count]):
+            if index is not None:
+                indices[row, column] = index
+    return indices
+
+
+def _json_observations(
+    flat: FlatObservations, series_list: list[dict[str, Any]], periods: np.ndarray
+) -> None:
+    """Collect the observations of each SDMX-JSON series, looking up the periods by index."""
+    period_indices = []
+    for row, series in enumerate(series_list):
+        observations = series.get("observations") or {}
+        flat.series.extend([row] * len(observations))
+        for index, observation in observations.items():
+            period_indices.append(int(index))
+            value = observation[0] if observation else None
+            flat.observed.append("" if value is None else str(value))
+    flat.periods = periods[np.array(period_indices, dtype=int)].tolist()
+
+
+def _extract_json(
+    flow_id: str, message: dict[str, Any], selection: dict[str, frozenset[str] | None] | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Extract data from an SDMX-JSON message, to the same result as _extract() for SDMX-ML.
+
+    SDMX-JSON gives each series key (and the series attributes, and the observation
+    periods) as integer indices into arrays of values. The metadata for all the series
+    is looked up with those indices, one vectorized lookup for each dimension and
+    attribute, rather than decoding the codes series by series.
+
+    Args:
+        flow_id (str): The ID of the data flow.
+        message (dict[str, Any]): The SDMX-JSON data message.
+        selection (dict[str, frozenset[str] | None] | None): If given, only extract the
+            series with these codes (dimension: allowed codes, or None for any code).
 
-    return pd.DataFrame(data), pd.DataFrame(meta).T  # data, meta
+    """
+    content = message.get("data", message)
+    json_structure: dict[str, Any] = content.get("structure") or next(
+        iter(content.get("structures") or []), {}
+    )
+    datasets = content.get("dataSets") or [{}]
+    all_series: dict[str, dict[str, Any]] = datasets[0].get("series") or {}
+    dimensions = json_structure.get("dimensions", {}).get("series", [])
+    attributes = json_structure.get("attributes", {}).get("series", [])
+
+    # --- the series keys are indices into the dimension values: select the wanted series
+    keys = np.array([key.split(":") for key in all_series], dtype=int).reshape(
+        len(all_series), len(dimensions)
+    )
+    keep = np.ones(len(keys), dtype=bool)
+    for position, dimension in enumerate(dimensions):
+        allowed = (selection or {}).get(dimension["id"])
+        if allowed is not None:
+            keep &= np.isin(_json_value_ids(dimension)[keys[:, position]], list(allowed))
+    series_list = [series for series, wanted in zip(all_series.values(), keep, strict=True) if wanted]
+    if not series_list:
+        return pd.DataFrame(), pd.DataFrame()
+
+    # --- look up the codes and the decoded codes for every series at once
+    indices = np.hstack([keys[keep], _json_attribute_indices(series_list, len(attributes))])
+    components = [*dimensions, *attributes]
+    meta_ids = [component["id"] for component in components]
+    tables = _decode_tables(structure_from_flow_id(flow_id), meta_ids)
+    lookups = [_json_lookup(component, indices[:, i], tables) for i, component in enumerate(components)]
+    labels = np.full(len(series_list), flow_id, dtype=object)
+    for codes, _ in lookups:
+        labels = np.where(codes != "", labels + "." + codes, labels)
+
+    flat = FlatObservations(labels=labels.tolist(), tables=tables)
+    flat.frequencies = (
+        lookups[meta_ids.index("FREQ")][1].tolist() if "FREQ" in meta_ids else [""] * len(labels)
+    )
+    _json_observations(
+        flat,
+        series_list,
+        _json_value_ids(next(iter(json_structure["dimensions"].get("observation", [])), {})),
+    )
+
+    # --- the metadata: in one frame if every series has every item, otherwise series by series
+    flow_name = _flow_name(flow_id)
+    if (indices >= 0).all() and len(set(flat.labels)) == len(flat.labels):
+        items = {"DATAFLOW": flow_name} | {
+            meta_id: decoded for meta_id, (_, decoded) in zip(meta_ids, lookups, strict=True)
+        }
+        return _assemble(flat), pd.DataFrame(items, index=pd.Index(flat.labels))
+    flat.items = [
+        {"DATAFLOW": flow_name}
+        | {meta_id: codes[row] for meta_id, (codes, _) in zip(meta_ids, lookups, strict=True) if codes[row]}
+        for row in range(len(flat.labels))
+    ]
+    return _assemble(flat), _meta_frame(flat)
+
+
+def _check_parameters(parameters: dict[str, str] | None) -> None:
+    """Check the SDMX parameters for a data request, raising ValueError if invalid."""
+    valid_detail_values = {"full", "dataonly", "serieskeysonly", "nodata"}
+    if parameters:
+        detail_value = parameters.get("detail")
+        if detail_value and detail_value not in valid_detail_values:
+            raise ValueError(f"Invalid detail value '{detail_value}'. Must be one of: {valid_detail_values}")
+
+
+def _check_format(format: str) -> None:  # noqa: A002
+    """Check the format for a data request, raising ValueError if invalid."""
+    if format not in DATA_FORMATS:
+        raise ValueError(f"Invalid format '{format}'. Must be one of: {set(DATA_FORMATS)}")
+
+
+def _data_url(flow_id: str, key: str, parameters: dict[str, str] | None, format: str = "xml") -> str:  # noqa: A002
+    """Build the URL for a data request, with optional parameters."""
+    url = f"{URL_STEM}/data/{flow_id}/{key}"
+    url_params = []
+    if parameters:
+        if "startPeriod" in parameters:
+            url_params.append(f"startPeriod={parameters['startPeriod']}")
+        if "endPeriod" in parameters:
+            url_params.append(f"endPeriod={parameters['endPeriod']}")
+        if "detail" in parameters:
+            url_params.append(f"detail={parameters['detail']}")
+        if "updatedAfter" in parameters:
+            url_params.append(f"updatedAfter={quote(parameters['updatedAfter'])}")
+    if DATA_FORMATS.get(format):
+        url_params.append(f"format={DATA_FORMATS[format]}")
+    if url_params:
+        url += "?" + "&".join(url_params)
+    return url
+
+
+def _parse(
+    flow_id: str,
+    url: str,
+    payload: bytes,
+    format: str,  # noqa: A002
+    *,
+    stream: bool = False,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Parse a data message, in the given format, to the data and the metadata."""
+    if format == "csv":
+        return _extract_table(flow_id, _read_csv(url, payload))
+    if format == "json":
+        return _extract_json(flow_id, _read_json(url, payload))
+    if stream:
+        return _extract_series(flow_id, iter_xml_elements(url, payload, "gen:Series"))
+    return _extract(flow_id, parse_xml(url, payload))
 
 
 # === public functions ===
-def fetch(
+def fetch(  # noqa: PLR0913
     flow_id: str,
     selection: dict[str, str] | None = None,
     parameters: dict[str, str] | None = None,
     *,
     validate: bool = False,
+    stream: bool = False,
+    format: str = "xml",  # noqa: A002
+    categorical: bool = False,
     **kwargs: Unpack[GetFileKwargs],
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Fetch data from the ABS SDMX API.
@@ -218,10 +662,27 @@ def fetch(
             - 'startPeriod': Start period for data filtering (e.g., '2020-Q1')
             - 'endPeriod': End period for data filtering (e.g., '2023-Q4')
             - 'detail': Level of detail ('full', 'dataonly', 'serieskeysonly', 'nodata')
+            - 'updatedAfter': Only the observations added or revised after this time
+              (an ISO 8601 date-time, e.g. '2025-07-01T00:00:00+00:00'); see fetch_incremental()
             If None, no parameters are applied.
         validate (bool, optional): If True, validate  against the flow's
             required dimensions when generating the URL key. Defaults to False.
-        **kwargs (GetFileKwargs): Additional keyword arguments passed to acquire_xml().
+        stream (bool, optional): If True, parse the response incrementally, one
+            series at a time, rather than building the whole XML tree. This bounds
+            the memory used for parsing very large responses (for example, unfiltered
+            requests for big flows). Defaults to False. Only used with format="xml".
+        format (str, optional): The format in which to request the data: "xml" (generic
+            SDMX-ML, the default), "csv" (SDMX-CSV, which is much smaller for wide
+            requests, and is read in one vectorized call) or "json" (SDMX-JSON, which
+            gives the series keys as indices into arrays of codes). Whatever the format,
+            the codes are decoded with the ABS codelists, and the result is the same.
+        categorical (bool, optional): If True, return each column of the metadata as a
+            pandas categorical. The categories of the items decoded with an ABS codelist
+            are the names in the codelist, so the metadata of separate fetches can be
+            combined without losing the dtype. This uses much less memory for large
+            requests, and makes grouping and filtering on the metadata faster.
+            Defaults to False.
+        **kwargs (GetFileKwargs): Additional keyword arguments passed to acquire_url().
 
     Returns: a tuple of two DataFrames:
         - The first DataFrame contains the fetched data.
@@ -231,45 +692,54 @@ def fetch(
         HttpError: If there is an issue with the HTTP request.
         CacheError: If there is an issue with the cache.
         ValueError: If no XML root is found in the response.
-        ValueError: If invalid parameter values are provided.
+        ValueError: If invalid parameter values (or an invalid format) are provided.
 
     Notes:
         If the `dims` argument is not valid you should get a CacheError or HttpError.
         If the `flow_id` is not valid, you should get a ValueError.
+        The result parsed from each data message is kept (see the result_cache module),
+        and it is used again, rather than parsing the message again, for as long as the
+        message for the request, and the metadata with which it was decoded, are unchanged.
+        With modality="no-store", neither the message nor the result is kept.
 
     """
     # --- report the parameters used if requested
     verbose = kwargs.get("verbose", False)
     if verbose:
-        print(f"fetch(): {flow_id=} {selection=} {parameters=} {validate=} {kwargs=}")
+        print(
+            f"fetch(): {flow_id=} {selection=} {parameters=} {validate=} {stream=} {format=} {categorical=} "
+            f"{kwargs=}"
+        )
 
     # --- validate parameters
-    valid_detail_values = {"full", "dataonly", "serieskeysonly", "nodata"}
-    if parameters:
-        detail_value = parameters.get("detail")
-        if detail_value and detail_value not in valid_detail_values:
-            raise ValueError(f"Invalid detail value '{detail_value}'. Must be one of: {valid_detail_values}")
+    _check_parameters(parameters)
+    _check_format(format)
 
     # --- prepare to get the XML root from the ABS SDMX API
     # prefer fresh data every time
     kwargs["modality"] = kwargs.get("modality", "prefer-url")
     key = build_key(flow_id, selection, validate=validate)
 
-    # --- build URL with optional parameters
-    url = f"{URL_STEM}/data/{flow_id}/{key}"
-    if parameters:
-        url_params = []
-        if "startPeriod" in parameters:
-            url_params.append(f"startPeriod={parameters['startPeriod']}")
-        if "endPeriod" in parameters:
-            url_params.append(f"endPeriod={parameters['endPeriod']}")
-        if "detail" in parameters:
-            url_params.append(f"detail={parameters['detail']}")
-        if url_params:
-            url += "?" + "&".join(url_params)
-
-    xml_root = acquire_xml(url, **kwargs)
-    return _extract(flow_id, xml_root)
+    url = _data_url(flow_id, key, parameters, format)
+    payload = acquire_url(url, **kwargs)
+
+    # --- a one-off request leaves nothing behind, not even its parsed result
+    if kwargs["modality"] == "no-store":
+        data, meta = _parse(flow_id, url, payload, format, stream=stream)
+        return data, _categorical_meta(meta, [flow_id]) if categorical else meta
+
+    # --- use the result parsed from an identical message (decoded with the same metadata), if any
+    result = load_result(url, payload_digest(payload, _metadata_version(flow_id)))
+    if result is None:
+        result = _parse(flow_id, url, payload, format, stream=stream)
+        if not result[0].empty:
+            # the metadata used for decoding is now kept, so it has a version (see _metadata_version())
+            save_result(url, payload_digest(payload, _metadata_version(flow_id)), *result)
+    elif verbose:
+        print(f"fetch(): using the result parsed earlier from {url}")
+    data, meta = result
+
+    return data, _categorical_meta(meta, [flow_id]) if categorical else meta
 
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+"""Asynchronous counterparts of the acquisition and fetch functions.
+
+Each coroutine runs its blocking counterpart in a shared pool of worker
+threads, so it has exactly the same cache semantics (modalities, locking,
+coalescing of concurrent requests for the same URL, and the in-memory caches),
+while leaving the event loop free. The pool bounds the number of requests in
+flight: by default it matches the size of the HTTP connection pool
+(SDMXABS_POOL_MAXSIZE), and it can be sized with SDMXABS_ASYNC_MAX_WORKERS.
+
+Note: cancelling a coroutine does not stop a download that is already under
+way in a worker thread; the result is cached, but not returned.
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+from typing import Unpack
+from xml.etree.ElementTree import Element
+
+import pandas as pd
+
+from sdmxabs.download_cache import ASYNC_MAX_WORKERS, SDMXABS_CACHE_PATH, GetFileKwargs, acquire_url
+from sdmxabs.fetch import _categorical_meta, fetch
+from sdmxabs.fetch_multi import (
+    FetchedRow,
+    FetchTask,
+    _assemble,
+    _check_wanted,
+    _collect,
+    _fetch_tasks,
+    _fetched_flows,
+    _wanted_rows,
+)
+from sdmxabs.xml_base import acquire_xml
+
+# --- private functions
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the pool of worker threads shared by all the coroutines (created on first use)."""
+    global _executor  # noqa: PLW0603
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, ASYNC_MAX_WORKERS), thread_name_prefix="sdmxabs"
+            )
+        return _executor
+
+
+async def _run[T](func: Callable[..., T], /, *args: object, **kwargs: object) -> T:
+    """Run a blocking function in the shared pool of worker threads."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+
+# --- public functions
+async def acquire_url_async(
+    url: str,
+    cache_dir: Path = SDMXABS_CACHE_PATH,
+    cache_prefix: str = "cache",
+    **kwargs: Unpack[GetFileKwargs],
+) -> bytes:
+    """Acquire the data at an URL or from the cache, without blocking the event loop.
+
+    The asynchronous counterpart of acquire_url(), with the same arguments and
+    the same exceptions.
+    """
+    return await _run(acquire_url, url, cache_dir, cache_prefix, **kwargs)
+
+
+async def acquire_xml_async(url: str, **kwargs: Unpack[GetFileKwargs]) -> Element:
+    """Acquire and parse xml data from the ABS SDMX API, without blocking the event loop.
+
+    The asynchronous counterpart of acquire_xml(), with the same arguments and
+    the same exceptions.
+    """
+    return await _run(acquire_xml, url, **kwargs)
+
+
+async def fetch_async(  # noqa: PLR0913
+    flow_id: str,
+    selection: dict[str, str] | None = None,
+    parameters: dict[str, str] | None = None,
+    *,
+    validate: bool = False,
+    stream: bool = False,
+    format: str = "xml",  # noqa: A002
+    categorical: bool = False,
+    **kwargs: Unpack[GetFileKwargs],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Fetch data from the ABS SDMX API, without blocking the event loop.
+
+    The asynchronous counterpart of fetch(), with the same arguments and
+    the same exceptions.
+    """
+    return await _run(
+        fetch,
+        flow_id,
+        selection,
+        parameters,
+        validate=validate,
+        stream=stream,
+        format=format,
+        categorical=categorical,
+        **kwargs,
+    )
+
+
+async def fetch_multi_async(  # noqa: PLR0913
+    wanted: pd.DataFrame,
+    parameters: dict[str, str] | None = None,
+    *,
+    validate: bool = False,
+    max_concurrency: int | None = None,
+    plan: bool = True,
+    format: str = "xml",  # noqa: A002
+    categorical: bool = False,
+    **kwargs: Unpack[GetFileKwargs],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Fetch multiple SDMX datasets concurrently, without blocking the event loop.
+
+    The asynchronous counterpart of fetch_multi(). The requests for the rows of
+    wanted are made concurrently, but the results are assembled in the order of
+    the rows, exactly as fetch_multi() would assemble them.
+
+    Args:
+        wanted (pd.DataFrame): A DataFrame with rows for each desired data set.
+            See fetch_multi().
+        parameters (dict[str, str] | None): Additional parameters for each fetch.
+        validate (bool): If True, validate the dimensions and values against the
+            ABS SDMX API codelists. Defaults to False.
+        max_concurrency (int | None): The maximum number of requests to make at once.
+            Defaults to None, which is limited only by the shared pool of worker
+            threads (SDMXABS_ASYNC_MAX_WORKERS).
+        plan (bool): If True (the default), merge compatible rows into fewer requests.
+            See fetch_multi().
+        format (str): The format in which to request the data ("xml", "csv" or "json"). See fetch().
+        categorical (bool): If True, return the metadata as pandas categoricals. See fetch().
+        **kwargs: Additional keyword arguments passed to the underlying data fetching function.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The fetched data, and its metadata.
+
+    Raises:
+        ValueError: If the 'flow_id' column is missing from the `wanted` DataFrame,
+            or if incompatible index types are detected.
+
+    """
+    if not _check_wanted(wanted):
+        return pd.DataFrame(), pd.DataFrame()
+
+    limiter: asyncio.Semaphore | nullcontext[None]
+    limiter = asyncio.Semaphore(max_concurrency) if max_concurrency else nullcontext()
+
+    async def run_task(task: FetchTask) -> list[tuple[int, FetchedRow]]:
+        async with limiter:
+            return await _run(task)
+
+    rows = _wanted_rows(wanted)
+    tasks = await _run(_fetch_tasks, rows, parameters, validate=validate, plan=plan, format=format, **kwargs)
+    done = await asyncio.gather(*(run_task(task) for task in tasks))
+    fetched = _collect(done, len(rows))
+    data, meta = _assemble(fetched)
+    if categorical:
+        meta = await _run(_categorical_meta, meta, _fetched_flows(rows, fetched))
+    return data, meta
+
+
+if __name__ == "__main__":
+
+    def module_test() -> None:
+        """Run a simple test of the module."""
+        wanted = pd.DataFrame(
+            {
+                "flow_id": ["CPI", "CPI"],
+                "MEASURE": ["3", "3"],
+                "INDEX": ["10001", "999902"],
+                "TSEST": ["10", "20"],
+                "REGION": ["50", "50"],
+                "FREQ": ["Q", "Q"],
+            }
+        )
+        parameters = {"startPeriod": "2020-Q1", "endPeriod": "2020-Q4"}
+        data, _meta = asyncio.run(fetch_multi_async(wanted, parameters, modality="prefer-url"))
+        expected = (4, 2)
+        if data.shape == expected:
+            print(f"Test passed: {data.shape=}.")
+        else:
+            print(f"Test FAILED: data shape {data.shape} is unexpected {expected=}.")
+
+    module_test()
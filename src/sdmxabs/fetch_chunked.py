@@ -0,0 +1,297 @@
+"""Fetch a large query in chunks, and reassemble the chunks into one result.
+
+The ABS can time out on, or refuse, a very large data request (for example, all
+the series of a big flow, with selection=None). fetch_chunked() splits such a
+query into smaller requests:
+- along a key dimension: the codes selected for the dimension (or, if it is not
+  selected, every code in its codelist, from the data structure) are requested
+  a few at a time, joined with "+".
+- along time: the periods are requested a few whole years at a time (with the
+  startPeriod and endPeriod parameters).
+
+Given a budget of observations per request, the size of the query is estimated
+first, from the keys of the series it matches (see fetch_keys), and only the
+codes with series are requested, grouped to stay within the budget.
+
+The chunks are fetched with fetch(), optionally in parallel, and reassembled into
+the series and periods one big fetch would return: the periods are sorted, and
+complete series of integers stay integers. The series are in the order they are
+first seen, chunk by chunk, which can differ from the order of the series in one
+big fetch (fetch() keeps the order of the data message). Chunks for which the ABS
+has no records are skipped.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from functools import partial
+from typing import Unpack
+
+import pandas as pd
+
+from sdmxabs.download_cache import NO_RECORDS_FOUND, CacheError, GetFileKwargs, HttpError, no_records_found
+from sdmxabs.fetch import _categorical_meta, _check_format, _check_parameters, fetch
+from sdmxabs.fetch_keys import PERIODS, estimate_size
+from sdmxabs.fetch_plan import _key_dimensions
+from sdmxabs.flow_metadata import code_list_for, structure_ident
+
+# --- constants
+CHUNK_SIZE = 20  # codes of the chunked dimension in each request
+YEAR_DIGITS = 4  # an SDMX period starts with its year (e.g. "2020-Q3")
+
+FetchedChunk = tuple[pd.DataFrame, pd.DataFrame] | None  # (data, metadata), or None if no records
+ChunkTask = Callable[[], FetchedChunk]  # fetches one chunk
+
+
+# --- private functions
+def _check_dimension(flow_id: str, dimension: str, dimensions: list[str]) -> None:
+    """Check that a dimension is a key dimension of the flow, raising ValueError if not."""
+    if dimension not in dimensions:
+        raise ValueError(f"'{dimension}' is not a key dimension of {flow_id}. Must be one of: {dimensions}")
+
+
+def _dimension_codes(
+    flow_id: str, dimension: str, selection: dict[str, str] | None, dimensions: list[str]
+) -> list[str]:
+    """Get the codes of a key dimension to request: those selected, or else those in its codelist."""
+    _check_dimension(flow_id, dimension, dimensions)
+    if selection and selection.get(dimension):
+        return selection[dimension].split("+")
+    return list(code_list_for(structure_ident(flow_id), dimension))
+
+
+def _widest_dimension(
+    flow_id: str, selection: dict[str, str] | None, dimensions: list[str], keys: pd.DataFrame | None = None
+) -> str:
+    """Choose the key dimension with the most codes to request (the first, if there is a tie).
+
+    With the keys of the series matched (see fetch_keys), only the codes with series are counted.
+    """
+
+    def count(dimension: str) -> int:
+        if keys is not None:
+            return keys[dimension].nunique()
+        return len(_dimension_codes(flow_id, dimension, selection, dimensions))
+
+    return max(dimensions, key=count)
+
+
+def _pack(
+    codes: list[str], sizes: dict[str, int], chunk_size: int, max_observations: int | None
+) -> list[list[str]]:
+    """Group codes, in order, into chunks of at most chunk_size codes and at most max_observations.
+
+    The size of each code is its estimated observations. A code larger than max_observations
+    has a chunk to itself.
+    """
+    chunks: list[list[str]] = []
+    total = 0
+    for code in codes:
+        size = sizes.get(code, 0)
+        too_big = max_observations is not None and total + size > max_observations
+        if not chunks or len(chunks[-1]) >= chunk_size or too_big:
+            chunks.append([])
+            total = 0
+        chunks[-1].append(code)
+        total += size
+    return chunks
+
+
+def _year(period: str) -> int:
+    """Get the year of an SDMX period."""
+    if not period[:YEAR_DIGITS].isdigit():
+        raise ValueError(f"Cannot chunk by time from the period '{period}'")
+    return int(period[:YEAR_DIGITS])
+
+
+def _time_windows(parameters: dict[str, str] | None, years: int) -> list[dict[str, str]]:
+    """Split the periods of a request into windows of whole years, as the parameters for each window.
+
+    The first window keeps the startPeriod of the request, and the last keeps its endPeriod
+    (or, without one, is open-ended, so it gets the latest periods).
+    """
+    if years < 1:
+        raise ValueError(f"Invalid years '{years}'. Must be at least 1")
+    parameters = parameters or {}
+    if "startPeriod" not in parameters:
+        raise ValueError("Chunking by time needs a startPeriod parameter")
+    first = _year(parameters["startPeriod"])
+    last = _year(parameters["endPeriod"]) if "endPeriod" in parameters else datetime.now(UTC).year
+    windows = []
+    for year in range(first, max(first, last) + 1, years):
+        window = parameters | {"startPeriod": str(year), "endPeriod": str(year + years - 1)}
+        windows.append(window)
+    windows[0]["startPeriod"] = parameters["startPeriod"]
+    if "endPeriod" in parameters:
+        windows[-1]["endPeriod"] = parameters["endPeriod"]
+    else:
+        del windows[-1]["endPeriod"]
+    return windows
+
+
+def _fetch_chunk(
+    flow_id: str,
+    selection: dict[str, str] | None,
+    parameters: dict[str, str] | None,
+    *,
+    validate: bool = False,
+    format: str = "xml",  # noqa: A002
+    **kwargs: Unpack[GetFileKwargs],
+) -> FetchedChunk:
+    """Fetch one chunk of a query (None if the ABS has no records for it)."""
+    try:
+        return fetch(flow_id, selection, parameters, validate=validate, format=format, **kwargs)
+    except (CacheError, HttpError) as e:
+        if not no_records_found(e):
+            raise
+        return None
+
+
+def _reassemble(chunks: list[list[FetchedChunk]]) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    """Reassemble the chunks (for each selection, its time windows) into one result (None if empty).
+
+    The series are kept in the order they are first seen, chunk by chunk.
+    """
+    stacked: list[pd.DataFrame] = []
+    metas: list[pd.DataFrame] = []
+    for windows in chunks:
+        found = [chunk for chunk in windows if chunk is not None]
+        if found:
+            stacked.append(pd.concat([data for data, _ in found]))  # the time windows, one after another
+            metas.extend(meta for _, meta in found)
+    if not stacked:
+        return None
+    data = pd.concat(stacked, axis=1).sort_index()
+    meta: pd.DataFrame = pd.concat(metas)
+    meta = meta[~meta.index.duplicated(keep="last")]
+    return data, meta.loc[data.columns]
+
+
+# --- public function
+def fetch_chunked(  # noqa: PLR0913
+    flow_id: str,
+    selection: dict[str, str] | None = None,
+    parameters: dict[str, str] | None = None,
+    *,
+    validate: bool = False,
+    dimension: str | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    years: int | None = None,
+    max_observations: int | None = None,
+    max_workers: int | None = None,
+    format: str = "xml",  # noqa: A002
+    categorical: bool = False,
+    **kwargs: Unpack[GetFileKwargs],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Fetch data from the ABS SDMX API in chunks, for queries too large for one request.
+
+    Args:
+        flow_id (str): The ID of the data flow from which to retrieve data items.
+        selection (dict[str, str], optional): The dimension=value pairs to select the
+            data items. See fetch().
+        parameters (dict[str, str], optional): SDMX parameters for the request. See fetch().
+        validate (bool, optional): If True, validate the selection against the flow's
+            required dimensions when generating the URL key. Defaults to False.
+        dimension (str, optional): The key dimension along which to split the query,
+            requesting `chunk_size` of its codes at a time. If neither `dimension` nor
+            `years` is given, the key dimension with the most codes to request is used.
+        chunk_size (int, optional): The number of codes of `dimension` in each request.
+            Defaults to CHUNK_SIZE.
+        years (int, optional): If given, also split the query into windows of this many
+            whole years (this needs a startPeriod parameter).
+        max_observations (int, optional): If given, first estimate the size of the query
+            from the keys of the series it matches (see estimate_size()), and request only
+            the codes of `dimension` that have series, grouped so that each request has at
+            most this many (estimated) observations, and at most `chunk_size` codes. Without
+            `dimension`, the key dimension with the most codes that have series is used.
+        max_workers (int | None, optional): The number of chunks to fetch in parallel
+            (in threads). None (or 1) fetches them one after another.
+        format (str, optional): The format in which to request the data. See fetch().
+        categorical (bool, optional): If True, return the metadata as pandas categoricals.
+            See fetch().
+        **kwargs (GetFileKwargs): Additional keyword arguments passed to fetch().
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The data and the metadata, with the series and
+            periods one fetch() of the whole query would return. The series are in the
+            order they are first seen, chunk by chunk, which can differ from the order
+            of one fetch().
+
+    Raises:
+        HttpError or CacheError, as for fetch(). If the ABS has no records for any chunk,
+            an HttpError with the status NO_RECORDS_FOUND.
+        ValueError: If the arguments are invalid (for example, an unknown dimension).
+
+    """
+    verbose = kwargs.get("verbose", False)
+    if verbose:
+        print(
+            f"fetch_chunked(): {flow_id=} {selection=} {parameters=} {validate=} {dimension=} "
+            f"{chunk_size=} {years=} {max_observations=} {max_workers=} {format=} {categorical=} {kwargs=}"
+        )
+    _check_parameters(parameters)
+    _check_format(format)
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk_size '{chunk_size}'. Must be at least 1")
+
+    # --- split the query: selections along the dimension, then time windows
+    dimensions = _key_dimensions(flow_id)
+    sizes: dict[str, int] | None = None  # code: estimated observations
+    if max_observations is not None:
+        keys = estimate_size(flow_id, selection, parameters, validate=validate, **kwargs).keys
+        if keys.empty:
+            raise HttpError(f"No records found for {flow_id}", NO_RECORDS_FOUND)
+        dimension = dimension or _widest_dimension(flow_id, selection, dimensions, keys)
+        _check_dimension(flow_id, dimension, dimensions)
+        observations = keys.groupby(dimension, sort=False)[PERIODS].sum()
+        sizes = {str(code): int(size) for code, size in observations.items()}
+    elif dimension is None and years is None:
+        dimension = _widest_dimension(flow_id, selection, dimensions)
+    selections = [selection]
+    if dimension is not None:
+        codes = (
+            list(sizes) if sizes is not None else _dimension_codes(flow_id, dimension, selection, dimensions)
+        )
+        selections = [
+            (selection or {}) | {dimension: "+".join(chunk)}
+            for chunk in _pack(codes, sizes or {}, chunk_size, max_observations)
+        ]
+    windows = [parameters] if years is None else _time_windows(parameters, years)
+    if verbose:
+        print(f"fetch_chunked(): {len(selections)} selections x {len(windows)} time windows")
+
+    # --- fetch the chunks
+    tasks: list[ChunkTask] = [
+        partial(_fetch_chunk, flow_id, chunk, window, validate=validate, format=format, **kwargs)
+        for chunk in selections
+        for window in windows
+    ]
+    if max_workers is None or max_workers <= 1 or len(tasks) <= 1:
+        done = [task() for task in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            done = list(executor.map(lambda task: task(), tasks))
+
+    # --- and put them back together
+    step = len(windows)
+    result = _reassemble([done[start : start + step] for start in range(0, len(done), step)])
+    if result is None:
+        raise HttpError(f"No records found for {flow_id} in any of {len(tasks)} chunks", NO_RECORDS_FOUND)
+    data, meta = result
+    return data, _categorical_meta(meta, [flow_id]) if categorical else meta
+
+
+if __name__ == "__main__":
+
+    def module_test() -> None:
+        """Test fetch_chunked() against the ABS."""
+        selection = {"MEASURE": "3", "INDEX": "10001", "TSEST": "10", "FREQ": "Q"}
+        parameters = {"startPeriod": "2015-Q1", "endPeriod": "2024-Q4"}
+        whole, _ = fetch("CPI", selection, parameters)
+        chunked, _ = fetch_chunked("CPI", selection, parameters, dimension="REGION", chunk_size=3, years=4)
+        if whole.equals(chunked[whole.columns]):
+            print(f"Test passed: {chunked.shape=}.")
+        else:
+            print(f"Test FAILED: {whole.shape=} {chunked.shape=}.")
+
+    module_test()
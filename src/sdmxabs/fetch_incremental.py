@@ -0,0 +1,228 @@
+"""Keep a local copy of fetched data current, downloading only what has changed.
+
+fetch_incremental() keeps the (data, meta) result of each query in a directory
+under the cache directory, with the time it was last fetched. The next call for
+the same query asks the ABS only for the changes, and merges them into the kept
+result:
+- "updated" (the default) requests the observations added or revised since the
+  last fetch (the SDMX updatedAfter parameter).
+- "window" requests the last few periods of the kept data onwards (a
+  startPeriod near its end), for when updatedAfter is not wanted.
+
+The changes are requested with the "no-store" modality: each request is a
+one-off (an updatedAfter of the last fetch, or a moving startPeriod), so its
+message and parsed result are not cached, only merged into the kept result.
+
+The changes take precedence over the kept data. Observations deleted by the ABS
+are not seen in the changes, so they remain in the kept data until a full
+refresh (refresh=True).
+
+The directory defaults to sdmxabs-incremental in the cache directory (see the
+layout in download_cache), and can be set with the environment variable
+SDMXABS_INCREMENTAL_DIR.
+"""
+
+import hashlib
+import json
+import pickle
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from os import getenv
+from pathlib import Path
+from typing import Literal, Unpack
+
+import pandas as pd
+
+from sdmxabs.download_cache import SDMXABS_CACHE_PATH, CacheError, GetFileKwargs, HttpError, no_records_found
+from sdmxabs.fetch import fetch
+from sdmxabs.flow_metadata import build_key
+from sdmxabs.safe_io import file_lock, write_atomic
+
+# --- constants
+INCREMENTAL_VERSION = 1  # increment whenever the layout of a kept result changes
+INCREMENTAL_PATH = Path(getenv("SDMXABS_INCREMENTAL_DIR", str(SDMXABS_CACHE_PATH / "sdmxabs-incremental")))
+INCREMENTAL_SUFFIX = ".pkl"
+WINDOW_OVERLAP = 4  # periods of the kept data requested again, with the "window" strategy
+PERIOD_FORMATS = {"Y": "%Y", "Q": "%Y-Q%q", "M": "%Y-%m", "D": "%Y-%m-%d"}  # frequency: SDMX period format
+
+UpdateStrategy = Literal["updated", "window"]
+
+
+@dataclass
+class KeptResult:
+    """The result of a query, as kept between calls to fetch_incremental()."""
+
+    fetched: str  # when the query was last fetched (ISO 8601, UTC)
+    data: pd.DataFrame
+    meta: pd.DataFrame
+    version: int = INCREMENTAL_VERSION
+
+
+# --- private functions
+def _kept_path(
+    directory: Path,
+    flow_id: str,
+    key: str,
+    parameters: dict[str, str] | None,
+    format: str,  # noqa: A002
+) -> Path:
+    """Get the file for the kept result of a query."""
+    query = json.dumps([flow_id, key, sorted((parameters or {}).items()), format])
+    return directory / f"{flow_id}--{hashlib.sha256(query.encode()).hexdigest()}{INCREMENTAL_SUFFIX}"
+
+
+def _load(path: Path) -> KeptResult | None:
+    """Get the kept result from a file, or None if there is no usable one."""
+    try:
+        kept = pickle.loads(path.read_bytes())  # noqa: S301 - written by _save(), in our own directory
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+        return None
+    if not isinstance(kept, KeptResult) or kept.version != INCREMENTAL_VERSION:
+        return None
+    return kept
+
+
+def _save(path: Path, kept: KeptResult) -> None:
+    """Keep the result of a query, atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, pickle.dumps(kept))
+
+
+def _period_text(period: object) -> str:
+    """Format a period of the data index for the startPeriod parameter."""
+    if isinstance(period, pd.Period):
+        code = period.freqstr[0]
+        if code in PERIOD_FORMATS:
+            return period.strftime(PERIOD_FORMATS[code])
+    return str(period)
+
+
+def _delta_parameters(
+    kept: KeptResult, parameters: dict[str, str] | None, strategy: UpdateStrategy, overlap: int
+) -> dict[str, str]:
+    """Get the parameters for a request for the changes since the result was kept."""
+    delta = dict(parameters or {})
+    if strategy == "updated" or kept.data.empty:
+        delta["updatedAfter"] = kept.fetched
+    else:
+        index = kept.data.index.sort_values()
+        delta["startPeriod"] = _period_text(index[max(0, len(index) - overlap)])
+    return delta
+
+
+def _merge(
+    kept_data: pd.DataFrame, kept_meta: pd.DataFrame, data: pd.DataFrame, meta: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Merge the changes into the kept result (the changes win, and new series are added at the end)."""
+    if data.empty:
+        return kept_data, kept_meta
+    if kept_data.empty:
+        return data, meta
+    columns = [*kept_data.columns, *(column for column in data.columns if column not in kept_data.columns)]
+    merged = data.combine_first(kept_data).sort_index()[columns]
+
+    # --- as for fetch(): complete series of integers stay integers
+    for column in columns:
+        dtypes = [frame[column].dtype for frame in (kept_data, data) if column in frame.columns]
+        if all(pd.api.types.is_integer_dtype(dtype) for dtype in dtypes) and merged[column].notna().all():
+            merged[column] = merged[column].astype("int64")
+
+    merged_meta = pd.concat([kept_meta.drop(index=meta.index, errors="ignore"), meta])
+    return merged, merged_meta.loc[columns]
+
+
+# --- public function
+def fetch_incremental(  # noqa: PLR0913
+    flow_id: str,
+    selection: dict[str, str] | None = None,
+    parameters: dict[str, str] | None = None,
+    *,
+    validate: bool = False,
+    strategy: UpdateStrategy = "updated",
+    overlap: int = WINDOW_OVERLAP,
+    refresh: bool = False,
+    format: str = "xml",  # noqa: A002
+    directory: Path | None = None,
+    **kwargs: Unpack[GetFileKwargs],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Fetch data from the ABS SDMX API, downloading only the changes since the last call.
+
+    The first call for a query fetches it in full, as fetch() would, and keeps the
+    result. Later calls for the same query (flow_id, selection, parameters and format)
+    request only what has changed, merge it into the kept result, and keep that.
+
+    Args:
+        flow_id (str): The ID of the data flow from which to retrieve data items.
+        selection (dict[str, str], optional): The dimension=value pairs to select the
+            data items. See fetch().
+        parameters (dict[str, str], optional): SDMX parameters for the request. See fetch().
+        validate (bool, optional): If True, validate the selection against the flow's
+            required dimensions when generating the URL key. Defaults to False.
+        strategy (str, optional): How to request the changes: "updated" (the default)
+            for the observations added or revised since the last call (SDMX updatedAfter),
+            or "window" for the last `overlap` periods of the kept data onwards.
+        overlap (int, optional): With the "window" strategy, the number of kept periods
+            to request again (to pick up recent revisions). Defaults to WINDOW_OVERLAP.
+        refresh (bool, optional): If True, fetch the query in full, replacing the kept
+            result (for example, to drop observations the ABS has deleted).
+        format (str, optional): The format in which to request the data. See fetch().
+        directory (Path, optional): The directory for the kept results. Defaults to
+            INCREMENTAL_PATH (SDMXABS_INCREMENTAL_DIR).
+        **kwargs (GetFileKwargs): Additional keyword arguments passed to fetch(). The
+            modality applies to the full fetch only: the changes are always requested
+            with "no-store".
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The data and the metadata, as for fetch().
+
+    Raises:
+        HttpError, CacheError or ValueError, as for fetch(). No changes since the last
+        call is not an error.
+
+    """
+    verbose = kwargs.get("verbose", False)
+    if verbose:
+        print(
+            f"fetch_incremental(): {flow_id=} {selection=} {parameters=} {validate=} {strategy=} "
+            f"{overlap=} {refresh=} {format=} {kwargs=}"
+        )
+    if strategy not in ("updated", "window"):
+        raise ValueError(f"Invalid strategy '{strategy}'. Must be one of: {{'updated', 'window'}}")
+
+    key = build_key(flow_id, selection, validate=validate)
+    path = _kept_path(directory or INCREMENTAL_PATH, flow_id, key, parameters, format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):  # one process at a time updates a kept result
+        kept = None if refresh else _load(path)
+        started = datetime.now(UTC).isoformat(timespec="seconds")
+        if kept is None:
+            data, meta = fetch(flow_id, selection, parameters, validate=validate, format=format, **kwargs)
+        else:
+            delta = _delta_parameters(kept, parameters, strategy, overlap)
+            once: GetFileKwargs = {**kwargs, "modality": "no-store"}  # a URL never requested again
+            if verbose:
+                print(f"fetch_incremental(): requesting the changes with {delta=}")
+            try:
+                changes = fetch(flow_id, selection, delta, validate=validate, format=format, **once)
+            except (HttpError, CacheError) as e:
+                if not no_records_found(e):  # e.g. nothing changed since updatedAfter
+                    raise
+                changes = pd.DataFrame(), pd.DataFrame()  # nothing has changed
+            data, meta = _merge(kept.data, kept.meta, *changes)
+        _save(path, KeptResult(fetched=started, data=data, meta=meta))
+    return data, meta
+
+
+if __name__ == "__main__":
+
+    def module_test() -> None:
+        """Test fetch_incremental() against the ABS."""
+        selection = {"MEASURE": "3", "INDEX": "10001", "TSEST": "10", "REGION": "50", "FREQ": "Q"}
+        first, _ = fetch_incremental("CPI", selection, {"startPeriod": "2020-Q1"})
+        second, _ = fetch_incremental("CPI", selection, {"startPeriod": "2020-Q1"}, strategy="window")
+        if first.shape == second.shape and not first.empty:
+            print(f"Test passed: {second.shape=}.")
+        else:
+            print(f"Test FAILED: {first.shape=} {second.shape=}.")
+
+    module_test()
@@ -0,0 +1,181 @@
+"""Discover the series a query matches, and estimate its size, before fetching any data.
+
+fetch_series_keys() asks the ABS for the series keys only (detail=serieskeysonly),
+a small response with no observations, and returns a table of the dimension codes
+of each matching series. estimate_size() builds on it: it estimates the number of
+observations the query would return, as the number of periods in the requested
+span for each series (by its frequency). This lets a caller refuse, or split (see
+fetch_chunked()), an expensive query before any data moves.
+
+The estimate is an upper bound: a series is counted for the whole span, even if it
+starts later or ends earlier. Without a startPeriod, the span starts in
+ESTIMATE_FIRST_YEAR; without an endPeriod, it ends with the current period.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Unpack
+
+import pandas as pd
+
+from sdmxabs.download_cache import CacheError, GetFileKwargs, HttpError, no_records_found
+from sdmxabs.fetch import _check_parameters, _data_url
+from sdmxabs.fetch_plan import _key_dimensions
+from sdmxabs.flow_metadata import build_key
+from sdmxabs.xml_base import NAME_SPACES, iter_xml
+
+# --- constants
+ESTIMATE_FIRST_YEAR = 1950  # the start of the span, for a query without a startPeriod
+PERIODS_PER_YEAR = {"A": 1, "S": 2, "Q": 4, "M": 12, "W": 52, "D": 365}  # FREQ code: periods in a year
+DEFAULT_PERIODS_PER_YEAR = 12  # for a series without a known FREQ code
+PERIODS = "PERIODS"  # the column of estimate_size().keys with the estimated periods of each series
+MONTHS_PER_YEAR = 12
+
+
+@dataclass
+class SizeEstimate:
+    """The estimated size of a data query, from the keys of the series it matches."""
+
+    flow_id: str
+    key: str  # the SDMX key for the query
+    series: int  # the number of series matched
+    observations: int  # an upper bound on the number of observations
+    keys: pd.DataFrame  # one row per series: the code for each key dimension, and PERIODS
+
+
+# --- private functions
+def _span_months(parameters: dict[str, str] | None, first_year: int) -> int:
+    """Get the number of months in the span of a query."""
+    parameters = parameters or {}
+    start = _period(parameters.get("startPeriod", str(first_year))).asfreq("M", how="start")
+    if "endPeriod" in parameters:
+        end = _period(parameters["endPeriod"]).asfreq("M", how="end")
+    else:
+        end = pd.Period(datetime.now(UTC).strftime("%Y-%m"), freq="M")
+    return max(0, end.ordinal - start.ordinal + 1)
+
+
+def _period(text: str) -> pd.Period:
+    """Read an SDMX period (falling back to its year, for periods pandas cannot read)."""
+    try:
+        return pd.Period(text)
+    except ValueError:
+        return pd.Period(text[:4], freq="Y")
+
+
+def _series_periods(keys: pd.DataFrame, months: int) -> pd.Series:
+    """Estimate the number of periods of each series in a span of months, from its frequency."""
+    if "FREQ" in keys.columns:
+        per_year = keys["FREQ"].map(PERIODS_PER_YEAR).fillna(DEFAULT_PERIODS_PER_YEAR)
+    else:
+        per_year = pd.Series(DEFAULT_PERIODS_PER_YEAR, index=keys.index)
+    return per_year.map(lambda rate: math.ceil(months * rate / MONTHS_PER_YEAR)).astype("int64")
+
+
+# --- public functions
+def fetch_series_keys(
+    flow_id: str,
+    selection: dict[str, str] | None = None,
+    parameters: dict[str, str] | None = None,
+    *,
+    validate: bool = False,
+    **kwargs: Unpack[GetFileKwargs],
+) -> pd.DataFrame:
+    """Fetch the keys of the series matched by a query, without any observations.
+
+    Args:
+        flow_id (str): The ID of the data flow.
+        selection (dict[str, str], optional): The dimension=value pairs to select the
+            data items. See fetch().
+        parameters (dict[str, str], optional): SDMX parameters for the request (for
+            example, a startPeriod). See fetch(). The detail parameter is replaced.
+        validate (bool, optional): If True, validate the selection against the flow's
+            required dimensions when generating the URL key. Defaults to False.
+        **kwargs (GetFileKwargs): Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        pd.DataFrame: One row per series, with a column of codes for each key dimension
+            (in key order). The number of rows is the number of series matched, and
+            an empty table means the query matches no series.
+
+    Raises:
+        HttpError or CacheError, as for fetch() (but not when no series are matched).
+        ValueError: If invalid parameter values are provided.
+
+    """
+    verbose = kwargs.get("verbose", False)
+    if verbose:
+        print(f"fetch_series_keys(): {flow_id=} {selection=} {parameters=} {validate=} {kwargs=}")
+    parameters = (parameters or {}) | {"detail": "serieskeysonly"}
+    _check_parameters(parameters)
+    kwargs["modality"] = kwargs.get("modality", "prefer-url")
+
+    dimensions = _key_dimensions(flow_id)
+    url = _data_url(flow_id, build_key(flow_id, selection, validate=validate), parameters)
+    rows = []
+    try:
+        for series in iter_xml(url, "gen:Series", **kwargs):
+            values = series.findall("gen:SeriesKey/gen:Value", NAME_SPACES)
+            rows.append({value.get("id", ""): value.get("value", "") for value in values})
+    except (CacheError, HttpError) as e:
+        if not no_records_found(e):
+            raise
+    columns = dict.fromkeys([*dimensions, *(dimension for row in rows for dimension in row)])
+    return pd.DataFrame(rows, columns=pd.Index(list(columns)), dtype=str)
+
+
+def estimate_size(
+    flow_id: str,
+    selection: dict[str, str] | None = None,
+    parameters: dict[str, str] | None = None,
+    *,
+    validate: bool = False,
+    first_year: int = ESTIMATE_FIRST_YEAR,
+    **kwargs: Unpack[GetFileKwargs],
+) -> SizeEstimate:
+    """Estimate the size of a data query (series x periods), from the keys of the series it matches.
+
+    Args:
+        flow_id (str): The ID of the data flow.
+        selection (dict[str, str], optional): The dimension=value pairs to select the
+            data items. See fetch().
+        parameters (dict[str, str], optional): SDMX parameters for the request. The
+            startPeriod and endPeriod set the span of the estimate.
+        validate (bool, optional): If True, validate the selection against the flow's
+            required dimensions when generating the URL key. Defaults to False.
+        first_year (int, optional): The start of the span, if there is no startPeriod.
+            Defaults to ESTIMATE_FIRST_YEAR.
+        **kwargs (GetFileKwargs): Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        SizeEstimate: The number of series, an upper bound on the number of observations,
+            and the keys of the series (with the estimated periods of each series).
+
+    Raises:
+        HttpError, CacheError or ValueError, as for fetch_series_keys().
+
+    """
+    keys = fetch_series_keys(flow_id, selection, parameters, validate=validate, **kwargs)
+    keys[PERIODS] = _series_periods(keys, _span_months(parameters, first_year))
+    return SizeEstimate(
+        flow_id=flow_id,
+        key=build_key(flow_id, selection, validate=False),
+        series=len(keys),
+        observations=int(keys[PERIODS].sum()),
+        keys=keys,
+    )
+
+
+if __name__ == "__main__":
+
+    def module_test() -> None:
+        """Test estimate_size() against the ABS."""
+        selection = {"MEASURE": "3", "INDEX": "10001", "TSEST": "10", "FREQ": "Q"}
+        estimate = estimate_size("CPI", selection, {"startPeriod": "2020-Q1", "endPeriod": "2023-Q4"})
+        if estimate.series > 1 and estimate.observations == estimate.series * 16:
+            print(f"Test passed: {estimate.series=} {estimate.observations=}.")
+        else:
+            print(f"Test FAILED: {estimate.series=} {estimate.observations=}.")
+
+    module_test()
@@ -1,12 +1,16 @@
 """Fetch multiple datasets from the SDMX API."""
 
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from io import StringIO
 from typing import Unpack
 
 import pandas as pd
 
 from sdmxabs.download_cache import CacheError, GetFileKwargs, HttpError
-from sdmxabs.fetch import fetch
+from sdmxabs.fetch import _categorical_meta, _check_format, _check_parameters, fetch
+from sdmxabs.fetch_plan import PlannedRequest, fetch_planned, plan_requests
 
 # --- private function
 IndexInformation = tuple[type, str | None]  # (Index type, frequency if PeriodIndex)
@@ -37,11 +41,200 @@ def _validate_index_compatibility(
     return reference_index_info
 
 
-def _extract(
+WantedRow = tuple[str, dict[str, str]]  # (flow_id, dimension selection)
+FetchedRow = tuple[pd.DataFrame, pd.DataFrame] | None  # (data, metadata), or None if skipped
+FetchTask = Callable[[], list[tuple[int, FetchedRow]]]  # fetches one or more rows: [(row position, result)]
+
+
+def _check_wanted(wanted: pd.DataFrame) -> bool:
+    """Check the wanted DataFrame, returning False if there is nothing to fetch."""
+    if wanted.empty:
+        print("wanted DataFrame is empty, returning empty DataFrames.")
+        return False
+    if "flow_id" not in wanted.columns:
+        raise ValueError("The 'flow_id' column is required in the 'wanted' DataFrame.")
+    return True
+
+
+def _wanted_rows(wanted: pd.DataFrame) -> list[WantedRow]:
+    """Get the flow_id and dimension selection for each row of the wanted DataFrame.
+
+    NaN values are ignored, and rows without a flow_id are skipped.
+    """
+    rows = []
+    for _index, row in wanted.iterrows():
+        # --- get the arguments for the fetch (ignoring NaN values)
+        row_dict: dict[str, str] = row.dropna().to_dict()
+        flow_id = row_dict.pop("flow_id", "")
+        if not flow_id:
+            # --- if there is no flow_id, we will skip this row
+            print(f"Skipping row with no flow_id: {row_dict}")
+            continue
+        rows.append((flow_id, row_dict))
+    return rows
+
+
+def _fetch_row(
+    flow_id: str,
+    row_dict: dict[str, str],
+    parameters: dict[str, str] | None,
+    *,
+    validate: bool = False,
+    format: str = "xml",  # noqa: A002
+    **kwargs: Unpack[GetFileKwargs],
+) -> FetchedRow:
+    """Fetch the data and metadata for one row of the wanted DataFrame (None if skipped)."""
+    try:
+        data, meta = fetch(
+            flow_id, selection=row_dict, parameters=parameters, validate=validate, format=format, **kwargs
+        )
+    except (CacheError, HttpError, ValueError) as e:
+        # --- if there is an error, we will skip this row
+        print(f"Error fetching {flow_id} with dimensions {row_dict}: {e}")
+        return None
+    if data.empty or meta.empty:
+        # --- this should not happen, but if it does, we will skip this row
+        print(f"No data for {flow_id} with dimensions {row_dict}")
+        return None
+    return data, meta
+
+
+def _assemble(fetched: Iterable[FetchedRow]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Assemble the fetched rows, in order, into one data and one metadata DataFrame.
+
+    Raises:
+        ValueError: if incompatible index types are detected.
+
+    """
+    return_meta = {}
+    return_data = {}
+    counter = 0
+    reference_index_info: IndexInformation | None = None
+
+    for row in fetched:
+        if row is None:
+            continue
+        data, meta = row
+
+        # --- validate index compatibility - including frequency compatibility for PeriodIndex
+        reference_index_info = _validate_index_compatibility(data, reference_index_info)
+
+        # --- manage duplicates
+        for col in data.columns:
+            counter += 1
+            save_name = col
+            if save_name in return_data:
+                save_name += f"_{counter:03d}"
+            return_data[save_name] = data[col]
+            return_meta[save_name] = meta.loc[col]
+
+    return pd.DataFrame(return_data), pd.DataFrame(return_meta).T
+
+
+def _fetch_rows(
+    rows: list[WantedRow],
+    positions: list[int],
+    parameters: dict[str, str] | None,
+    *,
+    validate: bool = False,
+    format: str = "xml",  # noqa: A002
+    **kwargs: Unpack[GetFileKwargs],
+) -> list[tuple[int, FetchedRow]]:
+    """Fetch some rows of the wanted DataFrame, one request per row."""
+    return [
+        (position, _fetch_row(*rows[position], parameters, validate=validate, format=format, **kwargs))
+        for position in positions
+    ]
+
+
+def _fetch_request(
+    request: PlannedRequest,
+    rows: list[WantedRow],
+    parameters: dict[str, str] | None,
+    *,
+    validate: bool = False,
+    format: str = "xml",  # noqa: A002
+    **kwargs: Unpack[GetFileKwargs],
+) -> list[tuple[int, FetchedRow]]:
+    """Fetch the rows of the wanted DataFrame covered by one planned request."""
+    try:
+        split = fetch_planned(request, parameters, format=format, **kwargs)
+    except (CacheError, HttpError, ValueError) as e:
+        if len(request.rows) > 1:
+            # --- perhaps just one row is at fault, so we fetch the rows one by one
+            if kwargs.get("verbose", False):
+                print(f"Merged request for {request.flow_id} failed ({e}), fetching its rows one by one.")
+            return _fetch_rows(rows, request.rows, parameters, validate=validate, format=format, **kwargs)
+        print(f"Error fetching {request.flow_id} with dimensions {rows[request.rows[0]][1]}: {e}")
+        return [(request.rows[0], None)]
+
+    results: list[tuple[int, FetchedRow]] = []
+    for position, (data, meta) in zip(request.rows, split, strict=True):
+        if data.empty or meta.empty:
+            print(f"No data for {request.flow_id} with dimensions {rows[position][1]}")
+            results.append((position, None))
+            continue
+        results.append((position, (data, meta)))
+    return results
+
+
+def _fetch_tasks(
+    rows: list[WantedRow],
+    parameters: dict[str, str] | None,
+    *,
+    validate: bool = False,
+    plan: bool = True,
+    format: str = "xml",  # noqa: A002
+    **kwargs: Unpack[GetFileKwargs],
+) -> list[FetchTask]:
+    """Split the work of fetching the rows of the wanted DataFrame into independent tasks.
+
+    If plan is True, rows are merged into as few requests as possible (see fetch_plan).
+    """
+    planned: list[PlannedRequest] = []
+    unplanned = list(range(len(rows)))
+    if plan and len(rows) > 1:
+        try:
+            _check_parameters(parameters)
+            _check_format(format)
+            planned, unplanned = plan_requests(rows, validate=validate)
+        except ValueError:
+            pass  # reported for each row, when it is fetched on its own
+
+    tasks: list[FetchTask] = [
+        partial(_fetch_request, request, rows, parameters, validate=validate, format=format, **kwargs)
+        for request in planned
+    ]
+    tasks += [
+        partial(_fetch_rows, rows, [position], parameters, validate=validate, format=format, **kwargs)
+        for position in unplanned
+    ]
+    return tasks
+
+
+def _collect(done: Iterable[list[tuple[int, FetchedRow]]], row_count: int) -> list[FetchedRow]:
+    """Collect the results of the tasks into the order of the rows of the wanted DataFrame."""
+    fetched: list[FetchedRow] = [None] * row_count
+    for results in done:
+        for position, result in results:
+            fetched[position] = result
+    return fetched
+
+
+def _fetched_flows(rows: list[WantedRow], fetched: list[FetchedRow]) -> list[str]:
+    """Get the flow_id of each row of the wanted DataFrame that was fetched (not skipped)."""
+    return [flow_id for (flow_id, _), row in zip(rows, fetched, strict=True) if row is not None]
+
+
+def _extract(  # noqa: PLR0913
     wanted: pd.DataFrame,
     parameters: dict[str, str] | None,
     *,
     validate: bool = False,
+    max_workers: int | None = None,
+    plan: bool = True,
+    format: str = "xml",  # noqa: A002
+    categorical: bool = False,
     **kwargs: Unpack[GetFileKwargs],
 ) -> tuple[pd.DataFrame, pd.DataFrame]:  # data / metadata
     """Extract the data and metadata for each row in the dimensions DataFrame.
@@ -54,6 +247,11 @@ def _extract(
                                            If None, no additional parameters are used.
         validate (bool, optional): If True, validate `wanted` against the flow's
             required dimensions when generating the URL key. Defaults to False.
+        max_workers (int | None, optional): The number of requests to make in parallel.
+            None (or 1) makes the requests one after another.
+        plan (bool, optional): If True, merge compatible rows into fewer requests.
+        format (str, optional): The format in which to request the data ("xml", "csv" or "json").
+        categorical (bool, optional): If True, return the metadata as pandas categoricals.
         **kwargs: Additional keyword arguments passed to the underlying data fetching function.
 
     Returns:
@@ -68,57 +266,30 @@ def _extract(
           These will be caught and reported to standard output.
 
     """
-    # --- initial setup - empty return results
-    return_meta = {}
-    return_data = {}
-    counter = 0
-    reference_index_info: IndexInformation | None = None
+    rows = _wanted_rows(wanted)
+    tasks = _fetch_tasks(rows, parameters, validate=validate, plan=plan, format=format, **kwargs)
 
-    # --- loop over the rows of the wanted DataFrame
-    for _index, row in wanted.iterrows():
-        # --- get the arguments for the fetch (ignoring NaN values)
-        row_dict: dict[str, str] = row.dropna().to_dict()
-        flow_id = row_dict.pop("flow_id", "")
-        if not flow_id:
-            # --- if there is no flow_id, we will skip this row
-            print(f"Skipping row with no flow_id: {row_dict}")
-            continue
-
-        # --- fetch the data and meta data for each row of the selection table
-        try:
-            data, meta = fetch(
-                flow_id, selection=row_dict, parameters=parameters, validate=validate, **kwargs
-            )
-        except (CacheError, HttpError, ValueError) as e:
-            # --- if there is an error, we will skip this row
-            print(f"Error fetching {flow_id} with dimensions {row_dict}: {e}")
-            continue
-        if data.empty or meta.empty:
-            # --- this should not happen, but if it does, we will skip this row
-            print(f"No data for {flow_id} with dimensions {row_dict}")
-            continue
-
-        # --- validate index compatibility - including frequency compatibility for PeriodIndex
-        reference_index_info = _validate_index_compatibility(data, reference_index_info)
-
-        # --- manage duplicates
-        for col in data.columns:
-            counter += 1
-            save_name = col
-            if save_name in return_data:
-                save_name += f"_{counter:03d}"
-            return_data[save_name] = data[col]
-            return_meta[save_name] = meta.loc[col]
+    if max_workers is None or max_workers <= 1 or len(tasks) <= 1:
+        done = [task() for task in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            done = list(executor.map(lambda task: task(), tasks))
 
-    return pd.DataFrame(return_data), pd.DataFrame(return_meta).T
+    fetched = _collect(done, len(rows))  # in the order of the rows, whatever the order of completion
+    data, meta = _assemble(fetched)
+    return data, _categorical_meta(meta, _fetched_flows(rows, fetched)) if categorical else meta
 
 
 # --- public function
-def fetch_multi(
+def fetch_multi(  # noqa: PLR0913
     wanted: pd.DataFrame,
     parameters: dict[str, str] | None = None,
     *,
     validate: bool = False,
+    max_workers: int | None = None,
+    plan: bool = True,
+    format: str = "xml",  # noqa: A002
+    categorical: bool = False,
     **kwargs: Unpack[GetFileKwargs],
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Fetch multiple SDMX datasets based on a DataFrame of desired datasets.
@@ -132,6 +303,18 @@ def fetch_multi(
         parameters: A dictionary of additional parameters to pass to the fetch function.
         validate: If True, the function will validate dimensions and values against
                   the ABS SDMX API codelists. Defaults to False.
+        max_workers: The number of requests to download and parse in parallel (in threads).
+                  Defaults to None, which makes the requests one after another. Either way,
+                  the columns are returned in the order of the rows in `wanted`.
+        plan: If True (the default), rows for the same flow that differ in only one
+                  dimension are merged into one request (with "+"-joined codes), and the
+                  series returned are split back to the rows. The result is the same as
+                  fetching each row on its own, but with fewer requests.
+        format: The format in which to request the data: "xml" (the default), "csv" or "json".
+                  See fetch().
+        categorical: If True, return each column of the metadata as a pandas categorical,
+                  with the categories of the codelist items taken from the ABS codelists.
+                  Defaults to False. See fetch().
         **kwargs: Additional keyword arguments passed to the underlying data fetching function.
 
     Returns:
@@ -155,17 +338,26 @@ def fetch_multi(
     # --- report the parameters used if requested
     verbose = kwargs.get("verbose", False)
     if verbose:
-        print(f"fetch_multi(): {wanted=}, {parameters=}, {validate=}, {kwargs=}")
+        print(
+            f"fetch_multi(): {wanted=}, {parameters=}, {validate=}, {max_workers=}, {plan=}, {format=}, "
+            f"{categorical=}, {kwargs=}"
+        )
 
     # --- quick sanity checks
-    if wanted.empty:
-        print("wanted DataFrame is empty, returning empty DataFrames.")
+    if not _check_wanted(wanted):
         return pd.DataFrame(), pd.DataFrame()
-    if "flow_id" not in wanted.columns:
-        raise ValueError("The 'flow_id' column is required in the 'wanted' DataFrame.")
 
     # --- do the work
-    return _extract(wanted, parameters, validate=validate, **kwargs)
+    return _extract(
+        wanted,
+        parameters,
+        validate=validate,
+        max_workers=max_workers,
+        plan=plan,
+        format=format,
+        categorical=categorical,
+        **kwargs,
+    )
 
 
 if __name__ == "__main__":
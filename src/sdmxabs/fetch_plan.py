@@ -0,0 +1,256 @@
+"""Plan the requests for fetch_multi(), merging compatible rows into fewer API calls.
+
+Rows of a wanted table for the same flow often differ in only one dimension.
+Their SDMX keys can then be merged into one key, with the codes for that
+dimension joined by "+" (for example, "3.10001.10.50.Q" and "3.999902.10.50.Q"
+become "3.10001+999902.10.50.Q"). Keys are only merged when they differ in a
+single position, so a merged key selects exactly the union of the rows'
+selections. Merging is repeated until no more keys can be merged.
+
+The series returned for a merged request are then split back to the rows by
+their series keys, so each row gets the series it would have got from its own
+request. As with fetch(), the result for each row is kept (see result_cache),
+keyed on the merged URL and the row's selection, and used again for as long as
+the message and the metadata are unchanged.
+"""
+
+from dataclasses import dataclass, field
+from typing import Unpack, cast
+from xml.etree.ElementTree import Element
+
+import pandas as pd
+
+from sdmxabs.download_cache import CacheError, GetFileKwargs, HttpError, acquire_url
+from sdmxabs.fetch import (
+    _data_url,
+    _extract,
+    _extract_json,
+    _extract_table,
+    _metadata_version,
+    _read_csv,
+    _read_json,
+)
+from sdmxabs.flow_metadata import POSITION, build_key, structure_from_flow_id
+from sdmxabs.result_cache import load_result, payload_digest, save_result
+from sdmxabs.xml_base import NAME_SPACES, parse_xml
+
+# --- constants
+MAX_KEY_LENGTH = 1_000  # do not merge keys beyond this length (the URL must stay reasonably short)
+
+KeyParts = tuple[frozenset[str] | None, ...]  # the codes selected in each dimension (None for any code)
+
+
+@dataclass
+class PlannedRequest:
+    """One request to the ABS SDMX API, on behalf of one or more rows of a wanted table."""
+
+    flow_id: str
+    key: str
+    dimensions: list[str]  # the dimension IDs, in key order
+    rows: list[int] = field(default_factory=list)  # the positions of the rows in the wanted table
+    selections: list[KeyParts] = field(default_factory=list)  # the selection for each row
+
+
+# --- private functions
+def _key_dimensions(flow_id: str) -> list[str]:
+    """Get the dimension IDs for a flow, in the order they appear in an SDMX key."""
+    structure = structure_from_flow_id(flow_id)
+    positioned = [name for name, item in structure.items() if item.get(POSITION)]
+    return sorted(positioned, key=lambda name: int(structure[name][POSITION]))
+
+
+def _parse_key(key: str, size: int) -> KeyParts | None:
+    """Split an SDMX key into the codes selected in each dimension (None if it cannot be split)."""
+    if key == "all":
+        return (None,) * size
+    parts = key.split(".")
+    if len(parts) != size:
+        return None
+    return tuple(frozenset(part.split("+")) if part else None for part in parts)
+
+
+def _format_key(parts: KeyParts) -> str:
+    """Join the codes selected in each dimension into an SDMX key."""
+    if all(part is None for part in parts):
+        return "all"
+    return ".".join("+".join(sorted(part)) if part is not None else "" for part in parts)
+
+
+def _merge_at(
+    candidates: list[tuple[KeyParts, list[int]]], position: int
+) -> list[tuple[KeyParts, list[int]]]:
+    """Merge the candidate keys that are the same except at one position."""
+    groups: dict[KeyParts, list[tuple[KeyParts, list[int]]]] = {}
+    for candidate in candidates:
+        parts = candidate[0]
+        groups.setdefault(parts[:position] + parts[position + 1 :], []).append(candidate)
+
+    merged = []
+    for group in groups.values():
+        codes = [parts[position] for parts, _ in group]
+        union = None if None in codes else frozenset[str]().union(*(code for code in codes if code))
+        parts = (*group[0][0][:position], union, *group[0][0][position + 1 :])
+        if len(group) > 1 and len(_format_key(parts)) <= MAX_KEY_LENGTH:
+            merged.append((parts, sorted(row for _, rows in group for row in rows)))
+        else:
+            merged.extend(group)
+    return merged
+
+
+def _merge(candidates: list[tuple[KeyParts, list[int]]], size: int) -> list[tuple[KeyParts, list[int]]]:
+    """Repeatedly merge keys, at the position that merges the most keys, until no more can be merged."""
+    while True:
+        options = [_merge_at(candidates, position) for position in range(size)] or [candidates]
+        best = min(options, key=len)
+        if len(best) >= len(candidates):
+            return candidates
+        candidates = best
+
+
+def _matches(codes: dict[str, str], dimensions: list[str], selection: KeyParts) -> bool:
+    """Check whether a series key (dimension: code) is selected by a row's selection."""
+    return all(
+        allowed is None or codes.get(dimension) in allowed
+        for dimension, allowed in zip(dimensions, selection, strict=True)
+    )
+
+
+def _table_matches(table: pd.DataFrame, dimensions: list[str], selection: KeyParts) -> pd.Series:
+    """Select the rows of an SDMX-CSV table that are selected by a row's selection."""
+    selected = pd.Series(data=True, index=table.index)
+    for dimension, allowed in zip(dimensions, selection, strict=True):
+        if allowed is not None and dimension in table.columns:
+            selected &= table[dimension].isin(allowed)
+    return selected
+
+
+def _split(
+    request: PlannedRequest,
+    url: str,
+    payload: bytes,
+    format: str,  # noqa: A002
+) -> list[tuple[pd.DataFrame, pd.DataFrame]]:
+    """Parse the message for a planned request, splitting the series back to its rows."""
+    if format == "csv":
+        table = _read_csv(url, payload)
+        return [
+            _extract_table(request.flow_id, table[_table_matches(table, request.dimensions, selection)])
+            for selection in request.selections
+        ]
+    if format == "json":
+        message = _read_json(url, payload)
+        return [
+            _extract_json(request.flow_id, message, dict(zip(request.dimensions, selection, strict=True)))
+            for selection in request.selections
+        ]
+
+    tree = parse_xml(url, payload)
+    roots = [Element("Split") for _ in request.rows]  # holds references - the tree is not modified
+    for xml_series in tree.findall(".//gen:Series", NAME_SPACES):
+        codes = {
+            str(value.get("id")): str(value.get("value"))
+            for value in xml_series.findall("gen:SeriesKey/gen:Value", NAME_SPACES)
+        }
+        for root, selection in zip(roots, request.selections, strict=True):
+            if _matches(codes, request.dimensions, selection):
+                root.append(xml_series)
+    return [_extract(request.flow_id, root) for root in roots]
+
+
+# --- protected functions - used by the fetch_multi module
+def plan_requests(
+    rows: list[tuple[str, dict[str, str]]], *, validate: bool = False
+) -> tuple[list[PlannedRequest], list[int]]:
+    """Plan the fewest requests that will fetch the rows of a wanted table.
+
+    Args:
+        rows (list[tuple[str, dict[str, str]]]): The (flow_id, selection) for each row.
+        validate (bool): If True, validate the selections when building the keys.
+
+    Returns:
+        tuple[list[PlannedRequest], list[int]]: The planned requests, and the positions
+            of any rows that could not be planned (and should be fetched one by one).
+
+    """
+    unplanned = []
+    dimensions: dict[str, list[str]] = {}  # flow_id: dimension IDs
+    keys: dict[int, tuple[str, KeyParts]] = {}  # row position: (key, parsed key)
+    for position, (flow_id, selection) in enumerate(rows):
+        try:
+            if flow_id not in dimensions:
+                dimensions[flow_id] = _key_dimensions(flow_id)
+            key = build_key(flow_id, selection, validate=validate)
+        except (CacheError, HttpError, ValueError):
+            unplanned.append(position)  # reported when the row is fetched on its own
+            continue
+        parts = _parse_key(key, len(dimensions[flow_id]))
+        if parts is None:
+            unplanned.append(position)
+            continue
+        keys[position] = (key, parts)
+
+    planned = []
+    for flow_id, flow_dimensions in dimensions.items():
+        candidates = [
+            (parts, [position]) for position, (_, parts) in keys.items() if rows[position][0] == flow_id
+        ]
+        for parts, positions in _merge(candidates, len(flow_dimensions)):
+            planned.append(
+                PlannedRequest(
+                    flow_id=flow_id,
+                    key=keys[positions[0]][0] if len(positions) == 1 else _format_key(parts),
+                    dimensions=flow_dimensions,
+                    rows=positions,
+                    selections=[keys[position][1] for position in positions],
+                )
+            )
+    planned.sort(key=lambda request: request.rows[0])
+    return planned, unplanned
+
+
+def fetch_planned(
+    request: PlannedRequest,
+    parameters: dict[str, str] | None,
+    format: str = "xml",  # noqa: A002
+    **kwargs: Unpack[GetFileKwargs],
+) -> list[tuple[pd.DataFrame, pd.DataFrame]]:
+    """Make a planned request, and split the series returned back to its rows.
+
+    Args:
+        request (PlannedRequest): The planned request.
+        parameters (dict[str, str] | None): Additional parameters for the request.
+        format (str): The format in which to request the data ("xml", "csv" or "json").
+        **kwargs: Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        list[tuple[pd.DataFrame, pd.DataFrame]]: The data and metadata for each row of
+            the request, in the order of request.rows.
+
+    Raises:
+        HttpError, CacheError or ValueError, as for fetch().
+
+    Note:
+        The result for each row is kept in the result cache, as for fetch(), unless
+        the modality is "no-store".
+
+    """
+    kwargs["modality"] = kwargs.get("modality", "prefer-url")
+    url = _data_url(request.flow_id, request.key, parameters, format)
+    payload = acquire_url(url, **kwargs)
+    if kwargs["modality"] == "no-store":  # as for fetch(), nothing is kept
+        return _split(request, url, payload, format)
+
+    # --- use the results split from an identical message (decoded with the same metadata), if any
+    row_urls = [f"{url}#{_format_key(selection)}" for selection in request.selections]
+    digest = payload_digest(payload, _metadata_version(request.flow_id))
+    kept = [load_result(row_url, digest) for row_url in row_urls]
+    if all(result is not None for result in kept):
+        return cast("list[tuple[pd.DataFrame, pd.DataFrame]]", kept)
+
+    results = _split(request, url, payload, format)
+    # the metadata used for decoding is now kept, so it has a version (as in fetch())
+    digest = payload_digest(payload, _metadata_version(request.flow_id))
+    for row_url, result in zip(row_urls, results, strict=True):
+        if not result[0].empty:
+            save_result(row_url, digest, *result)
+    return results
@@ -5,25 +5,41 @@ Key functions:
 - structure_ident(): Get the data structure ID for a specific dataflow.
 - data_structures(): Get the data structure (ie. the dimensions and attributes metadata)
     for a data structure identifier.
+- load_structure(): Get a data structure, and every code list it references, in one
+    request (filling the caches of data_structures(), attribute_attachments() and
+    code_lists()).
 - structure_from_flow_id(): Get the structure metadata for a specific dataflow.
     Combines the two steps of getting the structure_ident() and then the
-    data_structures() metadata.
+    load_structure() metadata.
+- attribute_attachments(): Get the level (dataset, series or observation) to which each
+    attribute in a data structure is attached.
 - code_lists(): Get the code list metadata (code=name pairs) for a specific code list.
 - code_list_for(): Get the code list for a specific dimension or attribute in a data
     flow.
+- prefetch_metadata(): Download the whole code list catalogue (and, optionally, every
+    data flow and data structure) into a compact metadata bundle, from which the
+    functions above resolve without the network (see the metadata_bundle module).
 - frame(): Convert a FlowMetaDict to a pandas DataFrame for easier viewing.
 
+The parsed metadata is kept in memory, and in a persistent store shared across
+processes (see the metadata_store module). The results are keyed only on the
+semantic arguments (for example, the code list ID): keyword arguments passed on
+to acquire_url() do not change the key.
+
 Note: the ABS has advised that Metadata is primarily available in XML.
 (source: https://www.abs.gov.au/about/data-services/
          application-programming-interfaces-apis/data-api-user-guide)
 """
 
-from functools import cache
+from pathlib import Path
 from typing import Unpack
+from xml.etree.ElementTree import Element
 
 import pandas as pd
 
 from sdmxabs.download_cache import GetFileKwargs
+from sdmxabs.metadata_bundle import BundleEntries, bundled, write_bundle
+from sdmxabs.metadata_store import stored
 from sdmxabs.xml_base import NAME_SPACES, URL_STEM, acquire_xml
 
 # --- constants
@@ -37,7 +53,7 @@ CODE_LIST_ID = "codelist_id"
 
 
 # --- public functions
-@cache
+@stored()
 def data_flows(flow_id: str = "all", **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
     """Get the toplevel metadata from the ABS SDMX API.
 
@@ -62,29 +78,13 @@ def data_flows(flow_id: str = "all", **kwargs: Unpack[GetFileKwargs]) -> FlowMet
           keys from the ABS is ignored.
 
     """
+    if (flows := bundled("data_flows", "all")) is not None:
+        return flows if flow_id == "all" else {key: value for key, value in flows.items() if key == flow_id}
     tree = acquire_xml(f"{URL_STEM}/dataflow/ABS/{flow_id}", **kwargs)
+    return _parse_flows(tree)
 
-    data_flows_dict: FlowMetaDict = {}
-    for dataflow in tree.findall(".//str:Dataflow", NAME_SPACES):
-        attributes: dict[str, str] = dataflow.attrib.copy()
-        if "id" not in attributes:
-            continue
-        dataflow_id = attributes.pop("id")
-        name_elem = dataflow.find("com:Name", NAME_SPACES)
-        dataflow_name = name_elem.text if name_elem is not None else "(missing name)"
-        attributes[FLOW_NAME] = str(dataflow_name)
-        ds_elem = dataflow.find("str:Structure/Ref", NAME_SPACES)
-        if ds_elem is None:
-            continue  # skip if no data structure reference
-        ds_id = ds_elem.get("id", "")
-        if not ds_id:
-            continue
-        attributes[DATA_STRUCT_ID] = ds_id
-        data_flows_dict[dataflow_id] = attributes
-    return data_flows_dict
 
-
-@cache
+@stored(persist=False)
 def structure_ident(flow_id: str, **kwargs: Unpack[GetFileKwargs]) -> str:
     """Get the data structure ID for a specific dataflow.
 
@@ -105,7 +105,7 @@ def structure_ident(flow_id: str, **kwargs: Unpack[GetFileKwargs]) -> str:
     return flow[flow_id][DATA_STRUCT_ID]
 
 
-@cache
+@stored()
 def data_structures(struct_id: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
     """Get the data structure for a specific structure ID from the ABS SDMX API.
 
@@ -127,31 +127,39 @@ def data_structures(struct_id: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMeta
         The attributes metadata does not have "position" information.
 
     """
+    if (structure := bundled("data_structures", struct_id)) is not None:
+        return structure
     tree = acquire_xml(f"{URL_STEM}/datastructure/ABS/{struct_id}", **kwargs)
+    return _parse_structure(tree)
 
-    elements = {}
-    for ident in ("Dimension", "Attribute"):
-        for elem in tree.findall(f".//str:{ident}", NAME_SPACES):
-            element_id = elem.get("id")
-            if element_id is None:
-                continue
-            contents = {}
-            if ident == "Dimension":
-                contents[POSITION] = elem.get(POSITION, "")
-            if (lr := elem.find("str:LocalRepresentation", NAME_SPACES)) is not None and (
-                enumer := lr.find("str:Enumeration/Ref", NAME_SPACES)
-            ) is not None:
-                contents = contents | enumer.attrib
-            # --- check we have a code list, and give it a better name
-            code_list_id = contents.pop("id", "")
-            if not code_list_id or contents.get("package") != "codelist":
-                continue
-            contents[CODE_LIST_ID] = code_list_id
-            elements[element_id] = contents
-    return elements
 
+@stored()
+def attribute_attachments(struct_id: str, **kwargs: Unpack[GetFileKwargs]) -> dict[str, str]:
+    """Get the level to which each attribute in a data structure is attached.
+
+    Args:
+        struct_id (str): The ID of the data structure to retrieve.
+        **kwargs: Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        dict[str, str]: A dictionary of attribute ID: level, where the level is one of
+            "dataset", "group", "series" or "observation". Attributes without an
+            attribute relationship in the structure are omitted. Unlike
+            data_structures(), attributes without a code list are included.
 
-@cache
+    Raises:
+        HttpError: If there is an issue with the HTTP request.
+        CacheError: If there is an issue with the cache.
+        ValueError: If no XML root is found in the response.
+
+    """
+    if (attachments := bundled("attribute_attachments", struct_id)) is not None:
+        return attachments
+    tree = acquire_xml(f"{URL_STEM}/datastructure/ABS/{struct_id}", **kwargs)
+    return _parse_attachments(tree)
+
+
+@stored()
 def code_lists(cl_id: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
     """Get the code list metadata from the ABS SDMX API.
 
@@ -178,39 +186,13 @@ def code_lists(cl_id: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
         - The inner dictionary may have a "parent" key if the code has a parent.
 
     """
+    if (codes := bundled("code_lists", cl_id)) is not None:
+        return codes
     tree = acquire_xml(f"{URL_STEM}/codelist/ABS/{cl_id}", **kwargs)
-
-    codes: FlowMetaDict = {}
-    for code in tree.findall(".//str:Code", NAME_SPACES):
-        code_id = code.get("id", None)
-        if code_id is None:
-            continue
-        elements: dict[str, str] = {}
-
-        # - get the name
-        name = code.find("com:Name", NAME_SPACES)
-        if name is None or not name.text:
-            # guarantee that we name key and value pair
-            print(f"Warning: Code {code_id} in {cl_id}has no name, skipping.")
-            continue  # skip if no name
-        elements["name"] = name.text
-
-        # - get the parent
-        parent = code.find("str:Parent", NAME_SPACES)
-        parent_id = ""
-        if parent is not None:
-            ref = parent.find("Ref", NAME_SPACES)
-            if ref is not None:
-                parent_id = str(ref.get("id", ""))
-        if parent_id:  # Only add if not empty
-            elements["parent"] = parent_id
-
-        codes[code_id] = elements
-
-    return codes
+    return _parse_codes(tree, cl_id)
 
 
-@cache
+@stored(persist=False)
 def code_list_for(struct_id: str, dim_name: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
     """Get the code list for a specific dimension or attribute in a data structure.
 
@@ -241,7 +223,51 @@ def code_list_for(struct_id: str, dim_name: str, **kwargs: Unpack[GetFileKwargs]
     return code_lists(codelist_id, **kwargs)
 
 
-@cache
+def load_structure(struct_id: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
+    """Get a data structure, and every code list it references, in one request.
+
+    A data structure typically references a dozen code lists, each of which would
+    otherwise be downloaded separately when the first data are decoded. This asks
+    the ABS SDMX API for the data structure with its children (references=children),
+    and keeps the results for data_structures(), attribute_attachments() and
+    code_lists(), so those functions need not go back to the ABS.
+
+    If the data structure is already kept (in memory, in the metadata store or in
+    the metadata bundle in use), it is returned without a request. If it is kept
+    but stale, the request is a conditional one (see metadata_store).
+
+    Args:
+        struct_id (str): The ID of the data structure to retrieve.
+        **kwargs: Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        FlowMetaDict: The data structure, as for data_structures().
+
+    Raises:
+        HttpError: If there is an issue with the HTTP request.
+        CacheError: If there is an issue with the cache.
+        ValueError: If no XML root is found in the response.
+
+    """
+    structure = data_structures.cached(struct_id)
+    if structure is None and bundled("data_structures", struct_id) is not None:
+        structure = data_structures(struct_id, **kwargs)
+    if structure is not None:
+        return structure
+    if data_structures.stored_at(struct_id) is not None:  # stale: check with the ABS, not just the cached XML
+        kwargs["modality"] = "revalidate"
+
+    tree = acquire_xml(f"{URL_STEM}/datastructure/ABS/{struct_id}?references=children", **kwargs)
+    structure = _parse_structure(tree)
+    data_structures.prime(structure, struct_id)
+    attribute_attachments.prime(_parse_attachments(tree), struct_id)
+    for codelist in tree.findall(".//str:Codelist", NAME_SPACES):
+        if cl_id := codelist.get("id"):
+            code_lists.prime(_parse_codes(codelist, cl_id), cl_id)
+    return structure
+
+
+@stored(persist=False)
 def structure_from_flow_id(flow_id: str, **kwargs: Unpack[GetFileKwargs]) -> FlowMetaDict:
     """Get the data structure directly from the flow identifier.
 
@@ -260,12 +286,58 @@ def structure_from_flow_id(flow_id: str, **kwargs: Unpack[GetFileKwargs]) -> Flo
     if flow_id not in data_flows(**kwargs):
         raise ValueError(f"Invalid flow_id: {flow_id}.")
     structure_id = structure_ident(flow_id, **kwargs)
-    structure = data_structures(structure_id, **kwargs)
+    structure = load_structure(structure_id, **kwargs)
     if not structure:
         raise ValueError(f"No structure found for structure ID: {structure_id}.")
     return structure
 
 
+def prefetch_metadata(
+    path: Path | str, *, structures: bool = True, **kwargs: Unpack[GetFileKwargs]
+) -> dict[str, int]:
+    """Download the whole ABS code list catalogue (and data structures) into a metadata bundle.
+
+    The bundle is a compact file that can be copied to machines without network
+    access, and put in use there with use_metadata_bundle() (or the environment
+    variable SDMXABS_METADATA_BUNDLE). code_lists() and code_list_for() then
+    resolve from the bundle, without a request to the ABS.
+
+    Args:
+        path (Path | str): The bundle file to write.
+        structures (bool): If True (the default), also bundle every data flow and
+            data structure, so data_flows(), data_structures(), structure_from_flow_id()
+            and code_list_for() need no network either. If False, bundle only the code
+            lists.
+        **kwargs: Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        dict[str, int]: The number of entries bundled, for each metadata function.
+
+    Raises:
+        HttpError: If there is an issue with the HTTP request.
+        CacheError: If there is an issue with the cache.
+        ValueError: If no XML root is found in a response.
+
+    """
+    entries: BundleEntries = {"code_lists": {}}
+    tree = acquire_xml(f"{URL_STEM}/codelist/ABS/all", **kwargs)
+    for codelist in tree.findall(".//str:Codelist", NAME_SPACES):
+        if cl_id := codelist.get("id"):
+            entries["code_lists"][cl_id] = _parse_codes(codelist, cl_id)
+
+    if structures:
+        entries["data_flows"] = {"all": _parse_flows(acquire_xml(f"{URL_STEM}/dataflow/ABS/all", **kwargs))}
+        entries["data_structures"], entries["attribute_attachments"] = {}, {}
+        tree = acquire_xml(f"{URL_STEM}/datastructure/ABS/all", **kwargs)
+        for structure in tree.findall(".//str:DataStructure", NAME_SPACES):
+            if struct_id := structure.get("id"):
+                entries["data_structures"][struct_id] = _parse_structure(structure)
+                entries["attribute_attachments"][struct_id] = _parse_attachments(structure)
+
+    write_bundle(Path(path), entries)
+    return {kind: len(values) for kind, values in entries.items()}
+
+
 def frame(f: FlowMetaDict) -> pd.DataFrame:
     """Convert a FlowMetaDict to a pandas DataFrame.
 
@@ -282,6 +354,106 @@ def frame(f: FlowMetaDict) -> pd.DataFrame:
 
 
 # --- private functions
+def _parse_flows(tree: Element) -> FlowMetaDict:
+    """Get the data flows (with their names and data structure IDs) from a data flow message."""
+    data_flows_dict: FlowMetaDict = {}
+    for dataflow in tree.findall(".//str:Dataflow", NAME_SPACES):
+        attributes: dict[str, str] = dataflow.attrib.copy()
+        if "id" not in attributes:
+            continue
+        dataflow_id = attributes.pop("id")
+        name_elem = dataflow.find("com:Name", NAME_SPACES)
+        dataflow_name = name_elem.text if name_elem is not None else "(missing name)"
+        attributes[FLOW_NAME] = str(dataflow_name)
+        ds_elem = dataflow.find("str:Structure/Ref", NAME_SPACES)
+        if ds_elem is None:
+            continue  # skip if no data structure reference
+        ds_id = ds_elem.get("id", "")
+        if not ds_id:
+            continue
+        attributes[DATA_STRUCT_ID] = ds_id
+        data_flows_dict[dataflow_id] = attributes
+    return data_flows_dict
+
+
+def _parse_structure(tree: Element) -> FlowMetaDict:
+    """Get the dimensions and attributes (with code lists) from a data structure message."""
+    elements = {}
+    for ident in ("Dimension", "Attribute"):
+        for elem in tree.findall(f".//str:{ident}", NAME_SPACES):
+            element_id = elem.get("id")
+            if element_id is None:
+                continue
+            contents = {}
+            if ident == "Dimension":
+                contents[POSITION] = elem.get(POSITION, "")
+            if (lr := elem.find("str:LocalRepresentation", NAME_SPACES)) is not None and (
+                enumer := lr.find("str:Enumeration/Ref", NAME_SPACES)
+            ) is not None:
+                contents = contents | enumer.attrib
+            # --- check we have a code list, and give it a better name
+            code_list_id = contents.pop("id", "")
+            if not code_list_id or contents.get("package") != "codelist":
+                continue
+            contents[CODE_LIST_ID] = code_list_id
+            elements[element_id] = contents
+    return elements
+
+
+def _parse_attachments(tree: Element) -> dict[str, str]:
+    """Get the attachment level of each attribute from a data structure message."""
+    levels = {  # relationship element: attachment level
+        "str:None": "dataset",
+        "str:Group": "group",
+        "str:AttachmentGroup": "group",
+        "str:Dimension": "series",
+        "str:PrimaryMeasure": "observation",
+    }
+    attachments = {}
+    for elem in tree.findall(".//str:Attribute", NAME_SPACES):
+        attribute_id = elem.get("id")
+        relationship = elem.find("str:AttributeRelationship", NAME_SPACES)
+        if attribute_id is None or relationship is None:
+            continue
+        for tag, level in levels.items():
+            if relationship.find(tag, NAME_SPACES) is not None:
+                attachments[attribute_id] = level
+                break
+    return attachments
+
+
+def _parse_codes(tree: Element, cl_id: str) -> FlowMetaDict:
+    """Get the codes (with their names and parents) from a code list, or a message with one code list."""
+    codes: FlowMetaDict = {}
+    for code in tree.findall(".//str:Code", NAME_SPACES):
+        code_id = code.get("id", None)
+        if code_id is None:
+            continue
+        elements: dict[str, str] = {}
+
+        # - get the name
+        name = code.find("com:Name", NAME_SPACES)
+        if name is None or not name.text:
+            # guarantee that we name key and value pair
+            print(f"Warning: Code {code_id} in {cl_id}has no name, skipping.")
+            continue  # skip if no name
+        elements["name"] = name.text
+
+        # - get the parent
+        parent = code.find("str:Parent", NAME_SPACES)
+        parent_id = ""
+        if parent is not None:
+            ref = parent.find("Ref", NAME_SPACES)
+            if ref is not None:
+                parent_id = str(ref.get("id", ""))
+        if parent_id:  # Only add if not empty
+            elements["parent"] = parent_id
+
+        codes[code_id] = elements
+
+    return codes
+
+
 def validate_code_value(dim_name: str, value: str, required: pd.DataFrame) -> str:
     """Check if a value for a dimension is in the codelist for the dimension.
 
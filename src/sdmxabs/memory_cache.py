@@ -0,0 +1,85 @@
+"""A bounded, in-memory, least-recently-used cache.
+
+Used to keep recently acquired payloads (and the XML trees parsed from them)
+in memory, in front of the file-system cache.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class MemoryCache:
+    """A thread-safe least-recently-used cache, bounded by the total size of its items.
+
+    The size of each item is given by the caller when the item is stored. An item
+    larger than the whole budget is not stored. A budget of zero turns the cache off.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Create an empty cache with a budget of max_bytes."""
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self) -> int:
+        """The budget for the total size of the cached items."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def get(self, key: Hashable) -> Any | None:  # noqa: ANN401
+        """Get an item (None if it is not cached), and mark it as most recently used."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:  # noqa: ANN401
+        """Store an item of the given size, evicting the least recently used items as needed."""
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._items.pop(key)[1]
+            if size > self._max_bytes:
+                return
+            self._items[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all items, and reset the counters."""
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Get the hit and miss counters, and the current size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+    def _evict(self) -> None:
+        """Remove the least recently used items until within budget (lock must be held)."""
+        while self._bytes > self._max_bytes and self._items:
+            _, (_, size) = self._items.popitem(last=False)
+            self._bytes -= size
@@ -0,0 +1,140 @@
+"""A compact, read-only bundle of structural metadata, for use without the network.
+
+A bundle holds the parsed data flows, data structures and code lists of the
+ABS SDMX API in one file (see prefetch_metadata() in the flow_metadata module,
+which builds it). When a bundle is in use, the metadata functions resolve from
+it before going to the ABS, so a batch node with a copy of the bundle needs no
+network access for structural metadata.
+
+The file is laid out so that it loads quickly, however many code lists it
+holds: a short header, a JSON index of (kind, ID): (offset, length), and then
+each entry as separately compressed JSON. The file is memory-mapped, only the
+index is read when the bundle is opened, and each entry is decompressed only
+when it is first asked for.
+
+A bundle can be put in use with use_metadata_bundle(), or by setting the
+environment variable SDMXABS_METADATA_BUNDLE to its path.
+"""
+
+import json
+import mmap
+import struct
+import threading
+import zlib
+from os import getenv
+from pathlib import Path
+from typing import Any
+
+from sdmxabs.safe_io import write_atomic
+
+# --- constants
+BUNDLE_MAGIC = b"SDMXABS-BUNDLE-1\n"
+BUNDLE_LEVEL = 6  # zlib compression level for each entry
+_LENGTH = struct.Struct("<Q")  # the length of the index, in bytes
+
+BundleEntries = dict[str, dict[str, Any]]  # kind (the metadata function): ID: value
+
+
+# --- public class
+class MetadataBundle:
+    """A read-only, memory-mapped bundle of structural metadata."""
+
+    def __init__(self, path: Path) -> None:
+        """Open a bundle, reading only its index.
+
+        Raises:
+            OSError: If the file cannot be opened.
+            ValueError: If the file is not a metadata bundle.
+
+        """
+        self.path = Path(path)
+        with self.path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(BUNDLE_MAGIC)
+        if self._map[:start] != BUNDLE_MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a metadata bundle: {self.path}")
+        (length,) = _LENGTH.unpack_from(self._map, start)
+        start += _LENGTH.size
+        self._index: dict[str, dict[str, list[int]]] = json.loads(self._map[start : start + length])
+        self._data_start = start + length
+
+    def get(self, kind: str, key: str) -> Any | None:  # noqa: ANN401
+        """Get the entry for (kind, ID), or None if the bundle does not hold it."""
+        location = self._index.get(kind, {}).get(key)
+        if location is None:
+            return None
+        offset, length = location
+        start = self._data_start + offset
+        return json.loads(zlib.decompress(self._map[start : start + length]))
+
+    def keys(self, kind: str) -> list[str]:
+        """Get the IDs of the entries of one kind."""
+        return list(self._index.get(kind, {}))
+
+    def close(self) -> None:
+        """Release the memory map."""
+        self._map.close()
+
+
+def write_bundle(path: Path, entries: BundleEntries) -> None:
+    """Write a metadata bundle atomically.
+
+    Args:
+        path (Path): The file to write.
+        entries (BundleEntries): The values to bundle, by kind (the name of the
+            metadata function, for example "code_lists") and ID.
+
+    """
+    index: dict[str, dict[str, list[int]]] = {}
+    blobs = []
+    offset = 0
+    for kind, values in entries.items():
+        for key, value in values.items():
+            blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode(), BUNDLE_LEVEL)
+            index.setdefault(kind, {})[key] = [offset, len(blob)]
+            blobs.append(blob)
+            offset += len(blob)
+    header = json.dumps(index, separators=(",", ":")).encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, b"".join((BUNDLE_MAGIC, _LENGTH.pack(len(header)), header, *blobs)))
+
+
+# --- the bundle in use (opened on first use)
+_bundle: MetadataBundle | None = None
+_bundle_path: Path | None = Path(path) if (path := getenv("SDMXABS_METADATA_BUNDLE")) else None
+_bundle_lock = threading.Lock()
+
+
+def use_metadata_bundle(path: Path | str | None) -> None:
+    """Resolve the metadata functions from a bundle (or stop, if path is None).
+
+    The results already kept in memory or in the metadata store are not
+    affected; use the cache_clear() method of a metadata function, or
+    clear_metadata_store(), to forget them.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        ValueError: If the file is not a metadata bundle.
+
+    """
+    global _bundle, _bundle_path  # noqa: PLW0603
+    bundle = MetadataBundle(Path(path)) if path is not None else None
+    with _bundle_lock:
+        if _bundle is not None:
+            _bundle.close()
+        _bundle = bundle
+        _bundle_path = Path(path) if path is not None else None
+
+
+def bundled(kind: str, key: str) -> Any | None:  # noqa: ANN401
+    """Get an entry from the bundle in use, or None if there is none (or it does not hold the entry)."""
+    global _bundle, _bundle_path  # noqa: PLW0603
+    with _bundle_lock:
+        if _bundle is None and _bundle_path is not None:
+            try:
+                _bundle = MetadataBundle(_bundle_path)
+            except (OSError, ValueError):
+                _bundle_path = None  # an unusable bundle is the same as none
+        bundle = _bundle
+    return None if bundle is None else bundle.get(kind, key)
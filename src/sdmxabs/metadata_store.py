@@ -0,0 +1,222 @@
+"""A persistent store for the structural metadata parsed from the ABS SDMX API.
+
+Data flows, data structures and code lists rarely change, but parsing them
+from SDMX-ML is slow, and without a store every new process parses them
+again. Parsed metadata is kept in a small SQLite database, shared by all the
+processes that use the one cache directory, and in memory within a process.
+
+Each entry is keyed on the name of the function and its semantic arguments
+(for example, the code list ID). Keyword arguments that only change how the
+XML is acquired (verbose, modality, max_age) are not part of the key, so
+data_flows() and data_flows(verbose=True) share an entry.
+
+Invalidation policy:
+- An entry is refreshed from the ABS when it is older than the maximum age of
+  structural metadata (SDMXABS_METADATA_MAX_AGE, one week by default). The
+  refresh asks the ABS whether the XML has changed (modality="revalidate"),
+  rather than parsing the cached XML again. If the refresh fails with an
+  HttpError or CacheError, the older entry is used.
+- The database records the version of its layout (STORE_VERSION). A database
+  with a different version is emptied before it is used, so a new version of
+  the parsers never sees entries written by an older one.
+- clear_metadata_store() removes every entry.
+
+The database defaults to a file in sdmxabs-metadata in the cache directory
+(see the layout in download_cache). Its path can be set with the environment
+variable SDMXABS_METADATA_STORE, or set to "off" to keep the parsed metadata
+in memory only.
+"""
+
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from contextlib import closing
+from os import getenv
+from pathlib import Path
+from typing import Any, cast
+
+from sdmxabs.download_cache import METADATA_MAX_AGE, SDMXABS_CACHE_PATH, CacheError, HttpError
+
+# --- constants
+STORE_VERSION = 1  # increment whenever the layout of the store or of a stored value changes
+STORE_TIMEOUT = 30  # seconds to wait for another process to finish writing
+STORE_OFF = "off"
+STORE_PATH_DEFAULT = SDMXABS_CACHE_PATH / "sdmxabs-metadata" / "metadata.sqlite3"
+_store_setting = getenv("SDMXABS_METADATA_STORE", str(STORE_PATH_DEFAULT))
+STORE_PATH: Path | None = None if _store_setting.lower() in (STORE_OFF, "") else Path(_store_setting)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    stored REAL NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+)
+"""
+
+
+# --- private functions
+def _connect(path: Path) -> sqlite3.Connection:
+    """Open the store, creating (or emptying) it if it does not have the current version."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=STORE_TIMEOUT)
+    try:
+        if connection.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+            with connection:
+                connection.execute("DROP TABLE IF EXISTS entries")
+                connection.execute(_SCHEMA)
+                connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+    except sqlite3.Error:
+        connection.close()
+        raise
+    return connection
+
+
+def _load(kind: str, key: str) -> tuple[float, Any] | None:
+    """Get an entry (stored time, value) from the store, or None if it is not there."""
+    if STORE_PATH is None:
+        return None
+    try:
+        with closing(_connect(STORE_PATH)) as connection:
+            row = connection.execute(
+                "SELECT stored, value FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+    except (sqlite3.Error, OSError):
+        return None  # the store is a cache - an unusable store is the same as an empty one
+    return None if row is None else (row[0], json.loads(row[1]))
+
+
+def _save(kind: str, key: str, stored: float, value: object) -> None:
+    """Put an entry in the store, replacing any older entry."""
+    if STORE_PATH is None:
+        return
+    try:
+        with closing(_connect(STORE_PATH)) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, stored, value) VALUES (?, ?, ?, ?)",
+                (kind, key, stored, json.dumps(value)),
+            )
+    except (sqlite3.Error, OSError):
+        pass
+
+
+# --- protected class - used by the flow_metadata module
+class StoredFunction[**P, R]:
+    """A function whose results are kept in memory and (optionally) in the metadata store.
+
+    Like functools.cache(), but keyed only on the semantic arguments, refreshed
+    when older than METADATA_MAX_AGE, and (when persist is True) kept across
+    processes in the metadata store. Results must be JSON serialisable.
+    """
+
+    def __init__(self, function: Callable[P, R], *, persist: bool) -> None:
+        """Wrap function, keying its results on the arguments other than **kwargs."""
+        functools.update_wrapper(self, function)
+        self._function = function
+        self._persist = persist
+        self._signature = inspect.signature(function)
+        self._semantic = [
+            name
+            for name, parameter in self._signature.parameters.items()
+            if parameter.kind != inspect.Parameter.VAR_KEYWORD
+        ]
+        self._memo: dict[str, tuple[float, R]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, *args: P.args, **kwargs: P.kwargs) -> str:
+        """Get the key for a call: its semantic arguments, with the defaults applied."""
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return json.dumps([bound.arguments[name] for name in self._semantic])
+
+    def _lookup(self, key: str) -> tuple[float, R] | None:
+        """Get the entry (stored time, value) for a key from memory or the store, however old."""
+        with self._lock:
+            entry = self._memo.get(key)
+        if entry is None and self._persist:
+            entry = cast("tuple[float, R] | None", _load(self._function.__name__, key))
+            if entry is not None:
+                with self._lock:
+                    self._memo[key] = entry
+        return entry
+
+    def _keep(self, key: str, value: R) -> None:
+        """Keep a result in memory and (if persisted) in the store."""
+        stored = time.time()
+        with self._lock:
+            self._memo[key] = (stored, value)
+        if self._persist:
+            _save(self._function.__name__, key, stored, value)
+
+    def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        """Get the result from memory, the store, or (if missing or stale) by calling the function."""
+        key = self._key(*args, **kwargs)
+        entry = self._lookup(key)
+        if entry is not None and time.time() - entry[0] < METADATA_MAX_AGE:
+            return entry[1]
+
+        if entry is not None:  # stale: check with the ABS, not just the cached XML
+            kwargs["modality"] = "revalidate"
+        try:
+            value = self._function(*args, **kwargs)
+        except (HttpError, CacheError):
+            if entry is None:
+                raise
+            return entry[1]  # a stale entry is better than none
+        self._keep(key, value)
+        return value
+
+    def cached(self, *args: P.args, **kwargs: P.kwargs) -> R | None:
+        """Get the result for these arguments if it is kept and fresh, without calling the function."""
+        entry = self._lookup(self._key(*args, **kwargs))
+        if entry is not None and time.time() - entry[0] < METADATA_MAX_AGE:
+            return entry[1]
+        return None
+
+    def stored_at(self, *args: P.args, **kwargs: P.kwargs) -> float | None:
+        """Get the time the result kept for these arguments was stored (None if none is kept)."""
+        entry = self._lookup(self._key(*args, **kwargs))
+        return None if entry is None else entry[0]
+
+    def prime(self, value: R, *args: P.args, **kwargs: P.kwargs) -> None:
+        """Keep a result for these arguments, obtained some other way (for example, in bulk)."""
+        self._keep(self._key(*args, **kwargs), value)
+
+    def cache_clear(self) -> None:
+        """Forget the results kept in memory (the metadata store is not changed)."""
+        with self._lock:
+            self._memo.clear()
+
+
+def stored[**P, R](*, persist: bool = True) -> Callable[[Callable[P, R]], StoredFunction[P, R]]:
+    """Decorate a metadata function, so its results are kept (see StoredFunction).
+
+    Args:
+        persist (bool): If True, keep the results in the metadata store as well as
+            in memory. Functions that only combine the results of other stored
+            functions need not be persisted.
+
+    """
+
+    def decorator(function: Callable[P, R]) -> StoredFunction[P, R]:
+        return StoredFunction(function, persist=persist)
+
+    return decorator
+
+
+# --- public functions
+def clear_metadata_store() -> None:
+    """Remove every entry from the persistent metadata store.
+
+    The results kept in memory by each process are not affected; use the
+    cache_clear() method of a metadata function to forget those.
+    """
+    if STORE_PATH is None or not STORE_PATH.exists():
+        return
+    with closing(_connect(STORE_PATH)) as connection, connection:
+        connection.execute("DELETE FROM entries")
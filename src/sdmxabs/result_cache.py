@@ -0,0 +1,205 @@
+"""A persistent cache for the (data, meta) results parsed from ABS data messages.
+
+Even when a data message comes from the download cache, fetch() would parse it
+and build the DataFrames again on every call, which is slow for large messages.
+Instead, the finished result of each data request is kept on disk, and it is
+returned directly for as long as the message it was parsed from is unchanged.
+
+Invalidation policy:
+- Each result is keyed on its URL (which holds the flow ID, the series key, the
+  parameters and the format) and on a hash of the message it was parsed from,
+  and of the version of the structural metadata it was decoded with. So a
+  result is invalidated automatically when the message changes (for example,
+  with a new release of the data), or when a code list or data structure is
+  refreshed; the older result for the URL is then removed.
+- The layout of the results is versioned (RESULT_VERSION), and results with
+  another version are never read.
+- clear_result_cache() removes every result.
+
+The results are kept to a byte budget (SDMXABS_RESULT_CACHE_MAX_BYTES, 1 GiB
+by default; 0 for no limit). When a new result takes the directory over the
+budget, the least recently used results are removed.
+
+Results are kept as Parquet files (one for the data, one for the metadata) when
+pyarrow is installed, as they are quick to read, and otherwise with pickle. The
+format can be set with SDMXABS_RESULT_FORMAT: "auto" (the default), "parquet"
+or "pickle". A result that cannot be written as Parquet is pickled.
+
+The directory defaults to sdmxabs-results in the cache directory (see the
+layout in download_cache). Its path can be set with the environment variable
+SDMXABS_RESULT_CACHE, or set to "off" to parse every message afresh.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+from importlib.util import find_spec
+from os import getenv
+from pathlib import Path
+
+import pandas as pd
+
+from sdmxabs.download_cache import SDMXABS_CACHE_PATH, int_from_env
+from sdmxabs.safe_io import LOCK_SUFFIX, TEMP_SUFFIX, file_lock, remove_locked, write_atomic
+
+# --- constants
+RESULT_VERSION = 1  # increment whenever the layout of a kept result changes
+RESULT_OFF = "off"
+RESULT_PATH_DEFAULT = SDMXABS_CACHE_PATH / "sdmxabs-results"
+_result_setting = getenv("SDMXABS_RESULT_CACHE", str(RESULT_PATH_DEFAULT))
+RESULT_PATH: Path | None = None if _result_setting.lower() in (RESULT_OFF, "") else Path(_result_setting)
+RESULT_FORMAT = getenv("SDMXABS_RESULT_FORMAT", "auto").lower()
+RESULT_MAX_BYTES = int_from_env("SDMXABS_RESULT_CACHE_MAX_BYTES", 1024 * 1024 * 1024)  # 0 for no limit
+RESULT_PREFIX = f"result-v{RESULT_VERSION}"
+PICKLE_SUFFIX = ".pkl"
+DATA_SUFFIX = ".data.parquet"
+META_SUFFIX = ".meta.parquet"
+_LOAD_ERRORS = (OSError, ValueError, TypeError, ImportError, EOFError, AttributeError, pickle.UnpicklingError)
+_PARQUET_ERRORS = (ValueError, TypeError, NotImplementedError, ImportError)  # incl. the pyarrow errors
+
+
+# --- private functions
+@functools.cache
+def _has_pyarrow() -> bool:
+    """Check whether pyarrow is installed (without importing it)."""
+    return find_spec("pyarrow") is not None
+
+
+def _use_parquet() -> bool:
+    """Check whether new results are to be kept as Parquet files."""
+    return RESULT_FORMAT != "pickle" and _has_pyarrow()
+
+
+def _url_stem(url: str) -> str:
+    """Get the start of the file names for the results from a URL."""
+    return f"{RESULT_PREFIX}--{hashlib.sha256(url.encode()).hexdigest()[:32]}"
+
+
+def _entry_path(directory: Path, url: str, digest: str, suffix: str) -> Path:
+    """Get a file for the result from a URL, parsed from the message with the given digest."""
+    return directory / f"{_url_stem(url)}--{digest[:32]}{suffix}"
+
+
+def _entries(directory: Path) -> dict[str, list[Path]]:
+    """Get the files of each kept result in the directory, by the start of their names."""
+    entries: dict[str, list[Path]] = {}
+    for path in directory.glob(f"{RESULT_PREFIX}--*--*"):
+        if not path.name.endswith((LOCK_SUFFIX, TEMP_SUFFIX)):
+            entries.setdefault(path.name.split(".", 1)[0], []).append(path)
+    return entries
+
+
+def _prune(directory: Path, max_bytes: int) -> None:
+    """Remove the least recently used results until the directory is within the byte budget.
+
+    A result is removed under the lock for its URL, and skipped while that is held
+    (for example, while the result is being replaced).
+    """
+    sized = []
+    for entry, paths in _entries(directory).items():
+        try:
+            stats = [path.stat() for path in paths]
+        except OSError:
+            continue  # removed by another process
+        sized.append(
+            (max(stat.st_mtime for stat in stats), sum(stat.st_size for stat in stats), entry, paths)
+        )
+    total = sum(size for _, size, _, _ in sized)
+    for _, size, entry, paths in sorted(sized):
+        if total <= max_bytes:
+            break
+        stem = directory / entry.rsplit("--", 1)[0]
+        if remove_locked(stem, tuple(path.name.removeprefix(stem.name) for path in paths)):
+            total -= size
+
+
+def _save_parquet(directory: Path, url: str, digest: str, data: pd.DataFrame, meta: pd.DataFrame) -> bool:
+    """Keep a result as Parquet files, returning False if it cannot be written as Parquet."""
+    meta_path = _entry_path(directory, url, digest, META_SUFFIX)
+    try:
+        meta_bytes, data_bytes = meta.to_parquet(), data.to_parquet()
+    except _PARQUET_ERRORS:
+        return False
+    write_atomic(meta_path, meta_bytes)
+    # --- the data last, as an entry is complete once its data file exists
+    write_atomic(_entry_path(directory, url, digest, DATA_SUFFIX), data_bytes)
+    return True
+
+
+# --- public functions
+def payload_digest(payload: bytes, version: str = "") -> str:
+    """Get the hash of a data message, which identifies the results parsed from it.
+
+    Args:
+        payload (bytes): The data message.
+        version (str): The version of the structural metadata with which the message
+            is decoded, so a result decoded with older metadata is not used again.
+
+    """
+    return hashlib.sha256(payload + b"\0" + version.encode("utf-8")).hexdigest()
+
+
+def load_result(url: str, digest: str) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    """Get the kept result from a URL, if it was parsed from the message with the given digest.
+
+    Args:
+        url (str): The URL of the data request.
+        digest (str): The payload_digest() of the data message.
+
+    Returns:
+        The (data, meta) result, or None if there is no usable kept result.
+
+    """
+    if RESULT_PATH is None:
+        return None
+    data_path = _entry_path(RESULT_PATH, url, digest, DATA_SUFFIX)
+    pickle_path = _entry_path(RESULT_PATH, url, digest, PICKLE_SUFFIX)
+    try:
+        if data_path.exists():
+            meta_path = _entry_path(RESULT_PATH, url, digest, META_SUFFIX)
+            data, meta = pd.read_parquet(data_path), pd.read_parquet(meta_path)
+            os.utime(data_path)  # most recently used
+            return data, meta
+        if not pickle_path.exists():
+            return None
+        result = pickle.loads(pickle_path.read_bytes())  # noqa: S301 - written by save_result(), in our own directory
+        os.utime(pickle_path)
+    except _LOAD_ERRORS:
+        return None
+    match result:
+        case (pd.DataFrame() as data, pd.DataFrame() as meta):
+            return data, meta
+    return None
+
+
+def save_result(url: str, digest: str, data: pd.DataFrame, meta: pd.DataFrame) -> None:
+    """Keep the result from a URL, replacing any result parsed from an earlier message.
+
+    Args:
+        url (str): The URL of the data request.
+        digest (str): The payload_digest() of the data message the result was parsed from.
+        data (pd.DataFrame): The data, as returned by fetch().
+        meta (pd.DataFrame): The metadata, as returned by fetch().
+
+    """
+    if RESULT_PATH is None:
+        return
+    RESULT_PATH.mkdir(parents=True, exist_ok=True)
+    stem = _url_stem(url)
+    with file_lock(RESULT_PATH / stem):  # one process at a time replaces the result from a URL
+        for stale in RESULT_PATH.glob(f"{stem}--*"):
+            stale.unlink(missing_ok=True)
+        if not (_use_parquet() and _save_parquet(RESULT_PATH, url, digest, data, meta)):
+            write_atomic(_entry_path(RESULT_PATH, url, digest, PICKLE_SUFFIX), pickle.dumps((data, meta)))
+        if RESULT_MAX_BYTES:
+            _prune(RESULT_PATH, RESULT_MAX_BYTES)  # the result just kept is locked, so it stays
+
+
+def clear_result_cache() -> None:
+    """Remove every kept result from the result cache."""
+    if RESULT_PATH is None or not RESULT_PATH.is_dir():
+        return
+    for path in RESULT_PATH.glob("result-*"):
+        if path.suffix != LOCK_SUFFIX:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,144 @@
+"""Process-safe file handling for the download cache.
+
+Many processes may share the one cache directory. Files are written atomically
+(to a temporary file which is then renamed over the target), so a reader sees
+either the old or the new file, but never a missing or partly written file.
+Advisory locks let one process download a URL while the others wait for it.
+
+A lock file is only removed (by remove_locked()) while its lock is held. A
+process that was waiting on a lock file that has since been removed notices
+when it gets the lock, and locks the new lock file instead, so two processes
+never both hold the lock on one file.
+
+Note: advisory locks rely on fcntl, which is not available on Windows. There
+the locks do nothing, but writes are still atomic.
+"""
+
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+# --- constants
+LOCK_SUFFIX = ".lock"
+TEMP_SUFFIX = ".tmp"
+
+
+# --- private functions
+def _lock_path(path: Path) -> Path:
+    """Get the lock file associated with a file."""
+    return path.with_name(f"{path.name}{LOCK_SUFFIX}")
+
+
+def _open_locked(lock_path: Path, flags: int) -> TextIO:
+    """Open a lock file and take its lock, with the given flock() flags.
+
+    With LOCK_NB, BlockingIOError is raised if the lock is held elsewhere. If the
+    lock file was removed, or replaced, while we waited for its lock, the lock we
+    got protects nothing, so we lock the current lock file instead.
+    """
+    while True:
+        lock = lock_path.open("a")
+        try:
+            fcntl.flock(lock.fileno(), flags)
+        except BlockingIOError:
+            lock.close()
+            raise
+        try:
+            if os.fstat(lock.fileno()).st_ino == lock_path.stat().st_ino:
+                return lock
+        except FileNotFoundError:
+            pass
+        lock.close()  # releases the lock on the removed lock file
+
+
+# --- functions
+def write_atomic(path: Path, contents: bytes) -> None:
+    """Write bytes to a file atomically.
+
+    Args:
+        path (Path): The file to write.
+        contents (bytes): The bytes to write.
+
+    """
+    temp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}{TEMP_SUFFIX}")
+    try:
+        with temp.open("wb") as file:
+            file.write(contents)
+            file.flush()
+            os.fsync(file.fileno())
+        temp.replace(path)  # atomic on both POSIX and Windows
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock associated with a file.
+
+    The lock is taken on a separate lock file (path + LOCK_SUFFIX), so the
+    file itself can be atomically replaced while the lock is held.
+
+    Args:
+        path (Path): The file to lock.
+
+    """
+    if fcntl is None:  # pragma: no cover - Windows
+        yield
+        return
+    with _open_locked(_lock_path(path), fcntl.LOCK_EX) as lock:
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def remove_locked(path: Path, suffixes: tuple[str, ...] = ()) -> bool:
+    """Remove a file, its sidecar files and its lock file, while holding its lock.
+
+    Args:
+        path (Path): The file to remove.
+        suffixes (tuple[str, ...]): The suffixes of its sidecar files (path + suffix).
+
+    Returns:
+        bool: True if the files were removed, or False (removing nothing) if the
+            lock is held elsewhere (for example, while the file is being downloaded).
+
+    """
+    paths = [path.with_name(f"{path.name}{suffix}") for suffix in ("", *suffixes)]
+    if fcntl is None:  # pragma: no cover - Windows
+        for file in paths:
+            file.unlink(missing_ok=True)
+        return True
+    lock_path = _lock_path(path)
+    try:
+        lock = _open_locked(lock_path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    with lock:  # closing the lock file releases the lock, after it is removed
+        for file in paths:
+            file.unlink(missing_ok=True)
+        lock_path.unlink(missing_ok=True)
+    return True
+
+
+def file_stamp(path: Path) -> tuple[int, int, int] | None:
+    """Get a stamp that changes whenever a file is written or replaced.
+
+    Returns:
+        tuple[int, int, int] | None: (inode, size, modification time in ns),
+            or None if the file does not exist.
+
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
@@ -1,11 +1,20 @@
 """Basic XML code for the ABS SDMX API."""
 
+from collections.abc import Iterator
+from io import BytesIO
 from typing import Unpack
 from xml.etree.ElementTree import Element
 
 from defusedxml import ElementTree
 
-from sdmxabs.download_cache import CacheError, GetFileKwargs, HttpError, acquire_url
+from sdmxabs.download_cache import (
+    TREE_CACHE,
+    TREE_SIZE_FACTOR,
+    CacheError,
+    GetFileKwargs,
+    HttpError,
+    acquire_url,
+)
 
 # --- constants - used in multiple other modules when parsing XML
 
@@ -33,18 +42,106 @@ def acquire_xml(url: str, **kwargs: Unpack[GetFileKwargs]) -> Element:
     Raises:
         ValueError: If the response contains invalid XML.
 
+    Note:
+        Parsed trees are kept in memory, and the same tree is returned while the
+        XML for the URL is unchanged. The returned tree must not be modified.
+
     """
     kwargs["modality"] = kwargs.get("modality", "prefer-cache")
-    xml = acquire_url(url, **kwargs)
+    return parse_xml(url, acquire_url(url, **kwargs))
+
+
+def parse_xml(url: str, xml: bytes) -> Element:
+    """Parse xml data acquired from the ABS SDMX API (see acquire_xml()).
+
+    Args:
+        url (str): The URL the XML data was retrieved from.
+        xml (bytes): The XML data.
+
+    Returns:
+        An Element object containing the XML data.
+
+    Raises:
+        ValueError: If the XML data is invalid.
+
+    """
+    key = (url, xml)  # the tree is re-used only for identical XML
+    root = TREE_CACHE.get(key)
+    if root is not None:
+        return root
 
     try:
         root = ElementTree.fromstring(xml)
     except ElementTree.ParseError as e:
         raise ValueError(f"Invalid XML received from {url}: {e}") from e
 
+    TREE_CACHE.put(key, root, len(xml) * TREE_SIZE_FACTOR)
     return root
 
 
+def iter_xml(url: str, tag: str, **kwargs: Unpack[GetFileKwargs]) -> Iterator[Element]:
+    """Acquire xml data from the ABS SDMX API, and parse it incrementally.
+
+    Rather than building the whole tree, yield each element with the given tag
+    as soon as it has been parsed. Each element is freed when the next one is
+    requested, so peak memory is bounded by the largest such element, rather than
+    by the whole document. Use this for large data messages, with tag="gen:Series".
+
+    Args:
+        url (str): The URL to retrieve the XML data from.
+        tag (str): The tag of the elements to yield, with a NAME_SPACES prefix.
+        **kwargs: Additional keyword arguments passed to acquire_url().
+
+    Returns:
+        An iterator over the elements with the given tag. The data is acquired
+        when iter_xml() is called, but parsed only as the iterator is consumed.
+
+    Raises:
+        ValueError: If the response contains invalid XML (raised while iterating).
+
+    """
+    kwargs["modality"] = kwargs.get("modality", "prefer-cache")
+    return iter_xml_elements(url, acquire_url(url, **kwargs), tag)
+
+
+def iter_xml_elements(url: str, xml: bytes, tag: str) -> Iterator[Element]:
+    """Parse xml data acquired from the ABS SDMX API incrementally (see iter_xml()).
+
+    Args:
+        url (str): The URL the XML data was retrieved from.
+        xml (bytes): The XML data.
+        tag (str): The tag of the elements to yield, with a NAME_SPACES prefix.
+
+    Returns:
+        An iterator over the elements with the given tag.
+
+    Raises:
+        ValueError: If the XML data is invalid (raised while iterating).
+
+    """
+    prefix, _, local_name = tag.rpartition(":")
+    qualified = f"{{{NAME_SPACES[prefix]}}}{local_name}" if prefix else local_name
+    return _iter_elements(url, xml, qualified)
+
+
+def _iter_elements(url: str, xml: bytes, tag: str) -> Iterator[Element]:
+    """Parse xml incrementally, yielding (and then freeing) each element with a fully-qualified tag."""
+    parents: list[Element] = []  # the elements that are open, so a yielded element can be detached
+    try:
+        for event, element in ElementTree.iterparse(BytesIO(xml), events=("start", "end")):
+            if event == "start":
+                parents.append(element)
+                continue
+            parents.pop()
+            if element.tag == tag:
+                yield element
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+    except ElementTree.ParseError as e:
+        raise ValueError(f"Invalid XML received from {url}: {e}") from e
+
+
 if __name__ == "__main__":
 
     def xml_test() -> None:
@@ -1,9 +1,16 @@
 """Pytest configuration and fixtures for sdmxabs tests."""
 
+import importlib
+import json
 import shutil
 import tempfile
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
 
@@ -11,6 +18,36 @@ import pytest
 TEST_DATA_DIR = Path(__file__).parent / "data"
 
 
+@pytest.fixture(autouse=True)
+def empty_memory_cache():
+    """Start (and end) each test with empty in-memory caches."""
+    from sdmxabs.download_cache import clear_memory_cache
+
+    clear_memory_cache()
+    yield
+    clear_memory_cache()
+
+
+@pytest.fixture(autouse=True)
+def temp_metadata_store(tmp_path, monkeypatch):
+    """Give each test its own (empty) persistent metadata store, and empty in-memory results."""
+    from sdmxabs import metadata_store
+
+    monkeypatch.setattr(metadata_store, "STORE_PATH", tmp_path / "metadata-store" / "metadata.sqlite3")
+    _clear_metadata_caches()
+    yield
+    _clear_metadata_caches()
+
+
+@pytest.fixture(autouse=True)
+def temp_result_cache(tmp_path, monkeypatch):
+    """Give each test its own (empty) cache of parsed results."""
+    from sdmxabs import result_cache
+
+    monkeypatch.setattr(result_cache, "RESULT_PATH", tmp_path / "results")
+    return tmp_path / "results"
+
+
 @pytest.fixture
 def temp_cache_dir():
     """Create a temporary cache directory for testing."""
@@ -112,3 +149,333 @@ def sample_dataframe_data():
     }
 
     return pd.DataFrame(data), pd.DataFrame(meta).T
+
+
+def _not_modified(request_headers, response_headers):
+    """Check a conditional request against the validators of the response."""
+    etag = response_headers.get("ETag")
+    if etag and request_headers.get("If-None-Match"):
+        return request_headers["If-None-Match"] == etag
+    modified = response_headers.get("Last-Modified")
+    return bool(modified) and request_headers.get("If-Modified-Since") == modified
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Serve the routes registered on a StandInServer."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, unless the client asks to close
+    disable_nagle_algorithm = True
+    wbufsize = -1  # send each response in one write, flushed when the request is done
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            server.requests.append((self.path, dict(self.headers)))
+        time.sleep(server.delay)
+        route = server.routes.get(self.path)
+        if route is None and server.fallback is not None:
+            route = server.fallback(self.path)
+        if route is None:
+            status, headers, body = 404, {}, b""
+        else:
+            body, headers = route
+            status = 200
+            if _not_modified(self.headers, headers):
+                status, body = 304, b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # keep the test output quiet
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A local HTTP server that stands in for the ABS SDMX API.
+
+    Register responses in `routes`, keyed on the request path (including any
+    query string), as (body, headers) tuples. Unknown paths get a 404.
+    Conditional requests that match an ETag or Last-Modified header in the
+    registered headers get a 304. Set `delay` (seconds) to slow every response.
+    Set `fallback` to a function of the path, returning (body, headers) or None,
+    to generate responses for paths that are not registered.
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.routes = {}
+        self.requests = []
+        self.request_count = 0
+        self.connection_count = 0
+        self.delay = 0.0
+        self.fallback = None
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        connection = super().get_request()
+        with self.lock:
+            self.connection_count += 1
+        return connection
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+@pytest.fixture
+def stand_in_server():
+    """Run a local stand-in for the ABS SDMX API for the duration of a test."""
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# --- a stand-in for the ABS: one small, quarterly data flow
+STAND_IN_FLOW = "TEST"
+STAND_IN_DIMENSIONS = {  # in key order: dimension: (codelist, {code: name})
+    "MEASURE": ("CL_MEASURE", {"M1": "Level", "M2": "Change"}),
+    "REGION": ("CL_REGION", {"AUS": "Australia", "NSW": "New South Wales", "VIC": "Victoria"}),
+    "FREQ": ("CL_FREQ", {"Q": "Quarterly"}),
+}
+STAND_IN_ATTRIBUTES = {  # attribute: (codelist, {code: name}, attachment)
+    "UNIT_MEASURE": (
+        "CL_UNIT",
+        {"IDX": "Index Numbers"},
+        "<str:Dimension><Ref id='MEASURE'/></str:Dimension>",
+    ),
+    "OBS_STATUS": (
+        "CL_OBS_STATUS",
+        {"p": "Provisional"},
+        "<str:PrimaryMeasure><Ref id='OBS_VALUE'/></str:PrimaryMeasure>",
+    ),
+}
+STAND_IN_PERIODS = [f"{year}-Q{quarter}" for year in (2020, 2021) for quarter in (1, 2, 3, 4)]
+_MESSAGE = (
+    'xmlns:mes="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/message" '
+    'xmlns:str="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/structure" '
+    'xmlns:com="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/common" '
+    'xmlns:gen="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/data/generic"'
+)
+
+
+def stand_in_value(measure, region, period):
+    """The observation value the stand-in ABS serves for one series and period."""
+    codes = [list(STAND_IN_DIMENSIONS[dim][1]) for dim in ("MEASURE", "REGION")]
+    return 100 * (codes[0].index(measure) + 1) + 10 * codes[1].index(region) + STAND_IN_PERIODS.index(period)
+
+
+def _structure_message(body):
+    return f"<mes:Structure {_MESSAGE}><mes:Structures>{body}</mes:Structures></mes:Structure>".encode()
+
+
+def _stand_in_structures():
+    """The structural metadata routes for the stand-in ABS."""
+    dataflow = _structure_message(
+        f'<str:Dataflows><str:Dataflow id="{STAND_IN_FLOW}"><com:Name>Test flow</com:Name>'
+        '<str:Structure><Ref id="DS_TEST"/></str:Structure></str:Dataflow></str:Dataflows>'
+    )
+
+    def component(tag, name, codelist, position="", attachment=""):
+        position = f' position="{position}"' if position else ""
+        relationship = (
+            f"<str:AttributeRelationship>{attachment}</str:AttributeRelationship>" if attachment else ""
+        )
+        return (
+            f'<str:{tag} id="{name}"{position}><str:LocalRepresentation><str:Enumeration>'
+            f'<Ref id="{codelist}" package="codelist"/>'
+            f"</str:Enumeration></str:LocalRepresentation>{relationship}</str:{tag}>"
+        )
+
+    dimensions = "".join(
+        component("Dimension", name, codelist, str(position))
+        for position, (name, (codelist, _)) in enumerate(STAND_IN_DIMENSIONS.items(), start=1)
+    )
+    attributes = "".join(
+        component("Attribute", name, codelist, attachment=attachment)
+        for name, (codelist, _, attachment) in STAND_IN_ATTRIBUTES.items()
+    )
+    structure_body = (
+        '<str:DataStructures><str:DataStructure id="DS_TEST"><str:DataStructureComponents>'
+        f"<str:DimensionList>{dimensions}</str:DimensionList>"
+        f"<str:AttributeList>{attributes}</str:AttributeList>"
+        "</str:DataStructureComponents></str:DataStructure></str:DataStructures>"
+    )
+    structure = _structure_message(structure_body)
+    routes = {
+        "/dataflow/ABS/all": (dataflow, {}),
+        f"/dataflow/ABS/{STAND_IN_FLOW}": (dataflow, {}),
+        "/datastructure/ABS/DS_TEST": (structure, {}),
+    }
+    codelists = []
+    for codelist, codes, *_ in (*STAND_IN_DIMENSIONS.values(), *STAND_IN_ATTRIBUTES.values()):
+        items = "".join(
+            f'<str:Code id="{code}"><com:Name>{name}</com:Name></str:Code>' for code, name in codes.items()
+        )
+        codelists.append(f'<str:Codelist id="{codelist}">{items}</str:Codelist>')
+        routes[f"/codelist/ABS/{codelist}"] = (
+            _structure_message(f"<str:Codelists>{codelists[-1]}</str:Codelists>"),
+            {},
+        )
+    routes["/datastructure/ABS/DS_TEST?references=children"] = (  # the structure with its code lists
+        _structure_message(f"<str:Codelists>{''.join(codelists)}</str:Codelists>{structure_body}"),
+        {},
+    )
+    routes["/datastructure/ABS/all"] = (structure, {})
+    routes["/codelist/ABS/all"] = (
+        _structure_message(f"<str:Codelists>{''.join(codelists)}</str:Codelists>"),
+        {},
+    )
+    return routes
+
+
+def _selected(key):
+    """The codes selected by an SDMX key, for each dimension of the stand-in flow."""
+    parts = key.split(".") if key != "all" else [""] * len(STAND_IN_DIMENSIONS)
+    return [
+        [code for code in codes if not part or code in part.split("+")]
+        for part, (_, codes) in zip(parts, STAND_IN_DIMENSIONS.values(), strict=True)
+    ]
+
+
+def _stand_in_csv(measures, regions, freqs, periods):
+    """Generate an SDMX-CSV data message for the stand-in ABS (as for format=csvfile)."""
+    lines = [",".join(["DATAFLOW", *STAND_IN_DIMENSIONS, "TIME_PERIOD", "OBS_VALUE", *STAND_IN_ATTRIBUTES])]
+    lines += [
+        f"ABS:{STAND_IN_FLOW}(1.0.0),{measure},{region},{freq},{period},"
+        f"{stand_in_value(measure, region, period)},IDX,"
+        for measure in measures
+        for region in regions
+        for freq in freqs
+        for period in periods
+    ]
+    return "".join(f"{line}\n" for line in lines).encode()
+
+
+def _stand_in_json(measures, regions, freqs, periods):
+    """Generate an SDMX-JSON data message for the stand-in ABS (as for format=jsondata)."""
+    selected = {"MEASURE": measures, "REGION": regions, "FREQ": freqs}
+    series = {
+        f"{m}:{r}:{f}": {
+            "attributes": [0],
+            "observations": {
+                str(p): [stand_in_value(measure, region, period), None] for p, period in enumerate(periods)
+            },
+        }
+        for m, measure in enumerate(measures)
+        for r, region in enumerate(regions)
+        for f, _ in enumerate(freqs)
+    }
+
+    def values(codes, names):
+        return [{"id": code, "name": names.get(code, code)} for code in codes]
+
+    structure = {
+        "dimensions": {
+            "series": [
+                {"id": dim, "keyPosition": position, "values": values(selected[dim], codes)}
+                for position, (dim, (_, codes)) in enumerate(STAND_IN_DIMENSIONS.items())
+            ],
+            "observation": [{"id": "TIME_PERIOD", "values": values(periods, {})}],
+        },
+        "attributes": {
+            "series": [
+                {"id": "UNIT_MEASURE", "values": values(["IDX"], STAND_IN_ATTRIBUTES["UNIT_MEASURE"][1])}
+            ],
+            "observation": [{"id": "OBS_STATUS", "values": []}],
+        },
+    }
+    return json.dumps({"data": {"dataSets": [{"series": series}], "structure": structure}}).encode()
+
+
+def _stand_in_data(path):
+    """Generate a generic SDMX-ML (or SDMX-CSV or SDMX-JSON) data message for the stand-in ABS."""
+    parts = urlsplit(path)
+    segments = parts.path.split("/")
+    if len(segments) != 4 or segments[1:3] != ["data", STAND_IN_FLOW]:
+        return None
+    query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+    periods = [  # as for SDMX, an endPeriod of "2020" includes every period in 2020
+        period
+        for period in STAND_IN_PERIODS
+        if query.get("startPeriod", period) <= period
+        and period[: len(query.get("endPeriod", period))] <= query.get("endPeriod", period)
+    ]
+    series = []
+    measures, regions, freqs = _selected(segments[3])
+    if not (measures and regions and freqs and periods):
+        return None  # the ABS replies 404 (NoRecordsFound)
+    if query.get("format") == "csvfile":
+        return _stand_in_csv(measures, regions, freqs, periods), {}
+    if query.get("format") == "jsondata":
+        return _stand_in_json(measures, regions, freqs, periods), {}
+    for measure in measures:
+        for region in regions:
+            for freq in freqs:
+                keys = "".join(
+                    f'<gen:Value id="{dim}" value="{code}"/>'
+                    for dim, code in zip(STAND_IN_DIMENSIONS, (measure, region, freq), strict=True)
+                )
+                observations = "".join(
+                    f'<gen:Obs><gen:ObsDimension value="{period}"/>'
+                    f'<gen:ObsValue value="{stand_in_value(measure, region, period)}"/></gen:Obs>'
+                    for period in periods
+                    if query.get("detail") != "serieskeysonly"
+                )
+                series.append(
+                    f"<gen:Series><gen:SeriesKey>{keys}</gen:SeriesKey>"
+                    '<gen:Attributes><gen:Value id="UNIT_MEASURE" value="IDX"/></gen:Attributes>'
+                    f"{observations}</gen:Series>"
+                )
+    if not series or not periods:
+        return None  # the ABS replies 404 (NoRecordsFound)
+    body = f"<mes:GenericData {_MESSAGE}><mes:DataSet>{''.join(series)}</mes:DataSet></mes:GenericData>"
+    return body.encode(), {}
+
+
+def _clear_metadata_caches():
+    from sdmxabs import flow_metadata
+
+    for function in (
+        flow_metadata.data_flows,
+        flow_metadata.structure_ident,
+        flow_metadata.data_structures,
+        flow_metadata.attribute_attachments,
+        flow_metadata.code_lists,
+        flow_metadata.code_list_for,
+        flow_metadata.structure_from_flow_id,
+    ):
+        function.cache_clear()
+
+
+@pytest.fixture
+def stand_in_abs(stand_in_server, temp_cache_dir, monkeypatch):
+    """Point the package at a local stand-in for the ABS, with its own cache directory.
+
+    The stand-in serves the structural metadata and data for one small flow
+    (STAND_IN_FLOW), with the values given by stand_in_value().
+    """
+    from sdmxabs import download_cache, xml_base
+
+    stand_in_server.routes.update(_stand_in_structures())
+    stand_in_server.fallback = _stand_in_data
+    for module in ("xml_base", "fetch", "flow_metadata"):  # (sdmxabs.fetch is also a function)
+        monkeypatch.setattr(importlib.import_module(f"sdmxabs.{module}"), "URL_STEM", stand_in_server.url)
+    for module in (xml_base, importlib.import_module("sdmxabs.fetch")):
+        monkeypatch.setattr(
+            module, "acquire_url", partial(download_cache.acquire_url, cache_dir=temp_cache_dir)
+        )
+    _clear_metadata_caches()
+    yield stand_in_server
+    _clear_metadata_caches()
@@ -0,0 +1,92 @@
+"""Tests for cache_index module."""
+
+from sdmxabs.cache_index import (
+    COMPACT_CHECK_EVERY,
+    COMPACT_MINIMUM,
+    INDEX_NAME,
+    compact_index,
+    load_index,
+    record_access,
+    record_removal,
+    select_evictions,
+)
+
+
+class TestRecordAndLoad:
+    """Test recording accesses and folding the log into entries."""
+
+    def test_record_and_load(self, temp_cache_dir):
+        record_access(temp_cache_dir, "a", 10)
+        record_access(temp_cache_dir, "b", 20)
+        record_access(temp_cache_dir, "a", 11)
+
+        entries = load_index(temp_cache_dir)
+
+        assert set(entries) == {"a", "b"}
+        assert entries["a"][0] == 11
+        assert entries["a"][1] >= entries["b"][1]
+
+    def test_record_removal(self, temp_cache_dir):
+        record_access(temp_cache_dir, "a", 10)
+        record_access(temp_cache_dir, "b", 20)
+        record_removal(temp_cache_dir, ["a"])
+
+        assert set(load_index(temp_cache_dir)) == {"b"}
+
+    def test_first_use_scans_existing_files(self, temp_cache_dir):
+        (temp_cache_dir / "old").write_bytes(b"12345")
+        (temp_cache_dir / "old.validators").write_text("{}")
+
+        entries = load_index(temp_cache_dir, (".validators",))
+
+        assert set(entries) == {"old"}
+        assert entries["old"][0] == 5
+        assert (temp_cache_dir / INDEX_NAME).exists()
+
+    def test_partial_lines_are_ignored(self, temp_cache_dir):
+        record_access(temp_cache_dir, "a", 10)
+        with (temp_cache_dir / INDEX_NAME).open("a") as log:
+            log.write("b\t2")  # an interrupted write
+
+        assert set(load_index(temp_cache_dir)) == {"a"}
+
+    def test_long_log_is_compacted(self, temp_cache_dir):
+        for _ in range(COMPACT_MINIMUM + 1):
+            record_access(temp_cache_dir, "a", 10)
+
+        load_index(temp_cache_dir)
+
+        lines = (temp_cache_dir / INDEX_NAME).read_text().splitlines()
+        assert len(lines) == 1
+
+    def test_long_log_is_compacted_while_recording(self, temp_cache_dir):
+        for _ in range(COMPACT_MINIMUM + COMPACT_CHECK_EVERY):
+            record_access(temp_cache_dir, "a", 10)
+
+        lines = (temp_cache_dir / INDEX_NAME).read_text().splitlines()
+        assert len(lines) <= COMPACT_CHECK_EVERY
+        assert set(load_index(temp_cache_dir)) == {"a"}
+
+    def test_compact_index(self, temp_cache_dir):
+        compact_index(temp_cache_dir, {"a": (1, 2.0), "b": (3, 1.0)})
+        assert load_index(temp_cache_dir) == {"a": (1, 2.0), "b": (3, 1.0)}
+
+
+ENTRIES = {"new": (100, 3.0), "old": (100, 1.0), "mid": (100, 2.0)}
+
+
+class TestSelectEvictions:
+    """Test the least-recently-used selection."""
+
+    def test_no_limits(self):
+        assert select_evictions(ENTRIES, 0, 0) == []
+
+    def test_byte_budget(self):
+        assert select_evictions(ENTRIES, 250, 0) == ["old"]
+        assert select_evictions(ENTRIES, 100, 0) == ["old", "mid"]
+
+    def test_entry_budget(self):
+        assert select_evictions(ENTRIES, 0, 1) == ["old", "mid"]
+
+    def test_both_budgets(self):
+        assert select_evictions(ENTRIES, 250, 1) == ["old", "mid"]
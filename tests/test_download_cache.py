@@ -1,21 +1,48 @@
 """Tests for download_cache module."""
 
+import contextlib
+import gzip
+import multiprocessing
+import os
+import threading
+import time
 from unittest.mock import Mock, patch
 
 import pytest
 import requests
 
+from sdmxabs.cache_index import INDEX_NAME
 from sdmxabs.download_cache import (
+    DATA_MAX_AGE,
     DOWNLOAD_TIMEOUT,
+    METADATA_MAX_AGE,
+    NOT_INDEXED,
     CacheError,
     HttpError,
     _check_for_bad_response,
+    _compress,
+    _decompress,
     _get_data,
+    _is_fresh,
+    _load_validators,
+    _max_age,
     _request_get,
     _retrieve_from_cache,
     _save_to_cache,
+    _single_flight,
     acquire_url,
+    clear_memory_cache,
+    get_session,
+    make_session,
+    memory_cache_stats,
+    prune_cache,
+    set_memory_cache_size,
+    set_session,
 )
+from sdmxabs.download_cache import (
+    MEMORY_CACHE_BYTES as DEFAULT_MEMORY_CACHE_BYTES,
+)
+from sdmxabs.safe_io import LOCK_SUFFIX, file_lock
 
 
 class TestHttpError:
@@ -24,6 +51,14 @@ class TestHttpError:
     def test_http_error_creation(self):
         error = HttpError("Test error")
         assert str(error) == "Test error"
+        assert error.status is None
+
+    def test_prefer_url_cache_miss_keeps_http_error(self, stand_in_server, temp_cache_dir):
+        url = f"{stand_in_server.url}/data/MISSING"
+        with pytest.raises(CacheError) as exc_info:
+            acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        assert isinstance(exc_info.value.__cause__, HttpError)
+        assert exc_info.value.__cause__.status == 404
 
 
 class TestCacheError:
@@ -54,6 +89,7 @@ class TestCheckForBadResponse:
             _check_for_bad_response("http://test.com", response)
 
         assert "Problem 404 accessing: http://test.com" in str(exc_info.value)
+        assert exc_info.value.status == 404
 
     def test_no_headers(self):
         response = Mock()
@@ -108,8 +144,8 @@ class TestSaveToCache:
 class TestRequestGet:
     """Test _request_get function."""
 
-    @patch("sdmxabs.download_cache.requests.get")
-    def test_successful_request(self, mock_get, temp_cache_dir):
+    @patch("sdmxabs.download_cache.get_session")
+    def test_successful_request(self, mock_get_session, temp_cache_dir):
         file_path = temp_cache_dir / "test_file"
 
         # Setup mock response
@@ -117,32 +153,35 @@ class TestRequestGet:
         mock_response.status_code = 200
         mock_response.headers = {"Content-Type": "application/xml"}
         mock_response.content = b"test content"
+        mock_get = mock_get_session.return_value.get
         mock_get.return_value = mock_response
 
         result = _request_get("http://test.com", file_path, verbose=False)
 
         assert result == b"test content"
-        mock_get.assert_called_once_with("http://test.com", allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+        mock_get.assert_called_once_with(
+            "http://test.com", headers={}, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT
+        )
 
-    @patch("sdmxabs.download_cache.requests.get")
-    def test_request_exception(self, mock_get, temp_cache_dir):
+    @patch("sdmxabs.download_cache.get_session")
+    def test_request_exception(self, mock_get_session, temp_cache_dir):
         file_path = temp_cache_dir / "test_file"
-        mock_get.side_effect = requests.exceptions.RequestException("Network error")
+        mock_get_session.return_value.get.side_effect = requests.exceptions.RequestException("Network error")
 
         with pytest.raises(HttpError) as exc_info:
             _request_get("http://test.com", file_path, verbose=False)
 
         assert "there was a problem downloading http://test.com" in str(exc_info.value)
 
-    @patch("sdmxabs.download_cache.requests.get")
-    def test_empty_response(self, mock_get, temp_cache_dir):
+    @patch("sdmxabs.download_cache.get_session")
+    def test_empty_response(self, mock_get_session, temp_cache_dir):
         file_path = temp_cache_dir / "test_file"
 
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"Content-Type": "application/xml"}
         mock_response.content = b""
-        mock_get.return_value = mock_response
+        mock_get_session.return_value.get.return_value = mock_response
 
         result = _request_get("http://test.com", file_path, verbose=False)
 
@@ -151,6 +190,560 @@ class TestRequestGet:
         assert not file_path.exists()
 
 
+class TestSession:
+    """Test the shared, pooled HTTP session."""
+
+    def test_session_is_shared(self):
+        set_session(None)
+        assert get_session() is get_session()
+
+    def test_make_session_pool_settings(self):
+        session = make_session(pool_connections=2, pool_maxsize=3)
+        adapter = session.get_adapter("https://data.api.abs.gov.au")
+        assert adapter.poolmanager.connection_pool_kw["maxsize"] == 3
+        assert adapter.poolmanager.connection_pool_kw["block"] is True
+        assert session.headers.get("Connection") != "close"
+
+    def test_make_session_without_keep_alive(self):
+        session = make_session(keep_alive=False)
+        assert session.headers["Connection"] == "close"
+
+    def test_set_session_replaces_and_closes(self):
+        old = Mock()
+        set_session(old)
+        assert get_session() is old
+        new = make_session()
+        set_session(new)
+        assert get_session() is new
+        old.close.assert_called_once()
+        set_session(None)
+
+    def test_connections_are_reused(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {})
+        set_session(make_session())
+        for _ in range(5):
+            acquire_url(f"{stand_in_server.url}/data/X", cache_dir=temp_cache_dir, modality="prefer-url")
+        assert stand_in_server.request_count == 5
+        assert stand_in_server.connection_count == 1
+        set_session(None)
+
+
+class TestSessionBenchmark:
+    """Compare pooled downloads against a new connection per download."""
+
+    @pytest.mark.slow
+    def test_pooled_versus_unpooled(self, stand_in_server, temp_cache_dir):
+        n = 50
+        stand_in_server.routes["/data/X"] = (b"<x/>" * 100, {})
+        url = f"{stand_in_server.url}/data/X"
+
+        def run(session):
+            set_session(session)
+            before = stand_in_server.connection_count
+            start = time.perf_counter()
+            for _ in range(n):
+                acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+            return time.perf_counter() - start, stand_in_server.connection_count - before
+
+        unpooled_time, unpooled_connections = run(make_session(keep_alive=False))
+        pooled_time, pooled_connections = run(make_session())
+        set_session(None)
+        print(
+            f"\n{n} downloads: new connection each time {unpooled_time:.3f}s "
+            f"({unpooled_connections} connections); pooled {pooled_time:.3f}s "
+            f"({pooled_connections} connections)"
+        )
+        assert unpooled_connections == n
+        assert pooled_connections == 1
+
+
+def _cached_files(cache_dir):
+    """List the cached files in a cache directory, without their sidecar files."""
+    return [f for f in cache_dir.glob("cache--*") if not f.name.endswith(NOT_INDEXED)]
+
+
+def _fill(cache_dir, names):
+    """Save 100 bytes to the cache under each name, in order."""
+    for name in names:
+        _save_to_cache(cache_dir / name, b"x" * 100)
+        time.sleep(0.002)  # distinct access times
+
+
+class TestRevalidate:
+    """Test conditional revalidation with ETag / Last-Modified validators."""
+
+    def test_validators_saved(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Sep 2025"})
+        url = f"{stand_in_server.url}/data/X"
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        (cached,) = _cached_files(temp_cache_dir)
+        assert _load_validators(cached) == {"ETag": '"v1"', "Last-Modified": "Mon, 01 Sep 2025"}
+
+    def test_not_modified_serves_cache(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {"ETag": '"v1"'})
+        url = f"{stand_in_server.url}/data/X"
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        result = acquire_url(url, cache_dir=temp_cache_dir, modality="revalidate")
+        assert result == b"<x/>"
+        _, headers = stand_in_server.requests[-1]
+        assert headers["If-None-Match"] == '"v1"'
+
+    def test_last_modified_only(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {"Last-Modified": "Mon, 01 Sep 2025"})
+        url = f"{stand_in_server.url}/data/X"
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="revalidate") == b"<x/>"
+        _, headers = stand_in_server.requests[-1]
+        assert headers["If-Modified-Since"] == "Mon, 01 Sep 2025"
+        assert "If-None-Match" not in headers
+
+    def test_modified_replaces_cache(self, stand_in_server, temp_cache_dir):
+        url = f"{stand_in_server.url}/data/X"
+        stand_in_server.routes["/data/X"] = (b"<old/>", {"ETag": '"v1"'})
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        stand_in_server.routes["/data/X"] = (b"<new/>", {})
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="revalidate") == b"<new/>"
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-cache") == b"<new/>"
+        # the new response had no validators, so the stale ones are gone
+        assert not list(temp_cache_dir.glob("*.validators"))
+
+    def test_revalidate_without_cache_downloads(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {"ETag": '"v1"'})
+        url = f"{stand_in_server.url}/data/X"
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="revalidate") == b"<x/>"
+        _, headers = stand_in_server.requests[-1]
+        assert "If-None-Match" not in headers
+
+    def test_revalidate_falls_back_to_cache(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        file_path.write_bytes(b"cached content")
+
+        with patch("sdmxabs.download_cache._request_get") as mock_request:
+            mock_request.side_effect = HttpError("Network error")
+            result = _get_data("http://test.com", file_path, modality="revalidate")
+
+        assert result == b"cached content"
+
+
+class TestPreferFresh:
+    """Test the time-to-live freshness policy."""
+
+    def test_max_age_by_endpoint(self):
+        stem = "https://data.api.abs.gov.au/rest"
+        assert _max_age(f"{stem}/dataflow/ABS/all") == METADATA_MAX_AGE
+        assert _max_age(f"{stem}/datastructure/ABS/WPI") == METADATA_MAX_AGE
+        assert _max_age(f"{stem}/codelist/ABS/CL_FREQ") == METADATA_MAX_AGE
+        assert _max_age(f"{stem}/data/WPI/all") == DATA_MAX_AGE
+        assert _max_age(f"{stem}/data/WPI/all", max_age=5) == 5
+
+    def test_is_fresh(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        assert not _is_fresh("http://test.com/data/X", file_path)
+        file_path.write_bytes(b"cached content")
+        assert _is_fresh("http://test.com/data/X", file_path)
+        assert not _is_fresh("http://test.com/data/X", file_path, max_age=0)
+
+    def test_fresh_cache_is_served(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        file_path.write_bytes(b"cached content")
+
+        with patch("sdmxabs.download_cache._request_get") as mock_request:
+            result = _get_data("http://test.com/data/X", file_path, modality="prefer-fresh")
+
+        assert result == b"cached content"
+        mock_request.assert_not_called()
+
+    def test_stale_cache_is_revalidated(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {"ETag": '"v1"'})
+        url = f"{stand_in_server.url}/data/X"
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        (cached,) = _cached_files(temp_cache_dir)
+        an_hour_ago = time.time() - 3600
+        os.utime(cached, (an_hour_ago, an_hour_ago))
+
+        result = acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-fresh", max_age=60)
+
+        assert result == b"<x/>"
+        assert stand_in_server.request_count == 2
+        _, headers = stand_in_server.requests[-1]
+        assert headers["If-None-Match"] == '"v1"'
+        # the 304 restarts the freshness clock, so the next call stays local
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-fresh", max_age=60)
+        assert stand_in_server.request_count == 2
+
+    def test_no_cache_downloads(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {})
+        url = f"{stand_in_server.url}/data/X"
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-fresh") == b"<x/>"
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-fresh") == b"<x/>"
+        assert stand_in_server.request_count == 1
+
+
+class TestNoStore:
+    """Test the one-off requests, which leave nothing in the cache."""
+
+    def test_nothing_left_behind(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {"ETag": '"v1"'})
+        url = f"{stand_in_server.url}/data/X"
+        with patch("sdmxabs.download_cache.CACHE_MAX_BYTES", 1_000_000):
+            assert acquire_url(url, cache_dir=temp_cache_dir, modality="no-store") == b"<x/>"
+            assert acquire_url(url, cache_dir=temp_cache_dir, modality="no-store") == b"<x/>"
+
+        assert stand_in_server.request_count == 2
+        assert list(temp_cache_dir.iterdir()) == []
+
+    def test_cache_not_used(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<new/>", {})
+        url = f"{stand_in_server.url}/data/X"
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        (cached,) = _cached_files(temp_cache_dir)
+        cached.write_bytes(b"<old/>")
+
+        assert acquire_url(url, cache_dir=temp_cache_dir, modality="no-store") == b"<new/>"
+        assert cached.read_bytes() == b"<old/>"
+
+    def test_error_not_served_from_cache(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {})
+        url = f"{stand_in_server.url}/data/X"
+        acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+        del stand_in_server.routes["/data/X"]
+
+        with pytest.raises(HttpError):
+            acquire_url(url, cache_dir=temp_cache_dir, modality="no-store")
+
+
+class TestPruneCache:
+    """Test the size-bounded cache with least-recently-used eviction."""
+
+    def test_prune_by_entries(self, temp_cache_dir):
+        with patch("sdmxabs.download_cache.CACHE_MAX_BYTES", 1_000_000):  # accesses are indexed
+            _fill(temp_cache_dir, ["a", "b", "c"])
+            _retrieve_from_cache(temp_cache_dir / "a")  # "a" is now the most recently used
+
+        removed = prune_cache(max_entries=2, cache_dir=temp_cache_dir)
+
+        assert removed == ["b"]  # the hit in memory was noted, and logged before pruning
+        assert not (temp_cache_dir / "b").exists()
+        assert (temp_cache_dir / "a").exists()
+        assert (temp_cache_dir / "c").exists()
+
+    def test_prune_by_bytes_removes_sidecars(self, temp_cache_dir):
+        _fill(temp_cache_dir, ["a", "b"])
+        (temp_cache_dir / "a.validators").write_text("{}")
+
+        removed = prune_cache(max_bytes=150, cache_dir=temp_cache_dir)
+
+        assert removed == ["a"]
+        assert not (temp_cache_dir / "a.validators").exists()
+
+    def test_prune_forgets_missing_files(self, temp_cache_dir):
+        _fill(temp_cache_dir, ["a", "b"])
+        (temp_cache_dir / "a").unlink()
+
+        assert prune_cache(0, 0, temp_cache_dir) == []
+        assert prune_cache(max_entries=1, cache_dir=temp_cache_dir) == []
+
+    def test_budget_enforced_on_save(self, temp_cache_dir):
+        with patch("sdmxabs.download_cache.CACHE_MAX_ENTRIES", 2):
+            _fill(temp_cache_dir, ["a", "b", "c"])
+
+        assert sorted(f.name for f in temp_cache_dir.iterdir() if f.name in {"a", "b", "c"}) == ["b", "c"]
+
+    def test_locked_file_not_removed(self, temp_cache_dir):
+        _fill(temp_cache_dir, ["a", "b"])
+        with file_lock(temp_cache_dir / "a"):  # as while "a" is being downloaded again
+            assert prune_cache(max_entries=1, cache_dir=temp_cache_dir) == []
+        assert (temp_cache_dir / "a").exists()
+
+        assert prune_cache(max_entries=1, cache_dir=temp_cache_dir) == ["a"]
+        assert not (temp_cache_dir / f"a{LOCK_SUFFIX}").exists()
+
+    def test_orphaned_lock_files_removed(self, temp_cache_dir):
+        with file_lock(temp_cache_dir / "never-cached"):  # as for a download that failed
+            pass
+
+        prune_cache(0, 0, temp_cache_dir)
+
+        assert not (temp_cache_dir / f"never-cached{LOCK_SUFFIX}").exists()
+
+    def test_no_index_without_budget(self, temp_cache_dir):
+        _fill(temp_cache_dir, ["a", "b"])
+        _retrieve_from_cache(temp_cache_dir / "a")
+
+        assert not (temp_cache_dir / INDEX_NAME).exists()
+
+    def test_unindexed_files_are_added(self, temp_cache_dir):
+        with patch("sdmxabs.download_cache.CACHE_MAX_BYTES", 1_000_000):
+            _fill(temp_cache_dir, ["a", "b"])
+        (temp_cache_dir / "old").write_bytes(b"x" * 100)  # saved while there was no budget
+        os.utime(temp_cache_dir / "old", (0, 0))
+
+        assert prune_cache(max_entries=2, cache_dir=temp_cache_dir) == ["old"]
+
+    def test_prune_missing_directory(self, temp_cache_dir):
+        assert prune_cache(1, 1, temp_cache_dir / "nowhere") == []
+
+
+class TestCompression:
+    """Test transparent compression of cached files."""
+
+    xml = b"<gen:Series>" + b"<gen:Obs/>" * 1000 + b"</gen:Series>"
+
+    def test_gzip_round_trip(self):
+        stored = _compress(self.xml, "gzip")
+        assert stored.startswith(b"\x1f\x8b")
+        assert len(stored) < len(self.xml) / 10
+        assert _decompress(stored, "test") == self.xml
+
+    def test_zstd_round_trip(self):
+        pytest.importorskip("zstandard")
+        stored = _compress(self.xml, "zstd")
+        assert stored.startswith(b"\x28\xb5\x2f\xfd")
+        assert _decompress(stored, "test") == self.xml
+
+    def test_auto_and_none(self):
+        assert _decompress(_compress(self.xml, "auto"), "test") == self.xml
+        assert _compress(self.xml, "none") == self.xml
+        assert _decompress(self.xml, "test") == self.xml
+
+    def test_unknown_codec(self):
+        with pytest.raises(CacheError):
+            _compress(self.xml, "bzip3")
+
+    def test_corrupt_file(self):
+        with pytest.raises(CacheError):
+            _decompress(b"\x1f\x8b" + b"not really gzip", "test")
+
+    def test_save_and_retrieve_compressed(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        with patch("sdmxabs.download_cache.CACHE_COMPRESSION", "gzip"):
+            _save_to_cache(file_path, self.xml)
+
+        assert gzip.decompress(file_path.read_bytes()) == self.xml
+        assert _retrieve_from_cache(file_path) == self.xml
+
+    def test_mixed_entries(self, temp_cache_dir):
+        (temp_cache_dir / "old").write_bytes(self.xml)  # an uncompressed, older entry
+        with patch("sdmxabs.download_cache.CACHE_COMPRESSION", "gzip"):
+            _save_to_cache(temp_cache_dir / "new", self.xml)
+            assert _retrieve_from_cache(temp_cache_dir / "old") == self.xml
+            assert _retrieve_from_cache(temp_cache_dir / "new") == self.xml
+
+
+class TestMemoryCache:
+    """Test the in-memory cache of payloads in front of the file-system cache."""
+
+    def test_repeat_reads_served_from_memory(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        file_path.write_bytes(b"cached content")
+
+        first = _retrieve_from_cache(file_path)
+        with patch("pathlib.Path.read_bytes", side_effect=AssertionError("read from disk")):
+            second = _retrieve_from_cache(file_path)
+
+        assert second is first
+        assert memory_cache_stats()["payloads"]["hits"] == 1
+
+    def test_saved_payload_held_in_memory(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        with patch("sdmxabs.download_cache.CACHE_COMPRESSION", "gzip"):
+            _save_to_cache(file_path, b"<x/>" * 100)
+
+        with patch("pathlib.Path.read_bytes", side_effect=AssertionError("read from disk")):
+            assert _retrieve_from_cache(file_path) == b"<x/>" * 100
+
+    def test_replaced_file_is_reread(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        file_path.write_bytes(b"old content")
+        assert _retrieve_from_cache(file_path) == b"old content"
+
+        file_path.write_bytes(b"new content")  # as if by another process
+        os.utime(file_path, ns=(0, 1))  # in case the clock is too coarse to tell
+
+        assert _retrieve_from_cache(file_path) == b"new content"
+
+    def test_hit_writes_nothing_to_disk(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        with patch("sdmxabs.download_cache.CACHE_MAX_BYTES", 1_000_000):
+            _save_to_cache(file_path, b"cached content")
+            log = (temp_cache_dir / INDEX_NAME).read_bytes()
+            with patch("pathlib.Path.open", side_effect=AssertionError("disk I/O")):
+                assert _retrieve_from_cache(file_path) == b"cached content"
+
+        assert (temp_cache_dir / INDEX_NAME).read_bytes() == log
+
+    def test_turned_off(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        file_path.write_bytes(b"cached content")
+        set_memory_cache_size(0)
+        try:
+            _retrieve_from_cache(file_path)
+            _retrieve_from_cache(file_path)
+            assert memory_cache_stats()["payloads"]["hits"] == 0
+        finally:
+            set_memory_cache_size(DEFAULT_MEMORY_CACHE_BYTES)
+
+    def test_clear(self, temp_cache_dir):
+        file_path = temp_cache_dir / "test_file"
+        file_path.write_bytes(b"cached content")
+        _retrieve_from_cache(file_path)
+        clear_memory_cache()
+        assert memory_cache_stats()["payloads"]["items"] == 0
+
+
+class TestSingleFlight:
+    """Test in-process coalescing of concurrent requests for the same URL."""
+
+    def test_concurrent_callers_share_one_acquisition(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {})
+        stand_in_server.delay = 0.3
+        url = f"{stand_in_server.url}/data/X"
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url"))
+
+        with patch("sdmxabs.download_cache._get_data", wraps=_get_data) as spy:
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert results == [b"<x/>"] * 8
+        assert spy.call_count == 1
+        assert stand_in_server.request_count == 1
+
+    def test_modalities_are_not_coalesced(self, stand_in_server, temp_cache_dir):
+        url = f"{stand_in_server.url}/data/X"
+        stand_in_server.routes["/data/X"] = (b"<old/>", {})
+        acquire_url(url, cache_dir=temp_cache_dir)
+        stand_in_server.routes["/data/X"] = (b"<new/>", {})
+        started = threading.Event()
+        release = threading.Event()
+        cached = []
+
+        def slow_get_data(url, file_path, **kwargs):
+            content = _get_data(url, file_path, **kwargs)
+            if kwargs.get("modality") == "prefer-cache":
+                started.set()
+                release.wait(1)  # still running when the "prefer-url" call arrives
+            return content
+
+        with patch("sdmxabs.download_cache._get_data", side_effect=slow_get_data):
+            leader = threading.Thread(
+                target=lambda: cached.append(
+                    acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-cache")
+                )
+            )
+            leader.start()
+            started.wait()
+            fresh = acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-url")
+            release.set()
+            leader.join()
+
+        assert fresh == b"<new/>"
+        assert cached == [b"<old/>"]
+
+    def test_exception_is_shared(self):
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait()
+            raise HttpError("boom")
+
+        def follower():
+            try:
+                _single_flight("key", lambda: b"never called")
+            except HttpError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=_call_quietly, args=(failing,))
+        leader.start()
+        started.wait()
+        other = threading.Thread(target=follower)
+        other.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        other.join()
+
+        assert len(errors) == 1
+        assert str(errors[0]) == "boom"
+
+    def test_sequential_calls_are_not_coalesced(self):
+        calls = []
+        for i in range(3):
+            assert _single_flight("key", lambda i=i: calls.append(i) or bytes([i])) == bytes([i])
+        assert calls == [0, 1, 2]
+
+
+def _call_quietly(acquire):
+    """Run a single-flight leader, swallowing its exception."""
+    with contextlib.suppress(HttpError):
+        _single_flight("key", acquire)
+
+
+def _acquire_worker(url, cache_dir, barrier, results):
+    """Acquire a URL in a separate process, once all the processes are ready."""
+    barrier.wait()
+    results.put(acquire_url(url, cache_dir=cache_dir, modality="prefer-url"))
+
+
+def _write_read_worker(cache_dir, worker, rounds, barrier, results):
+    """Repeatedly replace and read back one cached file, checking every read is complete."""
+    barrier.wait()
+    path = cache_dir / "shared"
+    ok = True
+    for i in range(rounds):
+        _save_to_cache(path, bytes([worker]) * (1_000 + 10_000 * (i % 5)))
+        contents = _retrieve_from_cache(path)
+        if len(set(contents)) != 1 or (len(contents) - 1_000) % 10_000:
+            ok = False  # a torn or truncated read
+    results.put(ok)
+
+
+def _run_processes(target, args_list):
+    """Run the target in one process per argument tuple, starting them together."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(len(args_list))
+    results = context.Queue()
+    processes = [context.Process(target=target, args=(*args, barrier, results)) for args in args_list]
+    for process in processes:
+        process.start()
+    gathered = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join()
+    return gathered
+
+
+class TestMultiprocess:
+    """Stress the cache with several processes sharing one cache directory."""
+
+    @pytest.mark.slow
+    def test_one_download_per_url(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>" * 1000, {})
+        stand_in_server.delay = 0.5
+        url = f"{stand_in_server.url}/data/X"
+
+        results = _run_processes(_acquire_worker, [(url, temp_cache_dir)] * 4)
+
+        assert all(r == b"<x/>" * 1000 for r in results)
+        assert stand_in_server.request_count == 1
+
+    @pytest.mark.slow
+    def test_concurrent_writes_are_atomic(self, temp_cache_dir):
+        results = _run_processes(_write_read_worker, [(temp_cache_dir, w, 100) for w in range(4)])
+
+        assert all(results)
+        assert not list(temp_cache_dir.glob("*.tmp"))
+
+
 class TestRetrieveFromCache:
     """Test _retrieve_from_cache function."""
 
@@ -1,22 +1,36 @@
 """Tests for fetch module."""
 
+import json
+import time
 from unittest.mock import patch
 from xml.etree.ElementTree import Element, SubElement
 
 import pandas as pd
 import pytest
+from defusedxml import ElementTree
 
 from sdmxabs.download_cache import CacheError, HttpError
 from sdmxabs.fetch import (
     FREQUENCY_MAPPING,
+    FlatObservations,
     MetadataContext,
+    _assemble_flat,
+    _assemble_per_series,
+    _collect_observations,
     _convert_to_period_index,
-    _decode_meta_value,
+    _decode_tables,
     _extract,
+    _extract_json,
     _extract_observation_data,
-    _get_series_data,
+    _meta_frame,
+    _read_csv,
+    _read_json,
+    _series_from_observations,
     fetch,
 )
+from sdmxabs.flow_metadata import code_lists
+from sdmxabs.xml_base import NAME_SPACES
+from tests.conftest import STAND_IN_FLOW, TEST_DATA_DIR
 
 
 class TestFrequencyMapping:
@@ -90,7 +104,7 @@ class TestExtractObservationData:
     def test_extract_observation_data_success(self):
         """Test successful observation data extraction."""
         from sdmxabs.xml_base import NAME_SPACES
-        
+
         # Create mock XML series element with proper namespace
         series = Element("{%s}Series" % NAME_SPACES["gen"])
 
@@ -135,128 +149,108 @@ class TestExtractObservationData:
         assert result == {}
 
 
-class TestGetSeriesData:
-    """Test _get_series_data function."""
-
-    def test_get_series_data_numeric(self):
-        """Test series data extraction with numeric values."""
-        series = Element("gen:Series")
-
-        obs1 = SubElement(series, "gen:Obs")
-        dim1 = SubElement(obs1, "gen:ObsDimension")
-        dim1.set("value", "2023-Q1")
-        val1 = SubElement(obs1, "gen:ObsValue")
-        val1.set("value", "100.5")
-
-        obs2 = SubElement(series, "gen:Obs")
-        dim2 = SubElement(obs2, "gen:ObsDimension")
-        dim2.set("value", "2023-Q2")
-        val2 = SubElement(obs2, "gen:ObsValue")
-        val2.set("value", "101.2")
+class TestSeriesFromObservations:
+    """Test _series_from_observations function (the per-series path)."""
 
-        meta = pd.Series({"FREQ": "Quarterly", "name": "test_series"})
-        meta.name = "test_series"
+    def test_numeric(self):
+        """Test building a series with numeric values."""
+        observations = {"2023-Q2": "101.2", "2023-Q1": "100.5"}
 
-        result = _get_series_data(series, meta)
+        result = _series_from_observations(observations, "test_series", "Quarterly")
 
         assert isinstance(result, pd.Series)
         assert len(result) == 2
-        assert result.iloc[0] == 100.5
+        assert result.iloc[0] == 100.5  # sorted by period
         assert result.iloc[1] == 101.2
         assert isinstance(result.index, pd.PeriodIndex)
 
-    def test_get_series_data_non_numeric(self):
-        """Test series data extraction with non-numeric values."""
-        series = Element("gen:Series")
-
-        obs = SubElement(series, "gen:Obs")
-        dim = SubElement(obs, "gen:ObsDimension")
-        dim.set("value", "2023-Q1")
-        val = SubElement(obs, "gen:ObsValue")
-        val.set("value", "N/A")
-
-        meta = pd.Series({"FREQ": "Quarterly", "name": "test_series"})
-        meta.name = "test_series"
-
+    def test_non_numeric(self):
+        """Test building a series with non-numeric values."""
         with patch("builtins.print") as mock_print:
-            result = _get_series_data(series, meta)
+            result = _series_from_observations({"2023-Q1": "N/A"}, "test_series", "Quarterly")
 
         assert isinstance(result, pd.Series)
         assert result.iloc[0] == "N/A"
         mock_print.assert_called_once()
 
-    def test_get_series_data_empty_values(self):
-        """Test series data extraction with empty values."""
-        series = Element("gen:Series")
-
-        obs = SubElement(series, "gen:Obs")
-        dim = SubElement(obs, "gen:ObsDimension")
-        dim.set("value", "2023-Q1")
-        val = SubElement(obs, "gen:ObsValue")
-        val.set("value", "")
-
-        meta = pd.Series({"FREQ": "Quarterly", "name": "test_series"})
-        meta.name = "test_series"
-
-        result = _get_series_data(series, meta)
+    def test_empty_values(self):
+        """Test building a series with empty values."""
+        result = _series_from_observations({"2023-Q1": ""}, "test_series", "Quarterly")
 
         assert isinstance(result, pd.Series)
         assert pd.isna(result.iloc[0])
 
 
-class TestDecodeMetaValue:
-    """Test _decode_meta_value function."""
+class TestDecodeTables:
+    """Test _decode_tables function, and decoding whole metadata columns."""
 
     @patch("sdmxabs.fetch.code_lists")
-    def test_decode_meta_value_success(self, mock_code_lists):
-        """Test successful metadata value decoding."""
-        mock_code_lists.return_value = {"Q": {"name": "Quarterly"}, "M": {"name": "Monthly"}}
-
-        dims = {"FREQ": {"id": "CL_FREQ", "package": "codelist"}}
+    def test_tables_for_codelist_items_only(self, mock_code_lists):
+        mock_code_lists.return_value = {"Q": {"name": "Quarterly"}, "X": {"parent": "Q"}}
+        structure = {
+            "FREQ": {"codelist_id": "CL_FREQ", "package": "codelist"},
+            "UNIT_MULT": {"codelist_id": "CL_UNIT_MULT", "package": "codelist"},
+            "OTHER": {"codelist_id": "CL_OTHER", "package": "conceptscheme"},
+        }
 
-        result = _decode_meta_value("Q", "FREQ", dims)
+        tables = _decode_tables(structure, ["FREQ", "UNIT_MULT", "OTHER", "MISSING"])
 
-        assert result == "Quarterly"
+        assert tables == {"FREQ": {"Q": "Quarterly"}}  # UNIT_MULT is excluded from decoding
         mock_code_lists.assert_called_once_with("CL_FREQ")
 
-    def test_decode_meta_value_no_dimension(self):
-        """Test decoding when dimension not found."""
-        dims = {}
-
-        result = _decode_meta_value("Q", "FREQ", dims)
-
-        assert result == "Q"  # Should return original value
-
-    def test_decode_meta_value_no_codelist(self):
-        """Test decoding when not a codelist."""
-        dims = {"FREQ": {"id": "CL_FREQ", "package": "other"}}
-
-        result = _decode_meta_value("Q", "FREQ", dims)
+    def test_unknown_code_kept(self):
+        flat = FlatObservations(
+            labels=["A", "B"],
+            items=[{"FREQ": "Q"}, {"FREQ": "Z"}],
+            tables={"FREQ": {"Q": "Quarterly"}},
+        )
 
-        assert result == "Q"  # Should return original value
+        meta = _meta_frame(flat)
 
-    @patch("sdmxabs.fetch.code_lists")
-    def test_decode_meta_value_code_not_found(self, mock_code_lists):
-        """Test decoding when code not found in codelist."""
-        mock_code_lists.return_value = {"M": {"name": "Monthly"}}
+        assert meta["FREQ"].tolist() == ["Quarterly", "Z"]  # a code missing from the codelist is kept
 
-        dims = {"FREQ": {"id": "CL_FREQ", "package": "codelist"}}
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_each_codelist_looked_up_once(self):
+        regions = ["AUS", "NSW", "VIC"]
+        series = [
+            _generic_series(region, {"2020-Q1": "1"}, measure=measure)
+            for measure in ("M1", "M2")
+            for region in regions
+        ]
+        tree = ElementTree.fromstring(
+            f'<gen:DataSet xmlns:gen="{NAME_SPACES["gen"]}">{"".join(series)}</gen:DataSet>'
+        )
+        _extract(STAND_IN_FLOW, tree)  # warm the metadata caches
 
-        result = _decode_meta_value("Q", "FREQ", dims)
+        with patch("sdmxabs.fetch.code_lists", wraps=code_lists) as spy:
+            _data, meta = _extract(STAND_IN_FLOW, tree)
 
-        assert result == "Q"  # Should return original value
+        assert sorted(call.args[0] for call in spy.call_args_list) == [
+            "CL_FREQ",
+            "CL_MEASURE",
+            "CL_REGION",
+            "CL_UNIT",
+        ]
+        assert meta["REGION"].tolist() == ["Australia", "New South Wales", "Victoria"] * 2
+        assert meta["UNIT_MEASURE"].eq("Index Numbers").all()
 
 
 class TestFetch:
     """Test fetch function."""
 
+    @pytest.fixture(autouse=True)
+    def no_metadata_version(self):
+        """Do not look up the structural metadata, as the parsing is mocked."""
+        with patch("sdmxabs.fetch._metadata_version", return_value=""):
+            yield
+
     @patch("sdmxabs.fetch._extract")
-    @patch("sdmxabs.fetch.acquire_xml")
+    @patch("sdmxabs.fetch.acquire_url")
     @patch("sdmxabs.fetch.build_key")
-    def test_fetch_success(self, mock_build_key, mock_acquire_xml, mock_extract):
+    def test_fetch_success(self, mock_build_key, mock_acquire_url, mock_extract):
         """Test successful fetch operation."""
         mock_build_key.return_value = "Q.AUS"
-        mock_acquire_xml.return_value = Element("root")
+        mock_acquire_url.return_value = b"<root/>"
 
         # Create mock DataFrames
         data_df = pd.DataFrame({"series1": [100, 101, 102]})
@@ -270,12 +264,12 @@ class TestFetch:
         assert len(result_data) == 3
         mock_build_key.assert_called_once_with("CPI", {"FREQ": "Q", "REGION": "AUS"}, validate=False)
 
-    @patch("sdmxabs.fetch.acquire_xml")
+    @patch("sdmxabs.fetch.acquire_url")
     @patch("sdmxabs.fetch.build_key")
-    def test_fetch_no_dimensions(self, mock_build_key, mock_acquire_xml):
+    def test_fetch_no_dimensions(self, mock_build_key, mock_acquire_url):
         """Test fetch with no dimensions."""
         mock_build_key.return_value = "all"
-        mock_acquire_xml.return_value = Element("root")
+        mock_acquire_url.return_value = b"<root/>"
 
         with patch("sdmxabs.fetch._extract") as mock_extract:
             mock_extract.return_value = (pd.DataFrame(), pd.DataFrame())
@@ -293,8 +287,8 @@ class TestFetch:
         """Test fetch with URL parameters."""
         mock_build_key.return_value = "Q.AUS"
 
-        with patch("sdmxabs.fetch.acquire_xml") as mock_acquire_xml:
-            mock_acquire_xml.return_value = Element("root")
+        with patch("sdmxabs.fetch.acquire_url") as mock_acquire_url:
+            mock_acquire_url.return_value = b"<root/>"
             with patch("sdmxabs.fetch._extract") as mock_extract:
                 mock_extract.return_value = (pd.DataFrame(), pd.DataFrame())
 
@@ -303,24 +297,24 @@ class TestFetch:
                 fetch("CPI", {"FREQ": "Q"}, parameters=parameters)
 
         # Check that the URL was built with parameters
-        call_args = mock_acquire_xml.call_args[0]
+        call_args = mock_acquire_url.call_args[0]
         url = call_args[0]
         assert "startPeriod=2020-Q1" in url
         assert "endPeriod=2023-Q4" in url
         assert "detail=full" in url
 
-    @patch("sdmxabs.fetch.acquire_xml")
-    def test_fetch_http_error(self, mock_acquire_xml):
+    @patch("sdmxabs.fetch.acquire_url")
+    def test_fetch_http_error(self, mock_acquire_url):
         """Test fetch handling HTTP errors."""
-        mock_acquire_xml.side_effect = HttpError("HTTP error")
+        mock_acquire_url.side_effect = HttpError("HTTP error")
 
         with pytest.raises(HttpError):
             fetch("CPI", {"FREQ": "Q"})
 
-    @patch("sdmxabs.fetch.acquire_xml")
-    def test_fetch_cache_error(self, mock_acquire_xml):
+    @patch("sdmxabs.fetch.acquire_url")
+    def test_fetch_cache_error(self, mock_acquire_url):
         """Test fetch handling cache errors."""
-        mock_acquire_xml.side_effect = CacheError("Cache error")
+        mock_acquire_url.side_effect = CacheError("Cache error")
 
         with pytest.raises(CacheError):
             fetch("CPI", {"FREQ": "Q"})
@@ -416,3 +410,208 @@ class TestExtract:
         assert len(data_df.columns) == 1
         series_data = data_df.iloc[:, 0]
         assert len(series_data.dropna()) == 2  # Should have both observations
+
+
+class TestFetchStream:
+    """Test fetch(stream=True) against the stand-in ABS."""
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    @pytest.mark.parametrize("selection", [None, {"MEASURE": "M2"}, {"REGION": "VIC"}])
+    def test_same_result_as_tree(self, selection):
+        parameters = {"startPeriod": "2020-Q3"}
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, selection, parameters)
+        data, meta = fetch(STAND_IN_FLOW, selection, parameters, stream=True)
+
+        assert not data.empty
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+
+
+class TestFetchFormats:
+    """Test fetch(format="csv") and fetch(format="json") against the XML path, with the stand-in ABS."""
+
+    @pytest.mark.parametrize(
+        ("data_format", "suffix", "param"), [("csv", "csv", "csvfile"), ("json", "json", "jsondata")]
+    )
+    def test_same_result_as_xml_for_recorded_messages(self, stand_in_abs, data_format, suffix, param):
+        responses = TEST_DATA_DIR / "sample_responses"
+        stand_in_abs.routes[f"/data/{STAND_IN_FLOW}/all"] = ((responses / "test_data.xml").read_bytes(), {})
+        stand_in_abs.routes[f"/data/{STAND_IN_FLOW}/all?format={param}"] = (
+            (responses / f"test_data.{suffix}").read_bytes(),
+            {},
+        )
+
+        expected_data, expected_meta = fetch(STAND_IN_FLOW)
+        data, meta = fetch(STAND_IN_FLOW, format=data_format)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert data.shape == (4, 3)
+        assert list(meta.columns) == ["DATAFLOW", "MEASURE", "REGION", "FREQ", "UNIT_MEASURE", "UNIT_MULT"]
+        assert meta["UNIT_MEASURE"].eq("Index Numbers").all()
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    @pytest.mark.parametrize("data_format", ["csv", "json"])
+    @pytest.mark.parametrize("selection", [None, {"MEASURE": "M2"}, {"REGION": "NSW+VIC"}])
+    def test_same_result_as_xml(self, selection, data_format):
+        parameters = {"startPeriod": "2020-Q3", "endPeriod": "2021-Q2"}
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, selection, parameters)
+        data, meta = fetch(STAND_IN_FLOW, selection, parameters, format=data_format)
+
+        assert not data.empty
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+
+    def test_invalid_format(self):
+        with pytest.raises(ValueError, match="Invalid format 'sdmx'"):
+            fetch(STAND_IN_FLOW, format="sdmx")
+
+    def test_read_csv_without_observations(self):
+        with pytest.raises(ValueError, match="no TIME_PERIOD or OBS_VALUE"):
+            _read_csv("http://test.com", b"DATAFLOW,MEASURE\nABS:TEST(1.0.0),M1\n")
+        assert _read_csv("http://test.com", b"").empty
+
+    def test_read_invalid_json(self):
+        with pytest.raises(ValueError, match="Invalid JSON received"):
+            _read_json("http://test.com", b"{not json")
+        with pytest.raises(ValueError, match="not a JSON object"):
+            _read_json("http://test.com", b"[]")
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_json_series_attribute_not_reported(self):
+        message = json.loads((TEST_DATA_DIR / "sample_responses" / "test_data.json").read_bytes())
+        message["data"]["dataSets"][0]["series"]["0:1:0"]["attributes"] = [None, 0]
+
+        data, meta = _extract_json(STAND_IN_FLOW, message)
+
+        assert list(data.columns) == [
+            f"{STAND_IN_FLOW}.M1.AUS.Q.IDX.0",
+            f"{STAND_IN_FLOW}.M1.NSW.Q.0",
+            f"{STAND_IN_FLOW}.M2.VIC.Q.IDX.0",
+        ]
+        assert meta["UNIT_MEASURE"].isna().tolist() == [False, True, False]
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestCategoricalMeta:
+    """Test fetch(categorical=True), against the stand-in ABS."""
+
+    @pytest.mark.parametrize("data_format", ["xml", "csv", "json"])
+    def test_same_values_as_text(self, data_format):
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, format=data_format)
+        data, meta = fetch(STAND_IN_FLOW, format=data_format, categorical=True)
+
+        assert all(isinstance(dtype, pd.CategoricalDtype) for dtype in meta.dtypes)
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta.astype(expected_meta.dtypes.to_dict()), expected_meta)
+
+    def test_categories_from_codelist(self):
+        _data, meta = fetch(STAND_IN_FLOW, {"REGION": "NSW"}, categorical=True)
+
+        assert meta["REGION"].unique().tolist() == ["New South Wales"]
+        assert list(meta["REGION"].cat.categories) == ["Australia", "New South Wales", "Victoria"]
+        assert list(meta["DATAFLOW"].cat.categories) == meta["DATAFLOW"].unique().tolist()  # not decoded
+
+    def test_separate_fetches_combine(self):
+        _, nsw = fetch(STAND_IN_FLOW, {"REGION": "NSW"}, categorical=True)
+        _, vic = fetch(STAND_IN_FLOW, {"REGION": "VIC"}, categorical=True)
+
+        combined = pd.concat([nsw, vic])
+
+        assert isinstance(combined["REGION"].dtype, pd.CategoricalDtype)
+        assert combined["REGION"].value_counts().to_dict() == {
+            "New South Wales": len(nsw),
+            "Victoria": len(vic),
+            "Australia": 0,
+        }
+
+
+def _generic_series(region, observations, measure="M1", freq="Q"):
+    """Build one gen:Series for the stand-in flow, from a dict of period: value."""
+    obs = "".join(
+        f'<gen:Obs><gen:ObsDimension value="{period}"/><gen:ObsValue value="{value}"/></gen:Obs>'
+        for period, value in observations.items()
+    )
+    return (
+        f'<gen:Series xmlns:gen="{NAME_SPACES["gen"]}"><gen:SeriesKey>'
+        f'<gen:Value id="MEASURE" value="{measure}"/><gen:Value id="REGION" value="{region}"/>'
+        f'<gen:Value id="FREQ" value="{freq}"/></gen:SeriesKey>'
+        f'<gen:Attributes><gen:Value id="UNIT_MEASURE" value="IDX"/></gen:Attributes>{obs}</gen:Series>'
+    )
+
+
+def _flat(*series):
+    """Collect the observations of some gen:Series (as text) for the stand-in flow."""
+    return _collect_observations(STAND_IN_FLOW, [ElementTree.fromstring(text) for text in series])
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestAssembleFlat:
+    """Test the flat (single pivot) assembly of the data against the per-series assembly."""
+
+    @pytest.mark.parametrize(
+        "series",
+        [
+            # complete series of integers (which stay integers)
+            [{"2020-Q2": "1", "2020-Q1": "2"}, {"2020-Q1": "3", "2020-Q2": "4"}],
+            # incomplete series, and periods out of order
+            [{"2021-Q1": "1", "2020-Q3": "2"}, {"2020-Q4": "3"}, {"2020-Q1": "5", "2021-Q1": "6"}],
+            # decimals and missing values
+            [{"2020-Q1": "1.5", "2020-Q2": ""}, {"2020-Q1": "7", "2020-Q2": "8"}],
+        ],
+    )
+    def test_same_as_per_series(self, series):
+        flat = _flat(*(_generic_series(f"R{i}", observations) for i, observations in enumerate(series)))
+
+        data = _assemble_flat(flat)
+
+        assert data is not None
+        pd.testing.assert_frame_equal(data, _assemble_per_series(flat))
+        assert isinstance(data.index, pd.PeriodIndex)
+
+    def test_unknown_frequency_keeps_text_periods(self):
+        flat = _flat(_generic_series("R1", {"b": "1", "a": "2"}, freq="X"))
+
+        data = _assemble_flat(flat)
+
+        assert data is not None
+        pd.testing.assert_frame_equal(data, _assemble_per_series(flat))
+        assert list(data.index) == ["a", "b"]
+
+    @pytest.mark.parametrize(
+        "series",
+        [
+            [("R1", {"2020-Q1": "x"}, "Q")],  # non-numeric
+            [("R1", {"2020-Q1": "1"}, "Q"), ("R1", {"2020-Q2": "2"}, "Q")],  # duplicate labels
+            [("R1", {"2020-Q1": "1"}, "Q"), ("R2", {}, "Q")],  # no observations
+            [("R1", {"2020-Q1": "1"}, "Q"), ("R2", {"2020": "2"}, "A")],  # mixed frequencies
+        ],
+    )
+    def test_general_path_needed(self, series):
+        flat = _flat(
+            *(_generic_series(region, observations, freq=freq) for region, observations, freq in series)
+        )
+
+        assert _assemble_flat(flat) is None
+
+    @pytest.mark.slow
+    def test_faster_than_per_series(self):
+        periods = [f"{year}-Q{quarter}" for year in range(1990, 2025) for quarter in (1, 2, 3, 4)]
+        flat = _flat(
+            *(
+                _generic_series(f"R{i}", {period: f"{i + p}.5" for p, period in enumerate(periods[i % 7 :])})
+                for i in range(2_000)
+            )
+        )
+
+        def timed(assemble):
+            start = time.perf_counter()
+            data = assemble(flat)
+            return time.perf_counter() - start, data
+
+        flat_time, flat_data = timed(_assemble_flat)
+        per_series_time, per_series_data = timed(_assemble_per_series)
+
+        pd.testing.assert_frame_equal(flat_data, per_series_data)
+        print(f"Assembly of {flat_data.shape}: flat {flat_time:.3f}s, per series {per_series_time:.3f}s")
+        assert flat_time * 5 < per_series_time
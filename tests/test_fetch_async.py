@@ -0,0 +1,127 @@
+"""Tests for fetch_async module."""
+
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from sdmxabs.download_cache import CacheError, acquire_url
+from sdmxabs.fetch import fetch
+from sdmxabs.fetch_async import acquire_url_async, acquire_xml_async, fetch_async, fetch_multi_async
+from sdmxabs.fetch_multi import fetch_multi
+from tests.conftest import STAND_IN_FLOW, stand_in_value
+
+
+class TestAcquireUrlAsync:
+    """Test acquire_url_async against a local stand-in server."""
+
+    def test_same_result_and_cache_as_sync(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {})
+        url = f"{stand_in_server.url}/data/X"
+
+        result = asyncio.run(acquire_url_async(url, cache_dir=temp_cache_dir, modality="prefer-url"))
+        cached = acquire_url(url, cache_dir=temp_cache_dir, modality="prefer-cache")
+
+        assert result == cached == b"<x/>"
+        assert stand_in_server.request_count == 1
+
+    def test_requests_run_concurrently(self, stand_in_server, temp_cache_dir):
+        count, delay = 5, 0.2
+        for i in range(count):
+            stand_in_server.routes[f"/data/X{i}"] = (f"<x{i}/>".encode(), {})
+        stand_in_server.delay = delay
+
+        async def acquire_all():
+            return await asyncio.gather(
+                *(
+                    acquire_url_async(f"{stand_in_server.url}/data/X{i}", cache_dir=temp_cache_dir)
+                    for i in range(count)
+                )
+            )
+
+        start = time.perf_counter()
+        results = asyncio.run(acquire_all())
+        elapsed = time.perf_counter() - start
+
+        assert results == [f"<x{i}/>".encode() for i in range(count)]
+        assert elapsed < count * delay / 2
+
+    def test_event_loop_not_blocked(self, stand_in_server, temp_cache_dir):
+        stand_in_server.routes["/data/X"] = (b"<x/>", {})
+        stand_in_server.delay = 0.3
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        async def main():
+            await asyncio.gather(
+                acquire_url_async(f"{stand_in_server.url}/data/X", cache_dir=temp_cache_dir), ticker()
+            )
+
+        asyncio.run(main())
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.25  # the ticker kept running during the download
+
+    def test_errors_propagate(self, stand_in_server, temp_cache_dir):
+        with pytest.raises(CacheError):  # a 404, and nothing in the cache to fall back on
+            asyncio.run(acquire_url_async(f"{stand_in_server.url}/missing", cache_dir=temp_cache_dir))
+
+
+class TestAcquireXmlAsync:
+    """Test acquire_xml_async against the stand-in ABS."""
+
+    def test_parse(self, stand_in_abs):
+        root = asyncio.run(acquire_xml_async(f"{stand_in_abs.url}/codelist/ABS/CL_FREQ"))
+        assert root.tag.endswith("Structure")
+
+
+class TestFetchAsync:
+    """Test fetch_async and fetch_multi_async against the stand-in ABS."""
+
+    selection = {"MEASURE": "M1", "REGION": "AUS+VIC"}  # noqa: RUF012
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_fetch_matches_sync(self):
+        data, meta = asyncio.run(fetch_async(STAND_IN_FLOW, self.selection))
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, self.selection)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert data.loc[pd.Period("2021Q4"), f"{STAND_IN_FLOW}.M1.VIC.Q.IDX"] == stand_in_value(
+            "M1", "VIC", "2021-Q4"
+        )
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    @pytest.mark.parametrize("max_concurrency", [None, 1])
+    def test_fetch_multi_matches_sync(self, max_concurrency):
+        wanted = pd.DataFrame(
+            {
+                "flow_id": [STAND_IN_FLOW, STAND_IN_FLOW, "NOPE", STAND_IN_FLOW],  # NOPE is skipped
+                "MEASURE": ["M2", "M1", "M1", "M1"],
+                "REGION": ["VIC", "AUS", "AUS", "VIC"],
+            }
+        )
+        data, meta = asyncio.run(fetch_multi_async(wanted, max_concurrency=max_concurrency))
+        _, categorical_meta = asyncio.run(fetch_multi_async(wanted, categorical=True))
+        expected_data, expected_meta = fetch_multi(wanted)
+        _, expected_categorical_meta = fetch_multi(wanted, categorical=True)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        pd.testing.assert_frame_equal(categorical_meta, expected_categorical_meta)
+        assert list(data.columns) == [
+            f"{STAND_IN_FLOW}.{key}.Q.IDX" for key in ("M2.VIC", "M1.AUS", "M1.VIC")
+        ]
+
+    def test_fetch_multi_empty(self):
+        data, meta = asyncio.run(fetch_multi_async(pd.DataFrame()))
+        assert data.empty
+        assert meta.empty
+
+    def test_fetch_multi_requires_flow_id(self):
+        with pytest.raises(ValueError, match="flow_id"):
+            asyncio.run(fetch_multi_async(pd.DataFrame({"MEASURE": ["M1"]})))
@@ -0,0 +1,114 @@
+"""Tests for fetch_chunked module, against the stand-in ABS."""
+
+import pandas as pd
+import pytest
+
+from sdmxabs import fetch
+from sdmxabs.download_cache import NO_RECORDS_FOUND, HttpError
+from sdmxabs.fetch_chunked import _time_windows, fetch_chunked
+from tests.conftest import STAND_IN_FLOW
+
+PARAMETERS = {"startPeriod": "2020-Q2", "endPeriod": "2021-Q3"}
+
+
+def _assert_same_series(result, expected):
+    """Check that a chunked result has the series of one fetch (which may be in another order)."""
+    data, meta = result
+    expected_data, expected_meta = expected
+    assert sorted(data.columns) == sorted(expected_data.columns)
+    pd.testing.assert_frame_equal(data[expected_data.columns], expected_data)
+    pd.testing.assert_frame_equal(meta.loc[expected_meta.index], expected_meta)
+
+
+def _data_requests(server):
+    """Get the paths of the data requests made to the stand-in ABS."""
+    return [path for path, _ in server.requests if path.startswith("/data/")]
+
+
+class TestTimeWindows:
+    """Test splitting the periods of a request into windows of whole years."""
+
+    def test_windows(self):
+        parameters = {"startPeriod": "2015-Q3", "endPeriod": "2020-Q2", "detail": "full"}
+        assert _time_windows(parameters, 2) == [
+            {"startPeriod": "2015-Q3", "endPeriod": "2016", "detail": "full"},
+            {"startPeriod": "2017", "endPeriod": "2018", "detail": "full"},
+            {"startPeriod": "2019", "endPeriod": "2020-Q2", "detail": "full"},
+        ]
+
+    def test_open_ended(self):
+        windows = _time_windows({"startPeriod": "2020-01"}, 100)
+        assert windows == [{"startPeriod": "2020-01"}]
+
+    @pytest.mark.parametrize(
+        ("parameters", "years", "match"),
+        [
+            ({}, 1, "needs a startPeriod"),
+            ({"startPeriod": "2020"}, 0, "Invalid years"),
+            ({"startPeriod": "later"}, 1, "Cannot chunk by time"),
+        ],
+    )
+    def test_invalid(self, parameters, years, match):
+        with pytest.raises(ValueError, match=match):
+            _time_windows(parameters, years)
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestFetchChunked:
+    """Test that the chunks are reassembled into the result of one big fetch."""
+
+    @pytest.mark.parametrize("data_format", ["xml", "csv", "json"])
+    @pytest.mark.parametrize(
+        "chunking",
+        [
+            {"dimension": "REGION", "chunk_size": 2},
+            {"years": 1},
+            {"dimension": "MEASURE", "chunk_size": 1, "years": 1, "max_workers": 4},
+        ],
+    )
+    def test_same_as_one_fetch(self, data_format, chunking):
+        _assert_same_series(
+            fetch_chunked(STAND_IN_FLOW, None, PARAMETERS, format=data_format, **chunking),
+            fetch(STAND_IN_FLOW, None, PARAMETERS, format=data_format),
+        )
+
+    def test_series_in_first_seen_order(self):
+        data, meta = fetch_chunked(STAND_IN_FLOW, None, PARAMETERS, dimension="REGION", chunk_size=1)
+
+        keys = [tuple(label.split(".")[1:3]) for label in data.columns]
+        assert keys == [(m, r) for r in ("AUS", "NSW", "VIC") for m in ("M1", "M2")]  # chunk by chunk
+        assert list(meta.index) == list(data.columns)
+
+    def test_selected_codes_chunked(self, stand_in_abs):
+        selection = {"MEASURE": "M2", "REGION": "VIC+AUS+NSW"}
+        data, _meta = fetch_chunked(STAND_IN_FLOW, selection, dimension="REGION", chunk_size=2)
+
+        assert [path.split("/")[3].split("?")[0] for path in _data_requests(stand_in_abs)] == [
+            "M2.VIC+AUS.",
+            "M2.NSW.",
+        ]
+        pd.testing.assert_frame_equal(data, fetch(STAND_IN_FLOW, selection)[0][data.columns])
+
+    def test_widest_dimension_by_default(self, stand_in_abs):
+        fetch_chunked(STAND_IN_FLOW, chunk_size=1)
+        keys = [path.split("/")[3] for path in _data_requests(stand_in_abs)]
+        assert keys == [".AUS.", ".NSW.", ".VIC."]
+
+    def test_empty_chunks_skipped(self):
+        parameters = {"startPeriod": "2018-Q1", "endPeriod": "2020-Q4"}
+        _assert_same_series(
+            fetch_chunked(STAND_IN_FLOW, None, parameters, years=1), fetch(STAND_IN_FLOW, None, parameters)
+        )
+
+    def test_no_records(self):
+        with pytest.raises(HttpError, match="No records found") as error:
+            fetch_chunked(STAND_IN_FLOW, None, {"startPeriod": "2010", "endPeriod": "2012"}, years=1)
+        assert error.value.status == NO_RECORDS_FOUND
+
+    def test_categorical(self):
+        _data, meta = fetch_chunked(STAND_IN_FLOW, dimension="REGION", chunk_size=1, categorical=True)
+        assert list(meta["REGION"].cat.categories) == ["Australia", "New South Wales", "Victoria"]
+
+    def test_unknown_dimension(self):
+        with pytest.raises(ValueError, match="not a key dimension"):
+            fetch_chunked(STAND_IN_FLOW, dimension="SECTOR")
@@ -0,0 +1,151 @@
+"""Tests for fetch_incremental module, against the stand-in ABS."""
+
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pandas as pd
+import pytest
+
+import tests.conftest as stand_in
+from sdmxabs import fetch
+from sdmxabs.download_cache import HttpError
+from sdmxabs.fetch_incremental import _merge, fetch_incremental
+from tests.conftest import STAND_IN_FLOW, _stand_in_data
+
+SELECTION = {"MEASURE": "M1", "REGION": "AUS+NSW"}
+
+
+def _serve_changes(server, changed):
+    """Make the stand-in ABS reply to updatedAfter with the observations for the changed periods only."""
+
+    def fallback(path):
+        parts = urlsplit(path)
+        query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        if query.pop("updatedAfter", None) is None:
+            return _stand_in_data(path)
+        if not changed:
+            return None  # the ABS replies 404 (NoRecordsFound)
+        query |= {"startPeriod": min(changed), "endPeriod": max(changed)}
+        return _stand_in_data(f"{parts.path}?{urlencode(query)}")
+
+    server.fallback = fallback
+
+
+def _query(path):
+    """Get the query parameters of a request path."""
+    return {name: values[-1] for name, values in parse_qs(urlsplit(path).query).items()}
+
+
+@pytest.fixture
+def revise(monkeypatch):
+    """Revise the stand-in data: add periods, and add 1000 to the values for some periods."""
+
+    def apply(new_periods=(), revised_periods=()):
+        value = stand_in.stand_in_value
+        monkeypatch.setattr(stand_in, "STAND_IN_PERIODS", [*stand_in.STAND_IN_PERIODS, *new_periods])
+        monkeypatch.setattr(
+            stand_in,
+            "stand_in_value",
+            lambda m, r, period: value(m, r, period) + (1000 if period in revised_periods else 0),
+        )
+
+    return apply
+
+
+class TestFetchIncremental:
+    """Test fetching only the changes, and merging them into the kept result."""
+
+    def test_first_call_fetches_in_full(self, stand_in_abs, tmp_path):
+        data, meta = fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, SELECTION)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert "updatedAfter" not in _query(stand_in_abs.requests[-2][0])
+        assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+    def test_nothing_changed(self, stand_in_abs, tmp_path):
+        _serve_changes(stand_in_abs, changed=[])
+        expected = fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+        count = stand_in_abs.request_count
+
+        data, meta = fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+
+        assert stand_in_abs.request_count == count + 1
+        assert "updatedAfter" in _query(stand_in_abs.requests[-1][0])
+        pd.testing.assert_frame_equal(data, expected[0])
+        pd.testing.assert_frame_equal(meta, expected[1])
+
+    @pytest.mark.parametrize("data_format", ["xml", "csv", "json"])
+    def test_changes_merged(self, stand_in_abs, tmp_path, revise, data_format):
+        fetch_incremental(STAND_IN_FLOW, SELECTION, format=data_format, directory=tmp_path)
+        revise(new_periods=["2022-Q1"], revised_periods=["2021-Q4"])
+        _serve_changes(stand_in_abs, changed=["2021-Q4", "2022-Q1"])
+
+        data, meta = fetch_incremental(STAND_IN_FLOW, SELECTION, format=data_format, directory=tmp_path)
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, SELECTION, format=data_format)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert data.index[-1] == pd.Period("2022Q1")
+
+    def test_window_strategy(self, stand_in_abs, tmp_path, revise):
+        fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+        revise(new_periods=["2022-Q1"], revised_periods=["2021-Q3"])
+
+        data, _meta = fetch_incremental(
+            STAND_IN_FLOW, SELECTION, strategy="window", overlap=2, directory=tmp_path
+        )
+
+        assert _query(stand_in_abs.requests[-1][0]) == {"startPeriod": "2021-Q3"}
+        pd.testing.assert_frame_equal(data, fetch(STAND_IN_FLOW, SELECTION)[0])
+
+    @pytest.mark.parametrize("strategy", ["updated", "window"])
+    def test_changes_not_cached(self, stand_in_abs, temp_cache_dir, temp_result_cache, revise, strategy):
+        kept = temp_cache_dir / "kept"
+        fetch_incremental(STAND_IN_FLOW, SELECTION, directory=kept)
+        before = sorted(temp_cache_dir.rglob("*")), sorted(temp_result_cache.rglob("*"))
+        revise(new_periods=["2022-Q1"], revised_periods=["2021-Q4"])
+        _serve_changes(stand_in_abs, changed=["2021-Q4", "2022-Q1"])
+
+        for _ in range(2):
+            fetch_incremental(STAND_IN_FLOW, SELECTION, strategy=strategy, directory=kept)
+
+        assert (sorted(temp_cache_dir.rglob("*")), sorted(temp_result_cache.rglob("*"))) == before
+
+    def test_refresh(self, stand_in_abs, tmp_path):
+        fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+        fetch_incremental(STAND_IN_FLOW, SELECTION, refresh=True, directory=tmp_path)
+        assert "updatedAfter" not in _query(stand_in_abs.requests[-1][0])
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_other_errors_raised(self, tmp_path):
+        fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+        with (
+            patch("sdmxabs.fetch.acquire_url", side_effect=HttpError("Problem 500", 500)),
+            pytest.raises(HttpError, match="Problem 500"),
+        ):
+            fetch_incremental(STAND_IN_FLOW, SELECTION, directory=tmp_path)
+
+    def test_invalid_strategy(self, tmp_path):
+        with pytest.raises(ValueError, match="Invalid strategy"):
+            fetch_incremental(STAND_IN_FLOW, strategy="latest", directory=tmp_path)
+
+
+class TestMerge:
+    """Test merging the changes into a kept result."""
+
+    def test_new_series_at_end(self):
+        index = pd.period_range("2020Q1", periods=2, freq="Q")
+        kept = pd.DataFrame({"B": [1, 2], "A": [3, 4]}, index=index)
+        changes = pd.DataFrame({"C": [5], "A": [6]}, index=index[1:])
+        kept_meta = pd.DataFrame({"UNIT": ["x", "y"]}, index=["B", "A"])
+        changes_meta = pd.DataFrame({"UNIT": ["z", "w"]}, index=["C", "A"])
+
+        data, meta = _merge(kept, kept_meta, changes, changes_meta)
+
+        assert list(data.columns) == ["B", "A", "C"]
+        assert data["A"].tolist() == [3, 6]
+        assert data["A"].dtype == "int64"
+        assert data["C"].isna().tolist() == [True, False]
+        assert meta["UNIT"].to_dict() == {"B": "x", "A": "w", "C": "z"}
@@ -0,0 +1,95 @@
+"""Tests for fetch_keys module: series-key discovery and size estimates, against the stand-in ABS."""
+
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pytest
+
+from sdmxabs import fetch
+from sdmxabs.fetch_chunked import fetch_chunked
+from sdmxabs.fetch_keys import PERIODS, _series_periods, estimate_size, fetch_series_keys
+from tests.conftest import STAND_IN_FLOW
+
+PARAMETERS = {"startPeriod": "2020-Q2", "endPeriod": "2021-Q3"}  # six quarters
+
+
+def _data_keys(server):
+    """Get the keys and query parameters of the data requests made to the stand-in ABS."""
+    return [
+        (urlsplit(path).path.split("/")[3], parse_qs(urlsplit(path).query))
+        for path, _ in server.requests
+        if path.startswith("/data/")
+    ]
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestFetchSeriesKeys:
+    """Test discovering the series a query matches."""
+
+    def test_keys(self, stand_in_abs):
+        keys = fetch_series_keys(STAND_IN_FLOW, {"REGION": "NSW+VIC"}, PARAMETERS)
+
+        assert list(keys.columns) == ["MEASURE", "REGION", "FREQ"]
+        assert keys.to_numpy().tolist() == [
+            ["M1", "NSW", "Q"],
+            ["M1", "VIC", "Q"],
+            ["M2", "NSW", "Q"],
+            ["M2", "VIC", "Q"],
+        ]
+        [(key, query)] = _data_keys(stand_in_abs)
+        assert key == ".NSW+VIC."
+        assert query["detail"] == ["serieskeysonly"]
+
+    def test_no_series(self):
+        keys = fetch_series_keys(STAND_IN_FLOW, None, {"startPeriod": "2030-Q1"})
+
+        assert keys.empty
+        assert list(keys.columns) == ["MEASURE", "REGION", "FREQ"]
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestEstimateSize:
+    """Test estimating the size of a query before fetching it."""
+
+    def test_estimate(self):
+        estimate = estimate_size(STAND_IN_FLOW, {"MEASURE": "M1"}, PARAMETERS)
+        data, _meta = fetch(STAND_IN_FLOW, {"MEASURE": "M1"}, PARAMETERS)
+
+        assert (estimate.key, estimate.series) == ("M1..", 3)
+        assert estimate.observations == data.count().sum() == 18
+        assert estimate.keys[PERIODS].tolist() == [6, 6, 6]
+
+    def test_upper_bound_without_start(self):
+        estimate = estimate_size(STAND_IN_FLOW, None, {"endPeriod": "2021"}, first_year=2019)
+        assert estimate.observations == 6 * 12  # 2019 to 2021, for 6 quarterly series
+
+    def test_series_periods(self):
+        keys = pd.DataFrame({"FREQ": ["A", "M", "Q", "X"]})
+        assert _series_periods(keys, 18).tolist() == [2, 18, 6, 18]
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestChunkedWithEstimate:
+    """Test chunking a query to a budget of observations, from its size estimate."""
+
+    def test_within_budget(self, stand_in_abs):
+        data, meta = fetch_chunked(STAND_IN_FLOW, None, PARAMETERS, max_observations=12)
+        expected_data, expected_meta = fetch(STAND_IN_FLOW, None, PARAMETERS)
+
+        pd.testing.assert_frame_equal(data[expected_data.columns], expected_data)
+        pd.testing.assert_frame_equal(meta.loc[expected_meta.index], expected_meta)
+        assert [key for key, query in _data_keys(stand_in_abs) if "detail" not in query][:3] == [
+            ".AUS.",
+            ".NSW.",
+            ".VIC.",
+        ]
+
+    def test_one_request_when_small(self, stand_in_abs):
+        fetch_chunked(STAND_IN_FLOW, {"REGION": "AUS+NSW"}, PARAMETERS, max_observations=1_000)
+        keys = [key for key, query in _data_keys(stand_in_abs) if "detail" not in query]
+        assert len(keys) == 1
+
+    def test_only_codes_with_series(self, stand_in_abs):
+        fetch_chunked(STAND_IN_FLOW, {"REGION": "VIC"}, PARAMETERS, dimension="MEASURE", max_observations=6)
+        keys = [key for key, query in _data_keys(stand_in_abs) if "detail" not in query]
+        assert keys == ["M1.VIC.", "M2.VIC."]
@@ -0,0 +1,85 @@
+"""Tests for fetch_multi module."""
+
+import time
+
+import pandas as pd
+import pytest
+
+from sdmxabs.fetch_multi import _assemble, fetch_multi
+from tests.conftest import STAND_IN_FLOW
+
+
+def _wanted(keys):
+    """Build a wanted DataFrame for the stand-in flow from (MEASURE, REGION) pairs."""
+    return pd.DataFrame(
+        {
+            "flow_id": [STAND_IN_FLOW] * len(keys),
+            "MEASURE": [measure for measure, _ in keys],
+            "REGION": [region for _, region in keys],
+        }
+    )
+
+
+def _row(name, freq):
+    """Build the fetched data and metadata for one row, with one series."""
+    index = pd.period_range("2020-01", periods=2, freq=freq)
+    return pd.DataFrame({name: [1.0, 2.0]}, index=index), pd.DataFrame({"FREQ": [freq]}, index=[name])
+
+
+class TestAssemble:
+    """Test the assembly of the fetched rows."""
+
+    def test_duplicates_renamed(self):
+        data, meta = _assemble([_row("A", "Q"), None, _row("A", "Q"), _row("B", "Q")])
+        assert list(data.columns) == ["A", "A_002", "B"]
+        assert list(meta.index) == ["A", "A_002", "B"]
+
+    def test_index_mismatch(self):
+        with pytest.raises(ValueError, match="Index mismatch"):
+            _assemble([_row("A", "Q"), _row("B", "M")])
+
+
+class TestFetchMultiParallel:
+    """Test fetching the rows of fetch_multi() in parallel, against the stand-in ABS."""
+
+    keys = [("M2", "VIC"), ("M1", "AUS"), ("M1", "AUS"), ("M1", "NSW"), ("M2", "AUS")]  # noqa: RUF012
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_same_result_as_sequential(self):
+        wanted = _wanted(self.keys)
+        expected_data, expected_meta = fetch_multi(wanted, plan=False)
+        data, meta = fetch_multi(wanted, max_workers=4, plan=False)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert list(data.columns) == [
+            f"{STAND_IN_FLOW}.M2.VIC.Q.IDX",
+            f"{STAND_IN_FLOW}.M1.AUS.Q.IDX",
+            f"{STAND_IN_FLOW}.M1.AUS.Q.IDX_003",
+            f"{STAND_IN_FLOW}.M1.NSW.Q.IDX",
+            f"{STAND_IN_FLOW}.M2.AUS.Q.IDX",
+        ]
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    @pytest.mark.parametrize("plan", [True, False])
+    def test_categorical(self, plan):
+        wanted = _wanted(self.keys)
+        expected_data, expected_meta = fetch_multi(wanted, plan=plan)
+        data, meta = fetch_multi(wanted, plan=plan, categorical=True)
+
+        assert all(isinstance(dtype, pd.CategoricalDtype) for dtype in meta.dtypes)
+        assert list(meta["MEASURE"].cat.categories) == ["Level", "Change"]
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta.astype(expected_meta.dtypes.to_dict()), expected_meta)
+
+    def test_rows_fetched_in_parallel(self, stand_in_abs):
+        keys = [("M1", "AUS"), ("M1", "NSW"), ("M1", "VIC"), ("M2", "AUS"), ("M2", "NSW"), ("M2", "VIC")]
+        fetch_multi(_wanted(keys[:1]))  # load the structural metadata
+        stand_in_abs.delay = 0.2
+
+        start = time.perf_counter()
+        data, _meta = fetch_multi(_wanted(keys), max_workers=len(keys), plan=False)
+        elapsed = time.perf_counter() - start
+
+        assert data.shape == (8, len(keys))
+        assert elapsed < len(keys) * stand_in_abs.delay / 2
@@ -0,0 +1,157 @@
+"""Tests for fetch_plan module."""
+
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from sdmxabs import result_cache
+from sdmxabs.download_cache import HttpError
+from sdmxabs.fetch_multi import fetch_multi
+from sdmxabs.fetch_plan import _format_key, _merge, _parse_key, _split, fetch_planned, plan_requests
+from tests.conftest import STAND_IN_FLOW
+
+
+def _merged_keys(keys):
+    """Merge SDMX keys, returning the merged keys and the rows each covers."""
+    size = len(keys[0].split("."))
+    candidates = [(_parse_key(key, size), [row]) for row, key in enumerate(keys)]
+    return sorted((_format_key(parts), rows) for parts, rows in _merge(candidates, size))
+
+
+def _data_requests(server):
+    return [path for path, _ in server.requests if path.startswith(f"/data/{STAND_IN_FLOW}/")]
+
+
+class TestMerge:
+    """Test the merging of SDMX keys."""
+
+    def test_one_dimension(self):
+        assert _merged_keys(["3.10001.Q", "3.999902.Q", "3.999903.Q"]) == [
+            ("3.10001+999902+999903.Q", [0, 1, 2])
+        ]
+
+    def test_grid_merges_in_two_steps(self):
+        assert _merged_keys(["A.X", "A.Y", "B.X", "B.Y"]) == [("A+B.X+Y", [0, 1, 2, 3])]
+
+    def test_diagonal_not_merged(self):
+        assert _merged_keys(["A.X", "B.Y"]) == [("A.X", [0]), ("B.Y", [1])]
+
+    def test_identical_keys(self):
+        assert _merged_keys(["A.X", "A.X"]) == [("A.X", [0, 1])]
+
+    def test_wildcard_absorbs_codes(self):
+        assert _merged_keys(["A.X", "A."]) == [("A.", [0, 1])]
+
+    def test_key_length_limit(self):
+        with patch("sdmxabs.fetch_plan.MAX_KEY_LENGTH", 5):
+            assert _merged_keys(["A.X", "A.Y", "A.Z"]) == [("A.X", [0]), ("A.Y", [1]), ("A.Z", [2])]
+
+    def test_parse_and_format(self):
+        assert _parse_key("all", 3) == (None, None, None)
+        assert _parse_key("A.B+C.", 3) == (frozenset({"A"}), frozenset({"B", "C"}), None)
+        assert _parse_key("A.B", 3) is None
+        assert _format_key((None, None)) == "all"
+
+
+class TestPlanRequests:
+    """Test planning the requests for the rows of a wanted table."""
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_plan(self):
+        rows = [
+            (STAND_IN_FLOW, {"MEASURE": "M1", "REGION": "AUS"}),
+            ("NOPE", {"MEASURE": "M1"}),
+            (STAND_IN_FLOW, {"MEASURE": "M1", "REGION": "VIC"}),
+            (STAND_IN_FLOW, {"MEASURE": "M2", "REGION": "NSW"}),
+        ]
+        planned, unplanned = plan_requests(rows)
+
+        assert unplanned == [1]
+        assert [(request.key, request.rows) for request in planned] == [
+            ("M1.AUS+VIC.", [0, 2]),
+            ("M2.NSW.", [3]),
+        ]
+
+
+class TestFetchMultiPlanned:
+    """Test that planned fetching matches fetching row by row, against the stand-in ABS."""
+
+    wanted = pd.DataFrame(
+        {
+            "flow_id": [STAND_IN_FLOW] * 6,
+            "MEASURE": ["M1", "M1", "M1", "M2", "M1", "M1"],
+            "REGION": ["AUS", "VIC", "NSW", "VIC", "AUS", None],  # a repeat, and a wildcard
+        }
+    )
+
+    def test_same_result_with_fewer_requests(self, stand_in_abs):
+        expected_data, expected_meta = fetch_multi(self.wanted, plan=False)
+        per_row_requests = len(_data_requests(stand_in_abs))
+        stand_in_abs.requests.clear()
+
+        data, meta = fetch_multi(self.wanted, plan=True)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert per_row_requests == len(self.wanted)
+        assert _data_requests(stand_in_abs) == [
+            f"/data/{STAND_IN_FLOW}/M1..",
+            f"/data/{STAND_IN_FLOW}/M2.VIC.",
+        ]
+
+    def test_with_parameters(self, stand_in_abs):
+        parameters = {"startPeriod": "2021-Q1"}
+        expected_data, _ = fetch_multi(self.wanted, parameters, plan=False)
+        stand_in_abs.requests.clear()
+
+        data, _ = fetch_multi(self.wanted, parameters, plan=True, max_workers=2)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        assert len(_data_requests(stand_in_abs)) == 2
+
+    @pytest.mark.parametrize(("data_format", "param"), [("csv", "csvfile"), ("json", "jsondata")])
+    def test_other_format_same_result_as_xml(self, stand_in_abs, data_format, param):
+        expected_data, expected_meta = fetch_multi(self.wanted, plan=False)
+        stand_in_abs.requests.clear()
+
+        data, meta = fetch_multi(self.wanted, plan=True, format=data_format)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+        assert _data_requests(stand_in_abs) == [
+            f"/data/{STAND_IN_FLOW}/M1..?format={param}",
+            f"/data/{STAND_IN_FLOW}/M2.VIC.?format={param}",
+        ]
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    @pytest.mark.parametrize("data_format", ["xml", "csv", "json"])
+    def test_results_kept(self, data_format, monkeypatch):
+        monkeypatch.setattr(result_cache, "_has_pyarrow", lambda: False)
+        with patch("sdmxabs.fetch_plan._split", wraps=_split) as spy:
+            expected_data, expected_meta = fetch_multi(self.wanted, format=data_format)
+            data, meta = fetch_multi(self.wanted, format=data_format)
+
+        assert spy.call_count == 2  # for the first fetch_multi() only
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_frame_equal(meta, expected_meta)
+
+    @pytest.mark.usefixtures("stand_in_abs")
+    def test_no_store_keeps_nothing(self, temp_result_cache):
+        fetch_multi(self.wanted, modality="no-store")
+        assert not temp_result_cache.exists() or not any(temp_result_cache.iterdir())
+
+    def test_failed_merged_request_falls_back_to_rows(self, stand_in_abs):
+        expected_data, _ = fetch_multi(self.wanted, plan=False)
+        stand_in_abs.requests.clear()
+
+        def fail_merged(request, parameters, **kwargs):
+            if len(request.rows) > 1:
+                raise HttpError("merged request failed")
+            return fetch_planned(request, parameters, **kwargs)
+
+        with patch("sdmxabs.fetch_multi.fetch_planned", side_effect=fail_merged):
+            data, _ = fetch_multi(self.wanted, plan=True)
+
+        pd.testing.assert_frame_equal(data, expected_data)
+        assert len(_data_requests(stand_in_abs)) == len(self.wanted)
@@ -6,17 +6,21 @@ from xml.etree.ElementTree import Element, SubElement
 import pandas as pd
 import pytest
 
+from sdmxabs import fetch
 from sdmxabs.flow_metadata import (
     FlowMetaDict,
+    attribute_attachments,
     build_key,
     code_list_for,
     code_lists,
     data_structures,
     data_flows,
     frame,
+    load_structure,
     structure_from_flow_id,
     structure_ident,
 )
+from tests.conftest import STAND_IN_FLOW
 
 
 class TestDataFlows:
@@ -137,6 +141,62 @@ class TestDataStructures:
         assert result["FREQ"]["position"] == "1"
 
 
+@pytest.mark.usefixtures("stand_in_abs")
+class TestAttributeAttachments:
+    """Test attribute_attachments function, against the stand-in ABS."""
+
+    def test_attachment_levels(self):
+        assert attribute_attachments("DS_TEST") == {"UNIT_MEASURE": "series", "OBS_STATUS": "observation"}
+
+    def test_dimensions_are_not_attributes(self):
+        assert "MEASURE" not in attribute_attachments("DS_TEST")
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestLoadStructure:
+    """Test load_structure function, against the stand-in ABS."""
+
+    def test_same_structure_as_data_structures(self):
+        expected = data_structures("DS_TEST")
+        data_structures.cache_clear()
+        assert load_structure("DS_TEST") == expected
+
+    def test_code_lists_kept(self, stand_in_abs):
+        structure = load_structure("DS_TEST")
+        count = stand_in_abs.request_count
+        for item in structure.values():
+            assert code_lists(item["codelist_id"])
+        assert attribute_attachments("DS_TEST")["OBS_STATUS"] == "observation"
+        assert stand_in_abs.request_count == count
+
+    def test_kept_structure_not_requested(self, stand_in_abs):
+        data_structures("DS_TEST")
+        count = stand_in_abs.request_count
+        load_structure("DS_TEST")
+        assert stand_in_abs.request_count == count
+
+    def test_stale_structure_requested_again(self, stand_in_abs):
+        route = "/datastructure/ABS/DS_TEST?references=children"
+        load_structure("DS_TEST")
+        body, headers = stand_in_abs.routes[route]
+        stand_in_abs.routes[route] = (body.replace(b"New South Wales", b"NSW"), headers)
+        count = stand_in_abs.request_count
+
+        with patch("sdmxabs.metadata_store.METADATA_MAX_AGE", 0):
+            load_structure("DS_TEST")
+
+        assert stand_in_abs.request_count == count + 1
+        assert code_lists("CL_REGION")["NSW"]["name"] == "NSW"
+
+    def test_cold_fetch_structure_in_one_request(self, stand_in_abs):
+        fetch(STAND_IN_FLOW, {"MEASURE": "M1"})
+        paths = [path for path, _ in stand_in_abs.requests]
+        assert [path for path in paths if "/codelist/" in path] == []
+        assert [path for path in paths if "/datastructure/" in path] == [
+            "/datastructure/ABS/DS_TEST?references=children"
+        ]
+
+
 class TestCodeLists:
     """Test code_lists function."""
 
@@ -0,0 +1,71 @@
+"""Tests for importing the package: lazily, quickly, and without the network."""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import sdmxabs
+
+HEAVY_MODULES = ("pandas", "numpy", "requests", "defusedxml")
+IMPORT_TIME_LIMIT = 0.05  # seconds for "import sdmxabs" (on its own, it takes a few milliseconds)
+
+
+def _run(script, tmp_path):
+    """Run a script in a new Python process, with an empty cache, and return its output."""
+    command = [sys.executable, "-c", script]
+    env = os.environ | {"SDMXABS_CACHE_DIR": str(tmp_path), "SDMXABS_METADATA_STORE": "off"}
+    return subprocess.run(command, capture_output=True, text=True, check=True, env=env)  # noqa: S603
+
+
+class TestLazyImport:
+    """Test that the public names are imported when first used."""
+
+    def test_no_heavy_imports(self, tmp_path):
+        script = f"import sys, sdmxabs; print([name for name in {HEAVY_MODULES!r} if name in sys.modules])"
+        assert _run(script, tmp_path).stdout.strip() == "[]"
+
+    def test_no_network_at_import(self, tmp_path):
+        script = """
+import socket
+def refuse(*args, **kwargs):
+    raise OSError("no network at import")
+socket.socket.connect = socket.create_connection = refuse
+import sdmxabs
+for name in sdmxabs.__all__:
+    getattr(sdmxabs, name)
+import sdmxabs.fetch_pop
+print("ok")
+"""
+        assert _run(script, tmp_path).stdout.strip() == "ok"
+
+    def test_public_names(self):
+        for name in sdmxabs.__all__:
+            assert getattr(sdmxabs, name) is not None
+        assert set(sdmxabs.__all__) <= set(dir(sdmxabs))
+        with pytest.raises(AttributeError, match="no attribute 'nope'"):
+            _ = sdmxabs.nope
+
+    def test_functions_not_hidden_by_submodules(self):
+        from sdmxabs.fetch import fetch  # binds the submodule sdmxabs.fetch
+
+        assert sdmxabs.fetch is fetch
+        assert callable(sdmxabs.fetch_multi)
+        assert callable(sdmxabs.fetch_async)
+
+
+@pytest.mark.slow
+def test_import_time(tmp_path):
+    """Fail if importing the package gets slow again (best of three, from python -X importtime)."""
+    times = []
+    for _ in range(3):
+        command = [sys.executable, "-X", "importtime", "-c", "import sdmxabs"]
+        env = os.environ | {"SDMXABS_CACHE_DIR": str(tmp_path)}
+        stderr = subprocess.run(command, capture_output=True, text=True, check=True, env=env).stderr  # noqa: S603
+        match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| sdmxabs$", stderr, re.MULTILINE)
+        assert match is not None
+        times.append(int(match.group(1)) / 1_000_000)  # microseconds to seconds
+    print(f"import sdmxabs: {min(times):.4f}s")
+    assert min(times) < IMPORT_TIME_LIMIT
@@ -0,0 +1,78 @@
+"""Tests for memory_cache module."""
+
+import threading
+
+from sdmxabs.memory_cache import MemoryCache
+
+
+class TestMemoryCache:
+    """Test the byte-bounded least-recently-used cache."""
+
+    def test_hit_and_miss(self):
+        cache = MemoryCache(100)
+        assert cache.get("a") is None
+        cache.put("a", b"alpha", 5)
+        assert cache.get("a") == b"alpha"
+        assert cache.stats() == {"hits": 1, "misses": 1, "items": 1, "bytes": 5, "max_bytes": 100}
+
+    def test_least_recently_used_evicted(self):
+        cache = MemoryCache(30)
+        for key in "abc":
+            cache.put(key, key, 10)
+        cache.get("a")  # "b" is now the least recently used
+        cache.put("d", "d", 10)
+        assert cache.get("b") is None
+        assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+
+    def test_replace_item(self):
+        cache = MemoryCache(30)
+        cache.put("a", "old", 20)
+        cache.put("a", "new", 5)
+        assert cache.get("a") == "new"
+        assert cache.stats()["bytes"] == 5
+
+    def test_oversized_item_not_stored(self):
+        cache = MemoryCache(10)
+        cache.put("a", "a", 5)
+        cache.put("big", "big", 11)
+        assert cache.get("big") is None
+        assert cache.get("a") == "a"
+
+    def test_zero_budget_turns_cache_off(self):
+        cache = MemoryCache(0)
+        cache.put("a", "a", 1)
+        assert cache.get("a") is None
+        assert cache.stats()["items"] == 0
+
+    def test_shrink_budget(self):
+        cache = MemoryCache(30)
+        for key in "abc":
+            cache.put(key, key, 10)
+        cache.max_bytes = 10
+        assert cache.stats()["items"] == 1
+        assert cache.get("c") == "c"
+
+    def test_clear(self):
+        cache = MemoryCache(30)
+        cache.put("a", "a", 10)
+        cache.get("a")
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "items": 0, "bytes": 0, "max_bytes": 30}
+
+    def test_thread_safety(self):
+        cache = MemoryCache(1_000)
+
+        def worker(offset):
+            for i in range(1_000):
+                cache.put((offset, i % 50), i, 7)
+                cache.get((offset, (i * 7) % 50))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats["bytes"] == 7 * stats["items"] <= 1_000
+        assert stats["hits"] + stats["misses"] == 8_000
@@ -0,0 +1,140 @@
+"""Tests for metadata_bundle module (and prefetch_metadata)."""
+
+import shutil
+import time
+
+import pytest
+
+from sdmxabs import fetch
+from sdmxabs.download_cache import clear_memory_cache
+from sdmxabs.flow_metadata import (
+    code_list_for,
+    code_lists,
+    data_flows,
+    prefetch_metadata,
+    structure_from_flow_id,
+)
+from sdmxabs.metadata_bundle import MetadataBundle, bundled, use_metadata_bundle, write_bundle
+from sdmxabs.metadata_store import clear_metadata_store
+from tests.conftest import STAND_IN_DIMENSIONS, STAND_IN_FLOW, _clear_metadata_caches
+
+
+@pytest.fixture(autouse=True)
+def no_bundle():
+    """Start (and end) each test without a bundle in use."""
+    use_metadata_bundle(None)
+    yield
+    use_metadata_bundle(None)
+
+
+def _forget_everything(cache_dir):
+    """Empty the in-memory caches, the metadata store and the download cache (a cold start)."""
+    _clear_metadata_caches()
+    clear_metadata_store()
+    clear_memory_cache()
+    shutil.rmtree(cache_dir)
+    cache_dir.mkdir()
+
+
+class TestMetadataBundle:
+    """Test writing and reading a bundle."""
+
+    def test_round_trip(self, tmp_path):
+        entries = {
+            "code_lists": {"CL_A": {"A": {"name": "Alpha"}}, "CL_B": {"B": {"name": "Beta", "parent": "A"}}},
+            "data_flows": {"all": {"F": {"flow_name": "Flow", "data_structure_id": "DS"}}},
+        }
+        write_bundle(tmp_path / "bundle", entries)
+
+        bundle = MetadataBundle(tmp_path / "bundle")
+        assert bundle.keys("code_lists") == ["CL_A", "CL_B"]
+        assert bundle.get("code_lists", "CL_B") == entries["code_lists"]["CL_B"]
+        assert bundle.get("data_flows", "all") == entries["data_flows"]["all"]
+        assert bundle.get("code_lists", "CL_MISSING") is None
+        assert bundle.get("data_structures", "DS") is None
+        bundle.close()
+
+    def test_not_a_bundle(self, tmp_path):
+        (tmp_path / "other").write_bytes(b"<xml/>")
+        with pytest.raises(ValueError, match="Not a metadata bundle"):
+            MetadataBundle(tmp_path / "other")
+
+    def test_bundle_in_use(self, tmp_path):
+        assert bundled("code_lists", "CL_A") is None
+        write_bundle(tmp_path / "bundle", {"code_lists": {"CL_A": {"A": {"name": "Alpha"}}}})
+        use_metadata_bundle(tmp_path / "bundle")
+        assert bundled("code_lists", "CL_A") == {"A": {"name": "Alpha"}}
+        use_metadata_bundle(None)
+        assert bundled("code_lists", "CL_A") is None
+
+    def test_code_lists_from_bundle(self, tmp_path):
+        write_bundle(tmp_path / "bundle", {"code_lists": {"CL_A": {"A": {"name": "Alpha"}}}})
+        use_metadata_bundle(tmp_path / "bundle")
+        assert code_lists("CL_A") == {"A": {"name": "Alpha"}}  # no acquire_xml mock: no network
+
+
+class TestPrefetchMetadata:
+    """Test prefetch_metadata, against the stand-in ABS."""
+
+    def test_counts(self, stand_in_abs, tmp_path):
+        counts = prefetch_metadata(tmp_path / "bundle")
+        assert counts == {"code_lists": 5, "data_flows": 1, "data_structures": 1, "attribute_attachments": 1}
+        assert [path for path, _ in stand_in_abs.requests] == [
+            "/codelist/ABS/all",
+            "/dataflow/ABS/all",
+            "/datastructure/ABS/all",
+        ]
+
+    def test_code_lists_only(self, stand_in_abs, tmp_path):
+        assert prefetch_metadata(tmp_path / "bundle", structures=False) == {"code_lists": 5}
+        assert stand_in_abs.request_count == 1
+
+    def test_same_as_network(self, stand_in_abs, tmp_path, temp_cache_dir):
+        expected = (code_lists("CL_REGION"), structure_from_flow_id(STAND_IN_FLOW), data_flows(STAND_IN_FLOW))
+        prefetch_metadata(tmp_path / "bundle")
+        _forget_everything(temp_cache_dir)
+        use_metadata_bundle(tmp_path / "bundle")
+        count = stand_in_abs.request_count
+
+        assert code_lists("CL_REGION") == expected[0]
+        assert code_list_for("DS_TEST", "REGION") == expected[0]
+        assert structure_from_flow_id(STAND_IN_FLOW) == expected[1]
+        assert data_flows(STAND_IN_FLOW) == expected[2]
+        assert stand_in_abs.request_count == count
+
+    def test_fetch_with_bundle(self, stand_in_abs, tmp_path, temp_cache_dir):
+        expected = fetch(STAND_IN_FLOW, {"MEASURE": "M1"})
+        prefetch_metadata(tmp_path / "bundle")
+        _forget_everything(temp_cache_dir)
+        use_metadata_bundle(tmp_path / "bundle")
+        stand_in_abs.requests.clear()
+
+        data, meta = fetch(STAND_IN_FLOW, {"MEASURE": "M1"})
+
+        assert [path.split("?")[0] for path, _ in stand_in_abs.requests] == [f"/data/{STAND_IN_FLOW}/M1.."]
+        assert data.equals(expected[0])
+        assert meta.equals(expected[1])
+
+    @pytest.mark.slow
+    def test_cold_fetch_faster_with_bundle(self, stand_in_abs, tmp_path, temp_cache_dir):
+        stand_in_abs.delay = 0.05  # seconds per request, like a distant server
+        prefetch_metadata(tmp_path / "bundle")
+        selection = {"MEASURE": "M1", "REGION": "+".join(STAND_IN_DIMENSIONS["REGION"][1])}
+
+        def cold_fetch():
+            _forget_everything(temp_cache_dir)
+            count = stand_in_abs.request_count
+            start = time.perf_counter()
+            fetch(STAND_IN_FLOW, selection, validate=True)
+            return time.perf_counter() - start, stand_in_abs.request_count - count
+
+        without_time, without_requests = cold_fetch()
+        use_metadata_bundle(tmp_path / "bundle")
+        with_time, with_requests = cold_fetch()
+
+        print(
+            f"Cold fetch: without a bundle {without_time:.3f}s ({without_requests} requests), "
+            f"with a bundle {with_time:.3f}s ({with_requests} requests)"
+        )
+        assert with_requests == 1
+        assert with_time < without_time
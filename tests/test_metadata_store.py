@@ -0,0 +1,178 @@
+"""Tests for metadata_store module."""
+
+import sqlite3
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from defusedxml import ElementTree
+
+from sdmxabs import metadata_store
+from sdmxabs.download_cache import HttpError
+from sdmxabs.flow_metadata import code_list_for, code_lists
+from sdmxabs.metadata_store import STORE_VERSION, clear_metadata_store, stored
+
+CODELIST_XML = """<mes:Structure
+    xmlns:mes="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/message"
+    xmlns:str="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/structure"
+    xmlns:com="http://www.sdmx.org/resources/sdmxml/schemas/v2_1/common">
+  <mes:Structures><str:Codelists><str:Codelist id="CL_TEST">
+    <str:Code id="A"><com:Name>Alpha</com:Name></str:Code>
+    <str:Code id="B"><com:Name>Beta</com:Name></str:Code>
+  </str:Codelist></str:Codelists></mes:Structures>
+</mes:Structure>"""
+EXPECTED = {"A": {"name": "Alpha"}, "B": {"name": "Beta"}}
+
+
+@pytest.fixture
+def mock_acquire_xml():
+    """Serve the test code list in place of the ABS."""
+    with patch("sdmxabs.flow_metadata.acquire_xml") as mock:
+        mock.return_value = ElementTree.fromstring(CODELIST_XML)
+        yield mock
+
+
+class TestStoredMetadata:
+    """Test that parsed metadata is kept in memory and in the persistent store."""
+
+    def test_memo_hit(self, mock_acquire_xml):
+        assert code_lists("CL_TEST") == EXPECTED
+        assert code_lists("CL_TEST") == EXPECTED
+        assert mock_acquire_xml.call_count == 1
+
+    def test_key_ignores_acquisition_kwargs(self, mock_acquire_xml):
+        code_lists("CL_TEST")
+        assert code_lists("CL_TEST", verbose=True, modality="prefer-url") == EXPECTED
+        assert code_lists(cl_id="CL_TEST") == EXPECTED
+        assert mock_acquire_xml.call_count == 1
+
+    def test_different_arguments_different_entries(self, mock_acquire_xml):
+        code_lists("CL_TEST")
+        code_lists("CL_OTHER")
+        assert mock_acquire_xml.call_count == 2
+
+    def test_persists_across_processes(self, mock_acquire_xml):
+        code_lists("CL_TEST")
+        code_lists.cache_clear()  # as if in a new process
+        assert code_lists("CL_TEST") == EXPECTED
+        assert mock_acquire_xml.call_count == 1
+
+    def test_clear_metadata_store(self, mock_acquire_xml):
+        code_lists("CL_TEST")
+        code_lists.cache_clear()
+        clear_metadata_store()
+        code_lists("CL_TEST")
+        assert mock_acquire_xml.call_count == 2
+
+    def test_stale_entry_refreshed(self, stand_in_abs, monkeypatch):
+        route = "/codelist/ABS/CL_REGION"
+        assert code_lists("CL_REGION")["NSW"]["name"] == "New South Wales"
+        body, headers = stand_in_abs.routes[route]
+        stand_in_abs.routes[route] = (body.replace(b"New South Wales", b"NSW"), headers)
+        count = stand_in_abs.request_count
+
+        monkeypatch.setattr(metadata_store, "METADATA_MAX_AGE", 0)
+        assert code_lists("CL_REGION")["NSW"]["name"] == "NSW"  # not parsed again from the cached XML
+        assert stand_in_abs.request_count == count + 1
+        assert stand_in_abs.requests[-1][0] == route
+
+    def test_stale_entry_revalidated(self, stand_in_abs, monkeypatch):
+        route = "/codelist/ABS/CL_REGION"
+        body, _headers = stand_in_abs.routes[route]
+        stand_in_abs.routes[route] = (body, {"ETag": '"v1"'})
+        code_lists("CL_REGION")
+
+        monkeypatch.setattr(metadata_store, "METADATA_MAX_AGE", 0)
+        assert code_lists("CL_REGION")["NSW"]["name"] == "New South Wales"
+        assert stand_in_abs.requests[-1][1]["If-None-Match"] == '"v1"'  # a 304 serves the cached XML
+
+    def test_stale_entry_used_when_refresh_fails(self, mock_acquire_xml, monkeypatch):
+        code_lists("CL_TEST")
+        code_lists.cache_clear()
+        monkeypatch.setattr(metadata_store, "METADATA_MAX_AGE", 0)
+        mock_acquire_xml.side_effect = HttpError("offline")
+        assert code_lists("CL_TEST") == EXPECTED
+
+    def test_errors_not_stored(self, mock_acquire_xml):
+        mock_acquire_xml.side_effect = HttpError("offline")
+        with pytest.raises(HttpError):
+            code_lists("CL_TEST")
+        mock_acquire_xml.side_effect = None
+        assert code_lists("CL_TEST") == EXPECTED
+
+    def test_other_version_emptied(self, mock_acquire_xml):
+        code_lists("CL_TEST")
+        code_lists.cache_clear()
+        path = metadata_store.STORE_PATH
+        assert path is not None
+        with sqlite3.connect(path) as connection:
+            connection.execute(f"PRAGMA user_version = {STORE_VERSION + 1}")
+        code_lists("CL_TEST")
+        assert mock_acquire_xml.call_count == 2
+
+    def test_store_off(self, mock_acquire_xml, monkeypatch):
+        monkeypatch.setattr(metadata_store, "STORE_PATH", None)
+        code_lists("CL_TEST")
+        code_lists.cache_clear()
+        code_lists("CL_TEST")
+        assert mock_acquire_xml.call_count == 2
+        clear_metadata_store()  # nothing to clear
+
+    @pytest.mark.usefixtures("mock_acquire_xml")
+    def test_not_persisted(self):
+        with patch("sdmxabs.flow_metadata.data_structures") as mock_structures:
+            mock_structures.return_value = {"DIM": {"codelist_id": "CL_TEST"}}
+            assert code_list_for("DSD", "DIM") == EXPECTED
+            code_list_for("DSD", "DIM", verbose=True)
+            assert mock_structures.call_count == 1
+        path = metadata_store.STORE_PATH
+        assert path is not None
+        with sqlite3.connect(path) as connection:
+            kinds = {row[0] for row in connection.execute("SELECT kind FROM entries")}
+        assert kinds == {"code_lists"}
+
+    def test_prime_and_cached(self, mock_acquire_xml):
+        assert code_lists.cached("CL_TEST") is None
+        code_lists.prime(EXPECTED, "CL_TEST")
+        assert code_lists.cached("CL_TEST") == EXPECTED
+        code_lists.cache_clear()
+        assert code_lists("CL_TEST", verbose=True) == EXPECTED
+        mock_acquire_xml.assert_not_called()
+
+    def test_decorated_function_keeps_its_name(self):
+        assert code_lists.__name__ == "code_lists"
+        assert code_lists.__doc__ is not None
+
+    def test_defaults_share_key(self):
+        calls = []
+
+        @stored(persist=False)
+        def value(flow_id: str = "all", **kwargs: object) -> str:
+            calls.append((flow_id, kwargs))
+            return flow_id
+
+        assert value() == value("all") == value(flow_id="all", verbose=True) == "all"
+        assert len(calls) == 1
+
+
+@pytest.mark.slow
+def test_store_shared_between_processes(tmp_path):
+    """A second process reads the metadata stored by the first, without parsing XML."""
+    script = f"""
+from unittest.mock import patch
+from defusedxml import ElementTree
+from sdmxabs import metadata_store
+from sdmxabs.flow_metadata import code_lists
+metadata_store.STORE_PATH = metadata_store.Path({str(tmp_path / "store.sqlite3")!r})
+with patch("sdmxabs.flow_metadata.acquire_xml") as mock:
+    mock.return_value = ElementTree.fromstring({CODELIST_XML!r})
+    result = code_lists("CL_TEST")
+    print(mock.call_count, result == {EXPECTED!r})
+"""
+    command = [sys.executable, "-c", script]
+    outputs = [
+        subprocess.run(command, capture_output=True, text=True, check=True).stdout.split()  # noqa: S603
+        for _ in range(2)
+    ]
+    assert outputs == [["1", "True"], ["0", "True"]]
@@ -0,0 +1,189 @@
+"""Tests for result_cache module: the (data, meta) results kept for each data message."""
+
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+import tests.conftest as stand_in
+from sdmxabs import fetch, result_cache
+from sdmxabs.fetch import _metadata_version, _parse
+from sdmxabs.flow_metadata import code_lists, data_flows, data_structures, structure_ident
+from sdmxabs.result_cache import clear_result_cache, load_result, payload_digest, save_result
+from tests.conftest import STAND_IN_FLOW
+
+SELECTION = {"MEASURE": "M1", "REGION": "AUS+NSW"}
+
+
+def _fetch_counting_parses(data_format="xml", **kwargs):
+    """Fetch the stand-in data, and count the data messages parsed to get it."""
+    with patch("sdmxabs.fetch._parse", wraps=_parse) as spy:
+        data, meta = fetch(STAND_IN_FLOW, SELECTION, format=data_format, **kwargs)
+    return data, meta, spy.call_count
+
+
+@pytest.fixture
+def pickled(monkeypatch):
+    """Keep the results with pickle, as when pyarrow is not installed."""
+    monkeypatch.setattr(result_cache, "_has_pyarrow", lambda: False)
+
+
+@pytest.mark.usefixtures("stand_in_abs")
+class TestFetchWithResultCache:
+    """Test that fetch() parses each data message once."""
+
+    @pytest.mark.usefixtures("pickled")
+    @pytest.mark.parametrize("data_format", ["xml", "csv", "json"])
+    def test_parsed_once(self, temp_result_cache, data_format):
+        data, meta, parses = _fetch_counting_parses(data_format)
+        again, again_meta, parses_again = _fetch_counting_parses(data_format)
+
+        assert (parses, parses_again) == (1, 0)
+        pd.testing.assert_frame_equal(again, data)
+        pd.testing.assert_frame_equal(again_meta, meta)
+        assert len(list(temp_result_cache.glob("*.pkl"))) == 1
+
+    @pytest.mark.usefixtures("pickled")
+    def test_stream_shares_result(self):
+        data, _meta, _parses = _fetch_counting_parses()
+        streamed, _meta, parses = _fetch_counting_parses(stream=True)
+
+        assert parses == 0
+        pd.testing.assert_frame_equal(streamed, data)
+
+    @pytest.mark.usefixtures("pickled")
+    def test_changed_message_parsed_again(self, temp_result_cache, monkeypatch):
+        _fetch_counting_parses()
+        value = stand_in.stand_in_value
+        monkeypatch.setattr(stand_in, "stand_in_value", lambda m, r, period: value(m, r, period) + 1000)
+
+        data, _meta, parses = _fetch_counting_parses()
+
+        assert parses == 1
+        assert data.min().min() > 1000
+        assert len(list(temp_result_cache.glob("*.pkl"))) == 1  # the older result was removed
+
+    def test_refreshed_metadata_parsed_again(self):
+        _fetch_counting_parses()
+        renamed = code_lists("CL_REGION") | {"AUS": {"name": "Commonwealth of Australia"}}
+        code_lists.prime(renamed, "CL_REGION")  # as when the code list is refreshed
+
+        _data, meta, parses = _fetch_counting_parses()
+
+        assert parses == 1
+        assert "Commonwealth of Australia" in meta["REGION"].tolist()
+
+    def test_metadata_version_fetches_nothing(self, stand_in_abs):
+        data_flows()
+        data_structures(structure_ident(STAND_IN_FLOW))  # kept without its code lists
+        count = stand_in_abs.request_count
+
+        _metadata_version(STAND_IN_FLOW)
+
+        assert stand_in_abs.request_count == count
+
+    @pytest.mark.usefixtures("pickled")
+    def test_cold_fetch_parsed_once(self):
+        data_structures(structure_ident(STAND_IN_FLOW))  # the code lists are kept while decoding
+        _fetch_counting_parses()
+        _data, _meta, parses = _fetch_counting_parses()
+        assert parses == 0
+
+    def test_categorical_after_cache(self):
+        _fetch_counting_parses()
+        _data, meta, parses = _fetch_counting_parses(categorical=True)
+
+        assert parses == 0
+        assert all(isinstance(dtype, pd.CategoricalDtype) for dtype in meta.dtypes)
+
+    def test_parquet(self, temp_result_cache):
+        pytest.importorskip("pyarrow")
+        data, meta, _parses = _fetch_counting_parses()
+        again, again_meta, parses = _fetch_counting_parses()
+
+        assert parses == 0
+        pd.testing.assert_frame_equal(again, data)
+        pd.testing.assert_frame_equal(again_meta, meta)
+        assert len(list(temp_result_cache.glob("*.parquet"))) == 2
+
+    def test_off(self, temp_result_cache, monkeypatch):
+        monkeypatch.setattr(result_cache, "RESULT_PATH", None)
+        _fetch_counting_parses()
+        _data, _meta, parses = _fetch_counting_parses()
+
+        assert parses == 1
+        assert not temp_result_cache.exists()
+
+
+class TestResultCache:
+    """Test keeping and loading the results."""
+
+    URL = "https://example.com/data/TEST/all"
+    DATA = pd.DataFrame({"A": [1.5, 2.5]}, index=pd.period_range("2020Q1", periods=2, freq="Q"))
+    META = pd.DataFrame({"UNIT": ["Index"]}, index=["A"])
+
+    def test_digest_in_key(self):
+        save_result(self.URL, payload_digest(b"one"), self.DATA, self.META)
+
+        assert load_result(self.URL, payload_digest(b"two")) is None
+        assert load_result(self.URL + "?detail=full", payload_digest(b"one")) is None
+        data, meta = load_result(self.URL, payload_digest(b"one"))
+        pd.testing.assert_frame_equal(data, self.DATA)
+        pd.testing.assert_frame_equal(meta, self.META)
+
+    def test_metadata_version_in_key(self):
+        save_result(self.URL, payload_digest(b"one", "v1"), self.DATA, self.META)
+
+        assert load_result(self.URL, payload_digest(b"one", "v2")) is None
+        assert load_result(self.URL, payload_digest(b"one", "v1")) is not None
+
+    @pytest.mark.usefixtures("pickled")
+    def test_byte_budget(self, temp_result_cache, monkeypatch):
+        save_result(self.URL + "/a", payload_digest(b"one"), self.DATA, self.META)
+        size = sum(path.stat().st_size for path in temp_result_cache.glob("*.pkl"))
+        monkeypatch.setattr(result_cache, "RESULT_MAX_BYTES", 2 * size)
+        save_result(self.URL + "/b", payload_digest(b"one"), self.DATA, self.META)
+        for path in temp_result_cache.glob("*.pkl"):
+            os.utime(path, (0, 0))
+        load_result(self.URL + "/a", payload_digest(b"one"))  # "a" is now the most recently used
+
+        save_result(self.URL + "/c", payload_digest(b"one"), self.DATA, self.META)
+
+        assert load_result(self.URL + "/b", payload_digest(b"one")) is None
+        assert load_result(self.URL + "/a", payload_digest(b"one")) is not None
+        assert load_result(self.URL + "/c", payload_digest(b"one")) is not None
+        assert len(list(temp_result_cache.glob("*.lock"))) == 2  # the lock file went with "b"
+
+    def test_pickled_without_pyarrow(self, temp_result_cache, monkeypatch):
+        monkeypatch.setattr(result_cache, "_has_pyarrow", lambda: False)
+        monkeypatch.setattr(result_cache, "RESULT_FORMAT", "parquet")
+        save_result(self.URL, payload_digest(b"one"), self.DATA, self.META)
+
+        assert [path.suffix for path in temp_result_cache.glob("result-*--*--*")] == [".pkl"]
+        data, _meta = load_result(self.URL, payload_digest(b"one"))
+        pd.testing.assert_frame_equal(data, self.DATA)
+
+    @pytest.mark.usefixtures("pickled")
+    def test_damaged_result_ignored(self, temp_result_cache):
+        digest = payload_digest(b"one")
+        save_result(self.URL, digest, self.DATA, self.META)
+        for path in temp_result_cache.glob("*.pkl"):
+            path.write_bytes(b"damaged")
+
+        assert load_result(self.URL, digest) is None
+
+    def test_parquet_failure_pickled(self, temp_result_cache, monkeypatch):
+        monkeypatch.setattr(result_cache, "_has_pyarrow", lambda: True)
+        with patch.object(pd.DataFrame, "to_parquet", side_effect=ImportError("no pyarrow")):
+            save_result(self.URL, payload_digest(b"one"), self.DATA, self.META)
+
+        assert {path.suffix for path in temp_result_cache.iterdir()} == {".pkl", ".lock"}
+        assert load_result(self.URL, payload_digest(b"one")) is not None
+
+    def test_clear(self, temp_result_cache):
+        save_result(self.URL, payload_digest(b"one"), self.DATA, self.META)
+        clear_result_cache()
+
+        assert load_result(self.URL, payload_digest(b"one")) is None
+        assert not [path for path in temp_result_cache.iterdir() if path.suffix != ".lock"]
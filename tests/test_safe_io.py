@@ -0,0 +1,122 @@
+"""Tests for safe_io module."""
+
+import threading
+import time
+
+from sdmxabs.safe_io import LOCK_SUFFIX, file_lock, file_stamp, remove_locked, write_atomic
+
+
+class TestWriteAtomic:
+    """Test atomic file writes."""
+
+    def test_write_new_file(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        write_atomic(path, b"contents")
+        assert path.read_bytes() == b"contents"
+
+    def test_replace_existing_file(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        path.write_bytes(b"old contents")
+        write_atomic(path, b"new")
+        assert path.read_bytes() == b"new"
+
+    def test_no_temporary_files_left(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        write_atomic(path, b"contents")
+        assert [f.name for f in temp_cache_dir.iterdir()] == ["file"]
+
+
+class TestFileLock:
+    """Test the advisory file lock."""
+
+    def test_lock_file_created(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        with file_lock(path):
+            assert (temp_cache_dir / f"file{LOCK_SUFFIX}").exists()
+
+    def test_lock_is_exclusive(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        events = []
+
+        def worker(name):
+            with file_lock(path):
+                events.append(f"{name} in")
+                time.sleep(0.05)
+                events.append(f"{name} out")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in ("a", "b", "c")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # no two holders overlap: every "in" is followed immediately by its "out"
+        assert all(events[i].split()[0] == events[i + 1].split()[0] for i in range(0, len(events), 2))
+
+    def test_waiter_relocks_a_removed_lock_file(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        events = []
+        other_in = threading.Event()
+        other_release = threading.Event()
+
+        def waiter():
+            with file_lock(path):
+                events.append("waiter in")
+
+        def other():
+            with file_lock(path):
+                events.append("other in")
+                other_in.set()
+                other_release.wait(1)
+                events.append("other out")
+
+        with file_lock(path):
+            waiting = threading.Thread(target=waiter)
+            waiting.start()
+            time.sleep(0.1)  # the waiter is blocked on the lock file ...
+            (temp_cache_dir / f"file{LOCK_SUFFIX}").unlink()  # ... which is removed, as when pruned
+            newcomer = threading.Thread(target=other)
+            newcomer.start()
+            other_in.wait(1)  # the newcomer holds the lock on a new lock file
+        time.sleep(0.1)
+        other_release.set()
+        waiting.join()
+        newcomer.join()
+
+        assert events == ["other in", "other out", "waiter in"]
+
+
+class TestRemoveLocked:
+    """Test removing a file under its lock."""
+
+    def test_removes_file_sidecars_and_lock(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        path.write_bytes(b"contents")
+        (temp_cache_dir / "file.validators").write_text("{}")
+        with file_lock(path):
+            pass
+
+        assert remove_locked(path, (".validators",))
+        assert list(temp_cache_dir.iterdir()) == []
+
+    def test_not_removed_while_locked(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        path.write_bytes(b"contents")
+        with file_lock(path):
+            assert not remove_locked(path)
+            assert path.exists()
+            assert (temp_cache_dir / f"file{LOCK_SUFFIX}").exists()
+
+
+class TestFileStamp:
+    """Test file stamps."""
+
+    def test_missing_file(self, temp_cache_dir):
+        assert file_stamp(temp_cache_dir / "missing") is None
+
+    def test_stamp_changes_on_replace(self, temp_cache_dir):
+        path = temp_cache_dir / "file"
+        write_atomic(path, b"one")
+        before = file_stamp(path)
+        write_atomic(path, b"two")
+        assert file_stamp(path) != before
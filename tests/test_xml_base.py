@@ -1,12 +1,14 @@
 """Tests for xml_base module."""
 
+import tracemalloc
 from unittest.mock import patch
 from xml.etree.ElementTree import Element
 
 import pytest
+from defusedxml import ElementTree
 
-from sdmxabs.download_cache import CacheError, HttpError
-from sdmxabs.xml_base import NAME_SPACES, URL_STEM, acquire_xml
+from sdmxabs.download_cache import CacheError, HttpError, memory_cache_stats
+from sdmxabs.xml_base import NAME_SPACES, URL_STEM, _iter_elements, acquire_xml, iter_xml
 
 
 class TestNamespaces:
@@ -48,6 +50,28 @@ class TestAcquireXml:
         assert result.find("child").text == "test"
         mock_acquire_url.assert_called_once_with("http://test.com", modality="prefer-cache", verbose=False)
 
+    @patch("sdmxabs.xml_base.acquire_url")
+    def test_parsed_tree_reused(self, mock_acquire_url):
+        """Test that identical XML for a URL is parsed only once."""
+        mock_acquire_url.return_value = b"<root><child>test</child></root>"
+
+        first = acquire_xml("http://test.com")
+        second = acquire_xml("http://test.com")
+
+        assert second is first
+        assert memory_cache_stats()["trees"]["hits"] == 1
+
+    @patch("sdmxabs.xml_base.acquire_url")
+    def test_changed_xml_reparsed(self, mock_acquire_url):
+        """Test that a new tree is parsed when the XML for a URL changes."""
+        mock_acquire_url.return_value = b"<root>old</root>"
+        first = acquire_xml("http://test.com")
+        mock_acquire_url.return_value = b"<root>new</root>"
+        second = acquire_xml("http://test.com")
+
+        assert first.text == "old"
+        assert second.text == "new"
+
     @patch("sdmxabs.xml_base.acquire_url")
     def test_acquire_xml_with_namespace(self, mock_acquire_url):
         """Test XML acquisition with namespaced elements."""
@@ -196,3 +220,70 @@ class TestXmlIntegration:
             assert value is not None
             assert value.get("id") == "FREQ"
             assert value.get("value") == "Q"
+
+
+def _data_message(series_count, obs_count):
+    """Build a generic SDMX-ML data message."""
+    obs = "".join(
+        f'<gen:Obs><gen:ObsDimension value="P{i}"/><gen:ObsValue value="{i}"/></gen:Obs>'
+        for i in range(obs_count)
+    )
+    series = "".join(
+        f'<gen:Series><gen:SeriesKey><gen:Value id="S" value="{i}"/></gen:SeriesKey>{obs}</gen:Series>'
+        for i in range(series_count)
+    )
+    return (
+        f'<mes:GenericData xmlns:mes="{NAME_SPACES["mes"]}" xmlns:gen="{NAME_SPACES["gen"]}">'
+        f"<mes:Header/><mes:DataSet>{series}</mes:DataSet></mes:GenericData>"
+    ).encode()
+
+
+class TestIterXml:
+    """Test incremental parsing with iter_xml."""
+
+    series_tag = f"{{{NAME_SPACES['gen']}}}Series"
+
+    @patch("sdmxabs.xml_base.acquire_url")
+    def test_yields_each_series(self, mock_acquire_url):
+        mock_acquire_url.return_value = _data_message(3, 2)
+
+        keys = [
+            (
+                series.find("gen:SeriesKey/gen:Value", NAME_SPACES).get("value"),
+                len(series.findall("gen:Obs", NAME_SPACES)),
+            )
+            for series in iter_xml("http://test.com", "gen:Series")
+        ]
+
+        assert keys == [("0", 2), ("1", 2), ("2", 2)]
+        mock_acquire_url.assert_called_once_with("http://test.com", modality="prefer-cache")
+
+    def test_series_freed_after_use(self):
+        yielded = []
+        for series in _iter_elements("http://test.com", _data_message(3, 2), self.series_tag):
+            yielded.append(series)
+            assert len(series) == 3  # the key and two observations
+        assert all(len(series) == 0 for series in yielded)
+
+    def test_invalid_xml(self):
+        with pytest.raises(ValueError, match=r"Invalid XML received from http://test\.com"):
+            list(_iter_elements("http://test.com", b"<root><unclosed></root>", self.series_tag))
+
+    def test_peak_memory_bounded_by_series(self):
+        xml = _data_message(2_000, 20)
+
+        def peak(parse):
+            tracemalloc.start()
+            try:
+                parse()
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        def stream():
+            for series in _iter_elements("http://test.com", xml, self.series_tag):
+                series.findall("gen:Obs", NAME_SPACES)
+
+        tree_peak = peak(lambda: ElementTree.fromstring(xml))
+        stream_peak = peak(stream)
+        assert stream_peak < tree_peak / 10